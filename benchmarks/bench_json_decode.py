@@ -0,0 +1,105 @@
+"""
+Микробенчмарк разбора ответов hh.ru: стандартный json против orjson/msgspec.
+
+Запуск:
+    python -m benchmarks.bench_json_decode [ответ1.json ответ2.json ...]
+
+Лучше всего передать реальные ответы /vacancies, сохраненные, например, так:
+    curl -s "https://api.hh.ru/vacancies?text=python&per_page=50" > page.json
+Без аргументов используется синтетическая страница того же формата.
+
+Сравниваются два пути для одной страницы:
+- "было": json.loads + json.dumps параметров для строки лога;
+- "стало": выбранный декодер без сериализации параметров (лог выключен).
+"""
+import json
+import sys
+import timeit
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from hh_bot.services.hh_client import resolve_json_decoder
+from hh_bot.services.hh_service import build_search_params
+
+SAMPLE_FILTERS = {"position": "Python разработчик", "city": "1", "salary": 150000}
+
+
+def synthetic_page(per_page: int = 50) -> str:
+    """Строит страницу выдачи, похожую по структуре и размеру на ответ hh.ru."""
+    items = []
+    for i in range(per_page):
+        items.append({
+            "id": str(90000000 + i),
+            "name": f"Python разработчик (Backend) #{i}",
+            "area": {"id": "1", "name": "Москва", "url": "https://api.hh.ru/areas/1"},
+            "salary": {"from": 150000 + i * 1000, "to": 250000, "currency": "RUR", "gross": False},
+            "type": {"id": "open", "name": "Открытая"},
+            "address": None,
+            "published_at": "2025-10-01T12:00:00+0300",
+            "created_at": "2025-10-01T12:00:00+0300",
+            "archived": False,
+            "alternate_url": f"https://hh.ru/vacancy/{90000000 + i}",
+            "employer": {
+                "id": str(1000 + i),
+                "name": "ООО «Ромашка»",
+                "url": f"https://api.hh.ru/employers/{1000 + i}",
+                "alternate_url": f"https://hh.ru/employer/{1000 + i}",
+                "logo_urls": {"90": "https://img.hhcdn.ru/90.png", "240": "https://img.hhcdn.ru/240.png"},
+                "trusted": True,
+            },
+            "snippet": {
+                "requirement": "Опыт коммерческой разработки на <highlighttext>Python</highlighttext> от 3 лет. "
+                               "Знание asyncio, PostgreSQL, Docker.",
+                "responsibility": "Разработка и поддержка микросервисов, code review, участие в проектировании.",
+            },
+            "schedule": {"id": "remote", "name": "Удаленная работа"},
+            "professional_roles": [{"id": "96", "name": "Программист, разработчик"}],
+            "experience": {"id": "between3And6", "name": "От 3 до 6 лет"},
+            "employment": {"id": "full", "name": "Полная занятость"},
+        })
+    page = {"items": items, "found": 2000, "pages": 40, "page": 0, "per_page": per_page}
+    return json.dumps(page, ensure_ascii=False)
+
+
+def load_payloads(paths: List[str]) -> List[str]:
+    if not paths:
+        return [synthetic_page()]
+    return [Path(path).read_text(encoding="utf-8") for path in paths]
+
+
+def bench(label: str, func: Callable[[], object], number: int) -> float:
+    seconds = min(timeit.repeat(func, number=number, repeat=5))
+    per_call_us = seconds / number * 1_000_000
+    print(f"{label:<40} {per_call_us:10.1f} мкс/страница")
+    return per_call_us
+
+
+def main(argv: List[str]) -> None:
+    payloads = load_payloads(argv)
+    params: Dict = build_search_params(SAMPLE_FILTERS)
+    size_kb = sum(len(p.encode("utf-8")) for p in payloads) / len(payloads) / 1024
+    print(f"Страниц: {len(payloads)}, средний размер: {size_kb:.1f} КБ")
+    number = 200
+
+    def baseline() -> None:
+        json.dumps(params, ensure_ascii=False, indent=2)
+        for payload in payloads:
+            json.loads(payload)
+
+    base = bench("json.loads + json.dumps для лога", baseline, number)
+    for name in ("json", "orjson", "msgspec"):
+        decoder = resolve_json_decoder(name)
+        if name != "json" and decoder is json.loads:
+            print(f"{name:<40} не установлен")
+            continue
+
+        def fast_path(decoder=decoder) -> None:
+            for payload in payloads:
+                decoder(payload)
+
+        result = bench(f"{name} без сериализации для лога", fast_path, number)
+        print(f"{'':<40} ускорение x{base / result:.2f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
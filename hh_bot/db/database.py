@@ -6,20 +6,38 @@
 и создания таблиц в базе данных.
 """
 
+import os
+
 from sqlalchemy.ext.asyncio import (
     create_async_engine,
     async_sessionmaker,
     AsyncSession,
     AsyncEngine
 )
-from typing import Tuple, Optional
+from typing import Any, Dict, Tuple, Optional
 from ..utils.logger import logger
 import asyncio
 from .base import Base  # Импортируем Base из нового файла
+from .pool_metrics import MeteredAsyncQueuePool, get_engine_pool_metrics, instrument_engine
+from .routing import ReplicaRouter, RoutingSession
+from .sqlite_tuning import SQLITE_SINGLE_WRITER, apply_sqlite_pragmas, is_sqlite_file_url, is_sqlite_url
+
+# Настройки пула соединений
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))  # Постоянных соединений
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))  # Дополнительных соединений сверх DB_POOL_SIZE
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # Ожидание свободного соединения, секунды
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # Пересоздавать соединения старше N секунд (-1 - никогда)
+# Проверка соединения запросом перед каждой выдачей из пула. Без нее соединения
+# обновляются по DB_POOL_RECYCLE, а оборванное соединение обнаруживается на
+# первом запросе (пул при этом сбрасывается)
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# Реплика для чтения (асинхронный драйвер); пустое значение - все запросы к основной БД
+ASYNC_DATABASE_REPLICA_URL = os.getenv("ASYNC_DATABASE_REPLICA_URL", "").strip()
 
 # Глобальные переменные для движка и фабрики сессий
 async_engine: Optional[AsyncEngine] = None
 async_session_maker: Optional[async_sessionmaker[AsyncSession]] = None
+async_replica_engine: Optional[AsyncEngine] = None
 
 def get_db_engine() -> Optional[AsyncEngine]:
     """Возвращает глобальный экземпляр движка базы данных."""
@@ -33,12 +51,20 @@ def get_session_maker() -> Optional[async_sessionmaker[AsyncSession]]:
         logger.error("Фабрика сессий не инициализирована. Сначала вызовите create_db_engine_and_sessionmaker()")
     return async_session_maker
 
+def get_pool_metrics() -> Optional[Dict[str, Any]]:
+    """Метрики пула соединений глобального движка (см. `pool_metrics.PoolMetrics`)."""
+    return get_engine_pool_metrics(async_engine)
+
 def create_db_engine_and_sessionmaker(
     async_db_url: str,
     echo: bool = False,
-    pool_size: int = 5,
-    max_overflow: int = 10,
-    pool_timeout: int = 30
+    pool_size: int = DB_POOL_SIZE,
+    max_overflow: int = DB_MAX_OVERFLOW,
+    pool_timeout: float = DB_POOL_TIMEOUT,
+    pool_recycle: int = DB_POOL_RECYCLE,
+    pool_pre_ping: bool = DB_POOL_PRE_PING,
+    replica_url: Optional[str] = ASYNC_DATABASE_REPLICA_URL,
+    sqlite_single_writer: bool = SQLITE_SINGLE_WRITER,
 ) -> Tuple[AsyncEngine, async_sessionmaker[AsyncSession]]:
     """
     Создает асинхронный движок базы данных и фабрику сессий.
@@ -49,11 +75,18 @@ def create_db_engine_and_sessionmaker(
         pool_size: Количество постоянных соединений в пуле
         max_overflow: Максимальное количество дополнительных соединений
         pool_timeout: Таймаут в секундах для получения соединения из пула
+        pool_recycle: Возраст соединения в секундах, после которого оно пересоздается
+        pool_pre_ping: Проверять соединение перед каждой выдачей из пула
+        replica_url: URL реплики для чтения (см. `routing.RoutingSession`); пул
+            реплики настраивается так же, как пул основной БД
+        sqlite_single_writer: Для файла SQLite без реплики - писать через одно
+            соединение, а читать через пул соединений к тому же файлу
+            (см. `sqlite_tuning`)
 
     Returns:
         tuple: (engine, session_maker) - движок базы данных и фабрика сессий
     """
-    global async_engine, async_session_maker
+    global async_engine, async_session_maker, async_replica_engine
     
     # Проверяем, был ли уже инициализирован движок
     if async_engine is not None:
@@ -65,24 +98,59 @@ def create_db_engine_and_sessionmaker(
         except RuntimeError:
             # Если нет запущенного цикла событий, закрываем синхронно
             asyncio.run(async_engine.dispose())
+        if async_replica_engine is not None:
+            try:
+                asyncio.get_running_loop().create_task(async_replica_engine.dispose())
+            except RuntimeError:
+                asyncio.run(async_replica_engine.dispose())
 
     try:
-        # Создаем асинхронный движок
-        engine = create_async_engine(
-            async_db_url,
-            echo=echo,
-            pool_pre_ping=True,
+        pool_options = dict(
+            poolclass=MeteredAsyncQueuePool,  # Пул с измерением ожидания соединения
+            pool_pre_ping=pool_pre_ping,
             pool_size=pool_size,
             max_overflow=max_overflow,
             pool_timeout=pool_timeout,
-            pool_recycle=1800  # Пересоздание соединений каждые 30 минут
+            pool_recycle=pool_recycle,
         )
+        single_writer = sqlite_single_writer and not replica_url and is_sqlite_file_url(async_db_url)
+        if single_writer:
+            # Единственное соединение писателя: ожидающие его сессии выстраиваются в очередь пула
+            engine = create_async_engine(
+                async_db_url, echo=echo, **{**pool_options, "pool_size": 1, "max_overflow": 0}
+            )
+        else:
+            # Создаем асинхронный движок
+            engine = create_async_engine(async_db_url, echo=echo, **pool_options)
+        if is_sqlite_url(async_db_url):
+            apply_sqlite_pragmas(engine)
+        instrument_engine(engine)
         logger.info(f"✅ Движок базы данных успешно создан. Echo={'включен' if echo else 'отключен'}")
+        logger.info(
+            f"Пул соединений: size={pool_size}, max_overflow={max_overflow}, timeout={pool_timeout}с, "
+            f"recycle={pool_recycle}с, pre_ping={'да' if pool_pre_ping else 'нет'}"
+        )
 
-        # Создаем фабрику сессий
+        replica_engine = None
+        if single_writer:
+            # Читатели SQLite в режиме WAL не блокируют писателя и друг друга
+            replica_engine = create_async_engine(async_db_url, echo=echo, **pool_options)
+            apply_sqlite_pragmas(replica_engine)
+            instrument_engine(replica_engine)
+            logger.info("✅ SQLite: запись через одно соединение, чтение через пул соединений")
+        elif replica_url:
+            replica_engine = create_async_engine(replica_url, echo=echo, **pool_options)
+            if is_sqlite_url(replica_url):
+                apply_sqlite_pragmas(replica_engine)
+            instrument_engine(replica_engine)
+            logger.info("✅ Движок реплики для чтения создан")
+
+        # Создаем фабрику сессий: чтение может маршрутизироваться на реплику
         session_maker = async_sessionmaker(
             bind=engine,
             class_=AsyncSession,
+            sync_session_class=RoutingSession,
+            router=ReplicaRouter(engine, replica_engine, route_all_reads=single_writer),
             expire_on_commit=False,
             autoflush=False
         )
@@ -91,6 +159,7 @@ def create_db_engine_and_sessionmaker(
         # Сохраняем глобальные ссылки
         async_engine = engine
         async_session_maker = session_maker
+        async_replica_engine = replica_engine
 
         return engine, session_maker
     except Exception as e:
@@ -125,12 +194,20 @@ async def create_tables(engine: Optional[AsyncEngine] = None) -> None:
 
 async def dispose_engine() -> None:
     """Закрывает все соединения и очищает ресурсы движка базы данных."""
-    global async_engine, async_session_maker
+    global async_engine, async_session_maker, async_replica_engine
     
     if async_engine is not None:
+        pool_stats = get_engine_pool_metrics(async_engine)
+        if pool_stats:
+            logger.info(f"Пул соединений БД за время работы: {pool_stats}")
         await async_engine.dispose()
         logger.info("✅ Движок базы данных успешно закрыт")
+
+    if async_replica_engine is not None:
+        await async_replica_engine.dispose()
+        logger.info("✅ Движок реплики успешно закрыт")
     
     # Сбрасываем глобальные переменные
     async_engine = None
-    async_session_maker = None
\ No newline at end of file
+    async_session_maker = None
+    async_replica_engine = None
@@ -6,11 +6,13 @@ from .user import User, SearchFilter, LLMSettings
 from .vacancy import Vacancy, UserVacancyStatus
 from ...enums import UserVacancyStatusEnum 
 from .documents import GeneratedDocument
+from .digest import DigestRun, DigestRunItem
 
 # Экспорт для Alembic и внешнего использования
 __all__ = [
     "Base",  # <-- ДОБАВЛЕНО: Экспортируем Base
     "User", "SearchFilter", "LLMSettings",
     "Vacancy", "UserVacancyStatus",
-    "GeneratedDocument"
+    "GeneratedDocument",
+    "DigestRun", "DigestRunItem",
 ]
\ No newline at end of file
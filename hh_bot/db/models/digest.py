@@ -0,0 +1,64 @@
+# hh_bot/db/models/digest.py
+from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey, Index, UniqueConstraint, Enum as SAEnum
+from datetime import datetime, timezone
+from ..base import Base
+from ...enums import DigestRunStatusEnum, DigestRunItemStatusEnum
+
+
+class DigestRun(Base):
+    """
+    Запуск ежедневной рассылки (одной ее части) за конкретный день.
+    Нужен, чтобы после перезапуска процесса продолжить рассылку с того же места.
+    """
+
+    __tablename__ = "digest_runs"
+    __table_args__ = (
+        UniqueConstraint("run_date", "shard", "shards", name="uq_digest_runs_date_shard"),
+    )
+    id = Column(Integer, primary_key=True, index=True)
+    run_date = Column(Date, nullable=False)
+    shard = Column(Integer, nullable=False, default=0)
+    shards = Column(Integer, nullable=False, default=1)
+    status = Column(
+        SAEnum(
+            DigestRunStatusEnum,
+            name="digest_run_status_enum",
+            native_enum=False,
+            values_callable=lambda x: [e.value for e in x]
+        ),
+        default=DigestRunStatusEnum.RUNNING,
+        nullable=False,
+    )
+    started_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<DigestRun(id={self.id}, run_date={self.run_date}, shard={self.shard}/{self.shards}, status='{self.status}')>"
+
+
+class DigestRunItem(Base):
+    """Отметка о том, обработан ли пользователь в запуске рассылки."""
+
+    __tablename__ = "digest_run_items"
+    __table_args__ = (
+        UniqueConstraint("run_id", "user_id", name="uq_digest_run_items_run_user"),
+        Index("ix_digest_run_items_run_status", "run_id", "status"),
+    )
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(Integer, ForeignKey("digest_runs.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    status = Column(
+        SAEnum(
+            DigestRunItemStatusEnum,
+            name="digest_run_item_status_enum",
+            native_enum=False,
+            values_callable=lambda x: [e.value for e in x]
+        ),
+        default=DigestRunItemStatusEnum.PENDING,
+        nullable=False,
+    )
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")  # Сколько раз пользователя обрабатывали
+
+    def __repr__(self):
+        return f"<DigestRunItem(run_id={self.run_id}, user_id={self.user_id}, status='{self.status}')>"
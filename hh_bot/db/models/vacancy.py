@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, DateTime, Integer, ForeignKey, Boolean, Enum as SAEnum
+from sqlalchemy import Column, String, Text, DateTime, Integer, ForeignKey, Boolean, JSON, Index, UniqueConstraint, Enum as SAEnum
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 from ..base import Base
@@ -16,13 +16,24 @@ class Vacancy(Base):
     apply_url = Column(String, nullable=True)
     description_snippet = Column(Text)
     # ДЛЯ ОБСУЖДЕНИЯ: Можно рассмотреть `DateTime(timezone=True)` в будущем
-    published_at = Column(DateTime)
+    published_at = Column(DateTime, index=True)  # Индекс для выборок свежих вакансий
+    # Полное описание и ключевые навыки из /vacancies/{id}; загружаются один раз
+    description = Column(Text, nullable=True)
+    key_skills = Column(JSON, nullable=True)
+    details_fetched_at = Column(DateTime(timezone=True), nullable=True)
 
     def __repr__(self):
         return f"<Vacancy(id={self.id}, hh_id='{self.hh_id}', title='{self.title}')>"
 
 class UserVacancyStatus(Base):
     __tablename__ = "user_vacancy_status"
+    __table_args__ = (
+        # Один статус на пару пользователь-вакансия: на нем держится пакетная вставка
+        # ON CONFLICT DO NOTHING, и он же служит индексом для проверок "уже отправляли?"
+        UniqueConstraint("user_id", "vacancy_id", name="uq_user_vacancy_status_user_vacancy"),
+        # Списки вакансий пользователя по статусу в порядке добавления
+        Index("ix_user_vacancy_status_user_status_created", "user_id", "status", "created_at"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     vacancy_id = Column(Integer, ForeignKey("vacancies.id"), nullable=False)
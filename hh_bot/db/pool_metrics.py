@@ -0,0 +1,142 @@
+# hh_bot/db/pool_metrics.py
+"""
+Метрики пула соединений к БД.
+
+Показывают, ждут ли запросы свободного соединения (например, когда
+рассылка упирается в размер пула), сколько соединений занято, как часто
+используется overflow и сколько стоит pre-ping при каждой выдаче
+соединения из пула.
+
+- Время ожидания и занятость считает `MeteredAsyncQueuePool`
+  (переопределяет `_do_get` - точку расширения реализаций пула SQLAlchemy).
+- Стоимость pre-ping - обертка `do_ping` диалекта движка.
+- Новые соединения, инвалидации и обрывы связи - события пула и движка.
+"""
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from ..utils.logger import logger
+
+
+@dataclass
+class PoolMetrics:
+    """Накопительные метрики пула с момента создания движка."""
+    checkouts: int = 0
+    timeouts: int = 0
+    wait_total: float = 0.0  # Суммарное ожидание соединения, секунды
+    wait_max: float = 0.0
+    in_use: int = 0  # Занято соединений на момент последней выдачи
+    in_use_peak: int = 0
+    overflow_checkouts: int = 0  # Выдач, при которых пул работал сверх pool_size
+    overflow_peak: int = 0
+    pings: int = 0
+    ping_total: float = 0.0
+    connects: int = 0
+    invalidations: int = 0
+    disconnects: int = 0
+
+    def record_checkout(self, wait: float, in_use: int, overflow: int) -> None:
+        self.checkouts += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        self.in_use = in_use
+        self.in_use_peak = max(self.in_use_peak, in_use)
+        if overflow > 0:
+            self.overflow_checkouts += 1
+            self.overflow_peak = max(self.overflow_peak, overflow)
+
+    def record_ping(self, duration: float) -> None:
+        self.pings += 1
+        self.ping_total += duration
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_avg_ms": round(self.wait_total / self.checkouts * 1000, 2) if self.checkouts else 0.0,
+            "wait_max_ms": round(self.wait_max * 1000, 2),
+            "in_use": self.in_use,
+            "in_use_peak": self.in_use_peak,
+            "overflow_checkouts": self.overflow_checkouts,
+            "overflow_peak": self.overflow_peak,
+            "pings": self.pings,
+            "ping_avg_ms": round(self.ping_total / self.pings * 1000, 2) if self.pings else 0.0,
+            "connects": self.connects,
+            "invalidations": self.invalidations,
+            "disconnects": self.disconnects,
+        }
+
+
+class MeteredAsyncQueuePool(AsyncAdaptedQueuePool):
+    """`AsyncAdaptedQueuePool`, который записывает ожидание соединения в `metrics`."""
+
+    metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            if self.metrics is not None:
+                self.metrics.timeouts += 1
+            raise
+        if self.metrics is not None:
+            self.metrics.record_checkout(time.perf_counter() - started, self.checkedout(), self.overflow())
+        return record
+
+    def recreate(self):
+        # Пул пересоздается после dispose() и обрыва связи - метрики переходят в новый
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def instrument_engine(engine: AsyncEngine) -> PoolMetrics:
+    """Подключает сбор метрик к движку и возвращает объект метрик."""
+    metrics = PoolMetrics()
+    sync_engine = engine.sync_engine
+    # Для других классов пула ожидание не измеряется, но остальные метрики собираются
+    sync_engine.pool.metrics = metrics  # type: ignore[attr-defined]
+
+    dialect = sync_engine.dialect
+    do_ping = dialect.do_ping
+
+    def timed_ping(dbapi_connection) -> bool:
+        started = time.perf_counter()
+        try:
+            return do_ping(dbapi_connection)
+        finally:
+            metrics.record_ping(time.perf_counter() - started)
+
+    dialect.do_ping = timed_ping  # type: ignore[method-assign]
+
+    @event.listens_for(sync_engine.pool, "connect")
+    def _on_connect(dbapi_connection, connection_record) -> None:
+        metrics.connects += 1
+
+    @event.listens_for(sync_engine.pool, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception) -> None:
+        metrics.invalidations += 1
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _on_error(context) -> None:
+        if context.is_disconnect:
+            # SQLAlchemy сам инвалидирует соединения пула, открытые до обрыва;
+            # без pre-ping оборванное соединение обнаруживается здесь, на первом запросе
+            metrics.disconnects += 1
+            logger.warning(f"Обрыв соединения с БД: {context.original_exception}")
+
+    return metrics
+
+
+def get_engine_pool_metrics(engine: Optional[AsyncEngine]) -> Optional[Dict[str, Any]]:
+    """Метрики пула движка или None, если сбор метрик не подключен."""
+    if engine is None:
+        return None
+    metrics = getattr(engine.sync_engine.pool, "metrics", None)
+    return metrics.as_dict() if metrics is not None else None
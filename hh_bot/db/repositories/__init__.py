@@ -0,0 +1,14 @@
+# hh_bot/db/repositories/__init__.py
+"""
+Пакетные операции с БД, которые выполняются одним SQL-запросом на набор
+строк вместо запроса на каждый ORM-объект.
+"""
+from .vacancies import upsert_vacancies
+from .statuses import add_vacancy_statuses, set_vacancy_status, transition_vacancy_statuses
+
+__all__ = [
+    "upsert_vacancies",
+    "add_vacancy_statuses",
+    "set_vacancy_status",
+    "transition_vacancy_statuses",
+]
@@ -0,0 +1,140 @@
+# hh_bot/db/repositories/statuses.py
+"""
+Пакетная запись статусов вакансий пользователя.
+
+Все статусы пишутся одним `INSERT ... ON CONFLICT (user_id, vacancy_id) DO NOTHING`:
+повторная пометка той же вакансии ничего не меняет и не вызывает ошибку,
+поэтому операцию можно безопасно повторять.
+
+Смена статусов тоже выполняется на стороне БД: `UPDATE ... WHERE user_id = ?
+AND status IN (...) ... RETURNING id` без загрузки ORM-объектов.
+"""
+from typing import Iterable, List, Optional
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import UserVacancyStatus
+from ...enums import UserVacancyStatusEnum
+from .vacancies import _dialect_insert, _rows_per_insert
+
+
+async def add_vacancy_statuses(
+    session: AsyncSession,
+    user_id: int,
+    vacancy_ids: Iterable[int],
+    status: UserVacancyStatusEnum = UserVacancyStatusEnum.SENT,
+) -> None:
+    """
+    Добавляет пользователю статусы вакансий, которых у него еще нет.
+    Уже существующие статусы (в том числе другие, например NOT_INTERESTED) не меняются.
+    Commit выполняет вызывающий код.
+    """
+    unique_ids = list(dict.fromkeys(vacancy_ids))
+    if not unique_ids:
+        return
+
+    dialect_insert = _dialect_insert(session)
+    if dialect_insert is None:
+        # БД без ON CONFLICT: вставляем только отсутствующие
+        existing = await session.scalars(
+            select(UserVacancyStatus.vacancy_id).where(
+                UserVacancyStatus.user_id == user_id,
+                UserVacancyStatus.vacancy_id.in_(unique_ids),
+            )
+        )
+        existing_ids = set(existing.all())
+        unique_ids = [vacancy_id for vacancy_id in unique_ids if vacancy_id not in existing_ids]
+        if unique_ids:
+            await session.execute(
+                insert(UserVacancyStatus),
+                [{"user_id": user_id, "vacancy_id": vacancy_id, "status": status} for vacancy_id in unique_ids],
+            )
+        return
+
+    chunk_size = _rows_per_insert(UserVacancyStatus.__table__, ("user_id", "vacancy_id", "status"))
+    for start in range(0, len(unique_ids), chunk_size):
+        chunk = unique_ids[start:start + chunk_size]
+        stmt = (
+            dialect_insert(UserVacancyStatus)
+            .values([{"user_id": user_id, "vacancy_id": vacancy_id, "status": status} for vacancy_id in chunk])
+            .on_conflict_do_nothing(index_elements=[UserVacancyStatus.user_id, UserVacancyStatus.vacancy_id])
+        )
+        await session.execute(stmt)
+
+
+async def transition_vacancy_statuses(
+    session: AsyncSession,
+    user_id: int,
+    to_status: UserVacancyStatusEnum,
+    from_statuses: Iterable[UserVacancyStatusEnum] = (UserVacancyStatusEnum.SENT,),
+    status_ids: Optional[Iterable[int]] = None,
+    vacancy_ids: Optional[Iterable[int]] = None,
+) -> List[int]:
+    """
+    Переводит статусы пользователя из `from_statuses` в `to_status` одним UPDATE.
+
+    Args:
+        status_ids: Ограничить строками user_vacancy_status с этими ID.
+        vacancy_ids: Ограничить этими вакансиями.
+
+    Returns:
+        ID строк, статус которых действительно изменился.
+        Commit выполняет вызывающий код.
+    """
+    conditions = [
+        UserVacancyStatus.user_id == user_id,
+        UserVacancyStatus.status.in_(list(from_statuses)),
+    ]
+    if status_ids is not None:
+        status_ids = list(status_ids)
+        if not status_ids:
+            return []
+        conditions.append(UserVacancyStatus.id.in_(status_ids))
+    if vacancy_ids is not None:
+        vacancy_ids = list(vacancy_ids)
+        if not vacancy_ids:
+            return []
+        conditions.append(UserVacancyStatus.vacancy_id.in_(vacancy_ids))
+    stmt = update(UserVacancyStatus).where(*conditions).values(status=to_status)
+
+    if session.get_bind().dialect.update_returning:
+        result = await session.execute(stmt.returning(UserVacancyStatus.id))
+        return list(result.scalars().all())
+
+    # БД без UPDATE ... RETURNING: выбираем ID и обновляем только их
+    changed = await session.scalars(select(UserVacancyStatus.id).where(*conditions))
+    changed_ids = list(changed.all())
+    if changed_ids:
+        await session.execute(
+            update(UserVacancyStatus).where(UserVacancyStatus.id.in_(changed_ids)).values(status=to_status)
+        )
+    return changed_ids
+
+
+async def set_vacancy_status(
+    session: AsyncSession,
+    user_id: int,
+    vacancy_id: int,
+    status: UserVacancyStatusEnum,
+) -> None:
+    """
+    Выставляет статус вакансии пользователя независимо от текущего
+    (создает строку, если ее нет). Commit выполняет вызывающий код.
+    """
+    dialect_insert = _dialect_insert(session)
+    if dialect_insert is None:
+        changed = await transition_vacancy_statuses(
+            session, user_id, status, from_statuses=list(UserVacancyStatusEnum), vacancy_ids=[vacancy_id]
+        )
+        if not changed:
+            await add_vacancy_statuses(session, user_id, [vacancy_id], status)
+        return
+
+    stmt = dialect_insert(UserVacancyStatus).values(user_id=user_id, vacancy_id=vacancy_id, status=status)
+    await session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[UserVacancyStatus.user_id, UserVacancyStatus.vacancy_id],
+            set_={"status": stmt.excluded.status},
+        )
+    )
@@ -0,0 +1,116 @@
+# hh_bot/db/repositories/vacancies.py
+"""
+Сохранение вакансий пачкой.
+
+Вакансии со страницы выдачи hh.ru записываются одним запросом
+`INSERT ... ON CONFLICT (hh_id) DO UPDATE ... RETURNING` (PostgreSQL и SQLite).
+Конфликт по hh_id разрешает сама БД, поэтому два пользователя, одновременно
+сохраняющие одну и ту же вакансию, не получают IntegrityError.
+"""
+from typing import Any, Dict, Iterable, List
+
+from sqlalchemy import Table, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import Vacancy
+
+# Предел числа параметров в одном запросе: SQLITE_MAX_VARIABLE_NUMBER у SQLite до 3.32
+MAX_QUERY_PARAMS = 999
+
+
+def _rows_per_insert(table: Table, keys: Iterable[str]) -> int:
+    """
+    Сколько строк помещается в один INSERT, не превышая MAX_QUERY_PARAMS.
+    Параметры на строку - переданные колонки плюс колонки со значением
+    по умолчанию на стороне Python (SQLAlchemy подставляет их в каждую строку).
+    """
+    columns = set(keys) | {column.key for column in table.columns if column.default is not None}
+    return max(1, MAX_QUERY_PARAMS // max(1, len(columns)))
+
+
+def _dialect_insert(session: AsyncSession):
+    """insert() с поддержкой ON CONFLICT для диалекта текущей БД или None."""
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    return None
+
+
+async def upsert_vacancies(
+    session: AsyncSession,
+    rows: Iterable[Dict[str, Any]],
+) -> Dict[str, Vacancy]:
+    """
+    Создает или обновляет вакансии и возвращает их по hh_id.
+
+    Args:
+        session: Сессия БД. Commit выполняет вызывающий код.
+        rows: Значения колонок `Vacancy`; у всех строк одинаковый набор ключей,
+            обязателен `hh_id`. Повторы hh_id схлопываются (берется последний).
+
+    У существующих вакансий обновляются описательные поля из выдачи.
+    Зарплата и ссылка на отклик заполняются, только если их еще не было:
+    поиск и рассылка форматируют зарплату по-разному, и перезапись
+    меняла бы ее при каждом запросе.
+    """
+    unique_rows: List[Dict[str, Any]] = list({row["hh_id"]: row for row in rows}.values())
+    if not unique_rows:
+        return {}
+
+    insert = _dialect_insert(session)
+    if insert is None:
+        return await _upsert_vacancies_fallback(session, unique_rows)
+
+    vacancies: Dict[str, Vacancy] = {}
+    chunk_size = _rows_per_insert(Vacancy.__table__, unique_rows[0])
+    for start in range(0, len(unique_rows), chunk_size):
+        chunk = unique_rows[start:start + chunk_size]
+        stmt = insert(Vacancy).values(chunk)
+        updates = {}
+        for column in chunk[0]:
+            if column == "hh_id":
+                continue
+            if column in ("salary", "apply_url"):
+                updates[column] = func.coalesce(getattr(Vacancy, column), getattr(stmt.excluded, column))
+            else:
+                updates[column] = getattr(stmt.excluded, column)
+        if updates:
+            stmt = stmt.on_conflict_do_update(index_elements=[Vacancy.hh_id], set_=updates)
+        else:
+            # DO UPDATE без изменений нужен, чтобы RETURNING вернул и существующие строки
+            stmt = stmt.on_conflict_do_update(index_elements=[Vacancy.hh_id], set_={"hh_id": stmt.excluded.hh_id})
+        result = await session.scalars(
+            stmt.returning(Vacancy),
+            # Уже загруженные в сессию объекты получают значения из RETURNING
+            execution_options={"populate_existing": True},
+        )
+        vacancies.update((vac.hh_id, vac) for vac in result.all())
+    return vacancies
+
+
+async def _upsert_vacancies_fallback(
+    session: AsyncSession,
+    rows: List[Dict[str, Any]],
+) -> Dict[str, Vacancy]:
+    """Вариант для БД без ON CONFLICT: выборка существующих и вставка недостающих."""
+    result = await session.scalars(select(Vacancy).where(Vacancy.hh_id.in_([row["hh_id"] for row in rows])))
+    vacancies = {vac.hh_id: vac for vac in result.all()}
+    for row in rows:
+        if row["hh_id"] in vacancies:
+            continue
+        vacancy = Vacancy(**row)
+        try:
+            async with session.begin_nested():
+                session.add(vacancy)
+                await session.flush()
+        except IntegrityError:
+            vacancy = await session.scalar(select(Vacancy).where(Vacancy.hh_id == row["hh_id"]))
+            if vacancy is None:
+                raise
+        vacancies[row["hh_id"]] = vacancy
+    return vacancies
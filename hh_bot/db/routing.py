@@ -0,0 +1,131 @@
+# hh_bot/db/routing.py
+"""
+Маршрутизация запросов между основной БД и репликой для чтения.
+
+Фабрика сессий создает `RoutingSession`. Если задан
+`ASYNC_DATABASE_REPLICA_URL`, сессия отправляет на реплику:
+
+- все SELECT сессии, открытой через `read_only_session(maker)`;
+- отдельные SELECT любой сессии, выполненные с
+  `bind_arguments={REPLICA: True}` (например, список сохраненных вакансий).
+
+Запись (flush, INSERT/UPDATE/DELETE) всегда идет в основную БД, а SELECT
+после записи в той же транзакции - тоже в основную БД, чтобы сессия видела
+свои незафиксированные изменения. С `route_all_reads=True` (SQLite с одним
+писателем, см. `sqlite_tuning`) на "реплику" - пул читающих соединений к тому
+же файлу - идут все SELECT вне пишущей транзакции. Если реплика
+недоступна, запрос повторяется на основной БД, а реплика исключается из
+маршрутизации на DB_REPLICA_RETRY_SECONDS. Без реплики (и для фабрик сессий
+без `RoutingSession`) флаги чтения ни на что не влияют.
+"""
+import os
+import time
+from typing import Any, Callable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from ..utils.logger import logger
+
+DB_REPLICA_RETRY_SECONDS = float(os.getenv("DB_REPLICA_RETRY_SECONDS", "30"))  # Пауза после сбоя реплики
+
+READ_ONLY = "read_only"  # Ключ Session.info: сессия только для чтения
+REPLICA = "replica"  # Ключ bind_arguments: выполнить этот SELECT на реплике
+WROTE = "wrote_primary"  # Ключ Session.info: в текущей транзакции сессия уже писала в основную БД
+
+
+class ReplicaRouter:
+    """Основной движок, реплика и состояние реплики (доступна или на паузе после сбоя)."""
+
+    def __init__(
+        self,
+        primary: AsyncEngine,
+        replica: Optional[AsyncEngine] = None,
+        retry_after: float = DB_REPLICA_RETRY_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+        route_all_reads: bool = False,
+    ):
+        self.primary = primary
+        self.replica = replica
+        self.route_all_reads = route_all_reads
+        self.retry_after = retry_after
+        self._clock = clock
+        self._down_until = 0.0
+        self.replica_reads = 0
+        self.fallbacks = 0
+
+    @property
+    def replica_available(self) -> bool:
+        return self.replica is not None and self._clock() >= self._down_until
+
+    def mark_replica_failed(self, error: Exception) -> None:
+        self.fallbacks += 1
+        self._down_until = self._clock() + self.retry_after
+        logger.warning(
+            f"Реплика БД недоступна, чтение переведено на основную БД на {self.retry_after:.0f}с: {error}"
+        )
+
+
+def _is_replica_failure(error: Exception) -> bool:
+    """Ошибка соединения с репликой (а не ошибка самого запроса)."""
+    if isinstance(error, DBAPIError) and error.connection_invalidated:
+        return True
+    return isinstance(error, (OperationalError, InterfaceError, OSError))
+
+
+class RoutingSession(Session):
+    """Session, которая выполняет чтение на реплике (см. описание модуля)."""
+
+    def __init__(self, *args: Any, router: Optional[ReplicaRouter] = None, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.router = router
+
+
+def _reads_from_replica(state: ORMExecuteState) -> bool:
+    router = getattr(state.session, "router", None)
+    if router is None or not router.replica_available or not state.is_select:
+        return False
+    if state.session.info.get(WROTE):
+        return False
+    if REPLICA in state.bind_arguments:
+        return bool(state.bind_arguments[REPLICA])
+    return router.route_all_reads or bool(state.session.info.get(READ_ONLY))
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _route_read(state: ORMExecuteState):
+    """Выполняет SELECT на реплике, при сбое реплики - на основной БД."""
+    if not state.is_select:
+        state.session.info[WROTE] = True
+        return None
+    if not _reads_from_replica(state):
+        return None
+    router: ReplicaRouter = state.session.router  # type: ignore[attr-defined]
+    try:
+        result = state.invoke_statement(bind_arguments={"bind": router.replica.sync_engine})  # type: ignore[union-attr]
+    except Exception as e:
+        if not _is_replica_failure(e):
+            raise
+        router.mark_replica_failed(e)
+        return state.invoke_statement(bind_arguments={"bind": router.primary.sync_engine})
+    router.replica_reads += 1
+    return result
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_flushed(session: Session, flush_context) -> None:
+    session.info[WROTE] = True
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _reset_wrote(session: Session, transaction) -> None:
+    # После commit/rollback изменения либо зафиксированы, либо отменены - чтение снова можно отдавать реплике
+    if transaction.parent is None:
+        session.info.pop(WROTE, None)
+
+
+def read_only_session(session_maker: async_sessionmaker[AsyncSession]) -> AsyncSession:
+    """Сессия для чтения: ее SELECT выполняются на реплике, если она настроена."""
+    return session_maker(info={READ_ONLY: True})
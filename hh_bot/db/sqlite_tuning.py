@@ -0,0 +1,94 @@
+# hh_bot/db/sqlite_tuning.py
+"""
+Режим производительности для SQLite (резервная и небольшие установки).
+
+- Профиль PRAGMA применяется к каждому новому соединению: WAL (читатели не
+  блокируют писателя и наоборот), synchronous=NORMAL (безопасно в WAL,
+  без fsync на каждую транзакцию), mmap, размер кэша страниц, busy_timeout
+  (ожидание блокировки вместо мгновенного "database is locked") и
+  проверка внешних ключей.
+- Один писатель: SQLite в любой момент допускает только одну пишущую
+  транзакцию, поэтому запись идет через отдельный движок с единственным
+  соединением - очередь на это соединение (пул SQLAlchemy) и есть очередь
+  писателей. Чтение выполняется на пуле из нескольких соединений
+  (см. `routing.ReplicaRouter.route_all_reads`).
+
+Правила для кода, работающего с такой БД:
+
+- Сессия занимает соединение писателя с первой записи (flush, INSERT/UPDATE/
+  DELETE) до commit/rollback; до этого она читает через пул читателей и
+  писателя не держит. После записи и до конца транзакции чтение идет через
+  соединение писателя, поэтому сессия видит свои незафиксированные изменения.
+- Нельзя ждать другую пишущую сессию, пока своя держит незафиксированную
+  запись: вторая сессия будет ждать писателя DB_POOL_TIMEOUT и упадет с
+  TimeoutError. Запись коммитится сразу, без долгих ожиданий (LLM, hh.ru,
+  Telegram) внутри пишущей транзакции - так устроены рассылка
+  (`_process_user`, `DigestPlanner`, `DigestCheckpoint`) и хэндлеры.
+"""
+import os
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from ..utils.logger import logger
+
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))  # Байты, 0 - без mmap
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))  # Отрицательное значение - в КиБ (64 МиБ)
+SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000"))  # Миллисекунды
+SQLITE_FOREIGN_KEYS = os.getenv("SQLITE_FOREIGN_KEYS", "true").lower() in ("1", "true", "yes")
+# Запись через одно соединение, чтение - через пул
+SQLITE_SINGLE_WRITER = os.getenv("SQLITE_SINGLE_WRITER", "true").lower() in ("1", "true", "yes")
+
+
+def is_sqlite_url(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def is_sqlite_file_url(url: str) -> bool:
+    """SQLite в файле (у базы в памяти каждое соединение видит свою базу)."""
+    parsed = make_url(url)
+    database = parsed.database or ""
+    return (
+        parsed.get_backend_name() == "sqlite"
+        and database not in ("", ":memory:")
+        and parsed.query.get("mode") != "memory"
+    )
+
+
+def sqlite_pragmas(
+    journal_mode: str = SQLITE_JOURNAL_MODE,
+    synchronous: str = SQLITE_SYNCHRONOUS,
+    mmap_size: int = SQLITE_MMAP_SIZE,
+    cache_size: int = SQLITE_CACHE_SIZE,
+    busy_timeout: int = SQLITE_BUSY_TIMEOUT,
+    foreign_keys: bool = SQLITE_FOREIGN_KEYS,
+) -> list[str]:
+    """PRAGMA профиля в порядке применения."""
+    return [
+        f"PRAGMA busy_timeout = {int(busy_timeout)}",
+        f"PRAGMA journal_mode = {journal_mode}",
+        f"PRAGMA synchronous = {synchronous}",
+        f"PRAGMA mmap_size = {int(mmap_size)}",
+        f"PRAGMA cache_size = {int(cache_size)}",
+        f"PRAGMA foreign_keys = {'ON' if foreign_keys else 'OFF'}",
+    ]
+
+
+def apply_sqlite_pragmas(engine: AsyncEngine, pragmas: Optional[list[str]] = None) -> None:
+    """Применяет профиль PRAGMA к каждому новому соединению движка."""
+    statements = pragmas if pragmas is not None else sqlite_pragmas()
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+    logger.info(f"Профиль SQLite: {'; '.join(statements)}")
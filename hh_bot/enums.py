@@ -32,4 +32,22 @@ class DocumentTypeEnum(str, PyEnum):
     # ВАЖНО: Регистр этих значений (lower_case) должен точно совпадать
     # с тем, как они определены в вашей БД.
     RESUME = "RESUME"
-    COVER_LETTER = "COVER_LETTER"
\ No newline at end of file
+    COVER_LETTER = "COVER_LETTER"
+
+class HHFetchStatusEnum(str, PyEnum):
+    """Результат запроса вакансий к hh.ru."""
+    OK = "ok"  # Запрос выполнен (список вакансий может быть пустым)
+    THROTTLED = "throttled"  # hh.ru ограничил частоту запросов
+    ERROR = "error"  # Сетевая ошибка или ошибка сервера hh.ru
+
+class DigestRunStatusEnum(str, PyEnum):
+    """Состояние запуска ежедневной рассылки."""
+    RUNNING = "RUNNING"  # Запуск начат и еще не завершен (или прерван перезапуском)
+    COMPLETED = "COMPLETED"  # Все пользователи обработаны
+    ABANDONED = "ABANDONED"  # Прерванный запуск слишком старый, чтобы его продолжать
+
+class DigestRunItemStatusEnum(str, PyEnum):
+    """Состояние обработки одного пользователя в запуске рассылки."""
+    PENDING = "PENDING"
+    DONE = "DONE"
+    FAILED = "FAILED"
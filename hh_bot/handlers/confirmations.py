@@ -4,7 +4,8 @@ from aiogram import F, types, Router
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from ..db.models import User, Vacancy, UserVacancyStatus
+from ..db.models import User, Vacancy
+from ..db.repositories import set_vacancy_status
 from ..enums import UserVacancyStatusEnum
 from ..utils.logger import logger
 from ..keyboards.inline_keyboards import get_vacancy_actions_keyboard
@@ -27,21 +28,7 @@ async def handle_confirm_applied(callback: types.CallbackQuery, session: AsyncSe
         await callback.message.answer("❌ Не удалось найти эту вакансию в нашей базе.")
         return
 
-    status_obj = await session.scalar(
-        select(UserVacancyStatus).where(
-            (UserVacancyStatus.user_id == user.id) & (UserVacancyStatus.vacancy_id == vacancy_obj.id)
-        )
-    )
-
-    if status_obj:
-        status_obj.status = UserVacancyStatusEnum.VIEWED # type: ignore
-    else:
-        new_status = UserVacancyStatus(
-            user_id=user.id, vacancy_id=vacancy_obj.id,
-            status=UserVacancyStatusEnum.VIEWED # type: ignore
-        )
-        session.add(new_status)
-
+    await set_vacancy_status(session, user.id, vacancy_obj.id, UserVacancyStatusEnum.VIEWED)
     await session.commit()
     
     confirmation_text = (
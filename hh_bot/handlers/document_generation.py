@@ -1,20 +1,30 @@
+from typing import Optional
+
 from aiogram import F, types, Router, Bot
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 # ДОБАВЛЕНО: импортируем UserVacancyStatus
 from ..db.models import User, GeneratedDocument, Vacancy, UserVacancyStatus
+from ..db.repositories import add_vacancy_statuses
 from ..enums import DocumentTypeEnum, UserVacancyStatusEnum
 from ..utils.logger import logger
 from ..utils.resume_generator import generate_resume_for_vacancy
 from ..utils.cover_letter_generator import generate_cover_letter_for_vacancy
 from ..keyboards.inline_keyboards import get_apply_confirmation_keyboard
+from ..services.hh_client import HHApiClient
+from ..services.vacancy_details import ensure_vacancy_details
 
 # Создаем роутер для генерации документов
 document_generation_router = Router(name="document_generation")
 
 @document_generation_router.callback_query(F.data.startswith("vacancy_action|"))
-async def handle_document_generation(callback: types.CallbackQuery, session: AsyncSession, user: User):
+async def handle_document_generation(
+    callback: types.CallbackQuery,
+    session: AsyncSession,
+    user: User,
+    hh_client: Optional[HHApiClient] = None,  # Общий клиент hh.ru из main()
+):
     # 1. ИЗМЕНЕНИЕ: Сразу отвечаем на callback, чтобы убрать "часики".
     # show_alert=False, чтобы не показывать всплывающее окно, т.к. мы будем отправлять сообщение.
     await callback.answer(show_alert=False)
@@ -34,6 +44,13 @@ async def handle_document_generation(callback: types.CallbackQuery, session: Asy
             await callback.message.answer("❌ Не удалось найти вакансию. Возможно, она была удалена.")
             raise ValueError(f"Вакансия с hh_id={vacancy_hh_id} не найдена")
 
+        # Для документов нужны полное описание и ключевые навыки: загружаем их
+        # с hh.ru только при первой генерации, дальше они берутся из БД.
+        # Коммитим сразу: транзакция не должна оставаться открытой на время вызова LLM
+        if action in ("generate_resume", "generate_cover"):
+            if await ensure_vacancy_details(session, [vacancy_obj], hh_client):
+                await session.commit()
+
         # --- ЛОГИКА ГЕНЕРАЦИИ РЕЗЮМЕ ---
         if action == "generate_resume":
             processing_message = await callback.message.answer("⏳ Генерирую резюме, это может занять некоторое время...")
@@ -94,7 +111,7 @@ async def handle_document_generation(callback: types.CallbackQuery, session: Asy
 
             # Проверяем, не сохранили ли мы эту вакансию уже
             existing_status = await session.scalar(
-                select(UserVacancyStatus).where(
+                select(UserVacancyStatus.id).where(
                     (UserVacancyStatus.user_id == user_id) &
                     (UserVacancyStatus.vacancy_id == vacancy_obj.id)
                 )
@@ -107,12 +124,7 @@ async def handle_document_generation(callback: types.CallbackQuery, session: Asy
             # Создаем новую запись о статусе вакансии
             # Примечание: используется статус SENT, т.к. он означает "взаимодействие начато".
             # В будущем можно добавить отдельный статус SAVED в UserVacancyStatusEnum.
-            new_status = UserVacancyStatus(
-                user_id=user_id,
-                vacancy_id=vacancy_obj.id,
-                status=UserVacancyStatusEnum.SENT
-            )
-            session.add(new_status)
+            await add_vacancy_statuses(session, user_id, [vacancy_obj.id], UserVacancyStatusEnum.SENT)
             await session.commit()
 
             # 3. ИЗМЕНЕНИЕ: Более точное сообщение для пользователя
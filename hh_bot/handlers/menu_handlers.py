@@ -1,5 +1,7 @@
 # hh_bot/handlers/menu_handlers.py
 
+from typing import Optional
+
 from aiogram import F, types, Router
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
@@ -8,6 +10,8 @@ from sqlalchemy.orm import selectinload
 from ..db.models import User, GeneratedDocument
 from ..enums import DocumentTypeEnum
 from ..services.search_service import process_search_results
+from ..services.hh_client import HHApiClient
+from ..services.hh_areas import get_area_index
 from ..utils.logger import logger
 
 # Создаем роутер для меню
@@ -48,7 +52,12 @@ async def handle_resumes_menu(callback: types.CallbackQuery, session: AsyncSessi
 
 
 @menu_handlers_router.callback_query(F.data == "menu_search")
-async def handle_search_menu(callback: types.CallbackQuery, session: AsyncSession, user: User):
+async def handle_search_menu(
+    callback: types.CallbackQuery,
+    session: AsyncSession,
+    user: User,
+    hh_client: Optional[HHApiClient] = None,
+):
     """Обработчик кнопки 'Поиск вакансий'."""
     await callback.answer() # type: ignore
 
@@ -72,10 +81,8 @@ async def handle_search_menu(callback: types.CallbackQuery, session: AsyncSessio
     filters = user_with_filters.search_filters
     filters_dict = {
         "position": filters.position,
-        # !!! ВАЖНО: hh.ru ожидает ID города (area), а не его название.
-        # Нужно будет реализовать функцию для поиска ID города по названию.
-        # Пока поиск по городу может работать некорректно.
-        "city": filters.city, 
+        # hh.ru ожидает ID города (area), а не его название
+        "city_id": get_area_index().resolve(filters.city),
         "salary_min": filters.salary_min,
         "remote": filters.remote,
         "freshness_days": filters.freshness_days,
@@ -90,5 +97,6 @@ async def handle_search_menu(callback: types.CallbackQuery, session: AsyncSessio
         state=None, # Здесь не используется FSM, но функция требует этот аргумент
         session=session,
         user=user_with_filters,
-        filters_dict=filters_dict
+        filters_dict=filters_dict,
+        hh_client=hh_client,
     )
\ No newline at end of file
@@ -1,5 +1,7 @@
 # hh_bot/handlers/registration.py
 
+from typing import Optional
+
 from aiogram import F, types, Router
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
@@ -7,6 +9,7 @@ from aiogram.fsm.state import State, StatesGroup
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..db.models import User
+from ..services.user_cache import UserIdentityCache
 from ..keyboards.inline_keyboards import get_main_menu_keyboard
 from ..utils.logger import logger
 
@@ -93,6 +96,7 @@ async def process_base_resume(
     state: FSMContext,
     session: AsyncSession,
     user: User,
+    user_cache: Optional[UserIdentityCache] = None,
 ):
     user_data = await state.get_data()
     user.full_name = user_data.get("full_name")
@@ -101,6 +105,9 @@ async def process_base_resume(
     user.skills = user_data.get("skills")
     user.base_resume = message.text if message.text else message.caption
     await session.commit()
+    # Профиль изменился - снимок в кэше больше не актуален
+    if user_cache is not None:
+        user_cache.invalidate(user.telegram_id)
 
     await message.answer(
         "Отлично, регистрация завершена! Добро пожаловать в главное меню.",
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from aiogram import F, types, Router
 from aiogram.fsm.context import FSMContext
 from aiogram.exceptions import TelegramAPIError
@@ -5,6 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from ...db.models import User, SearchFilter
+from ...services.user_cache import UserIdentityCache
 from ...utils.logger import logger
 from .states import SearchSettingsStates
 
@@ -12,12 +15,14 @@ from .states import SearchSettingsStates
 def register_final_handlers(router: Router):
     @router.callback_query(F.data == "settings_save", SearchSettingsStates.confirmation)
     async def save_settings(
-        callback: types.CallbackQuery, state: FSMContext, session: AsyncSession
+        callback: types.CallbackQuery,
+        state: FSMContext,
+        session: AsyncSession,
+        user: Optional[User] = None,
+        user_cache: Optional[UserIdentityCache] = None,
     ):
         data = await state.get_data()
-        user = await session.scalar(
-            select(User).where(User.telegram_id == str(callback.from_user.id))
-        )
+        # Пользователь приходит из DbSessionMiddleware (из кэша, без запроса к БД)
         
         if user:
             search_filter = await session.scalar(select(SearchFilter).where(SearchFilter.user_id == user.id))
@@ -35,6 +40,8 @@ def register_final_handlers(router: Router):
             
             session.add(search_filter)
             await session.commit()
+            if user_cache is not None:
+                user_cache.invalidate(user.telegram_id)
 
         if callback:
             await callback.answer("Настройки успешно сохранены!")
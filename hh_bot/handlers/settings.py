@@ -2,6 +2,9 @@
 
 # --- ИМПОРТЫ ---
 
+# Импорты из стандартной библиотеки
+from typing import Optional
+
 # Импорты из aiogram
 from aiogram import F, types, Router
 from aiogram.fsm.context import FSMContext
@@ -14,7 +17,8 @@ from sqlalchemy import select
 # Импорты наших моделей БД
 from ..db.models import User, SearchFilter, LLMSettings
 
-# Импорты наших утилит
+# Импорты наших сервисов и утилит
+from ..services.user_cache import UserIdentityCache
 from ..utils.logger import logger
 
 # Импорты дочерних роутеров
@@ -63,7 +67,10 @@ async def handle_settings_menu(callback: types.CallbackQuery):
 
 @router.callback_query(F.data == "settings_save")
 async def save_settings(
-    callback: types.CallbackQuery, state: FSMContext, session: AsyncSession
+    callback: types.CallbackQuery,
+    state: FSMContext,
+    session: AsyncSession,
+    user_cache: Optional[UserIdentityCache] = None,
 ):
     """Сохраняет настройки (поиска или LLM) в базу данных."""
     user_data = await state.get_data()
@@ -130,6 +137,8 @@ async def save_settings(
             raise ValueError("Неизвестное состояние для сохранения.")
 
         await session.commit()
+        if user_cache is not None:
+            user_cache.invalidate(user.telegram_id)
         await callback.message.edit_text(msg)
 
     except Exception as e:
@@ -4,7 +4,8 @@ from aiogram import F, types, Router
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from ..db.models import User, Vacancy, UserVacancyStatus
+from ..db.models import User, Vacancy
+from ..db.repositories import set_vacancy_status
 from ..enums import UserVacancyStatusEnum
 from ..utils.logger import logger
 from ..keyboards.inline_keyboards import get_vacancy_actions_keyboard
@@ -26,27 +27,13 @@ async def handle_status_update(callback: types.CallbackQuery, session: AsyncSess
 
         # --- ЛОГИКА ПОДТВЕРЖДЕНИЯ "НЕ ИНТЕРЕСНО" ---
         if action == "not_interested":
-            vacancy_obj = await session.scalar(select(Vacancy).where(Vacancy.hh_id == str(vacancy_hh_id)))
-            if not vacancy_obj:
+            vacancy_id = await session.scalar(select(Vacancy.id).where(Vacancy.hh_id == str(vacancy_hh_id)))
+            if not vacancy_id:
                 if not callback.message: return
                 await callback.message.answer("❌ Не удалось найти эту вакансию в нашей базе.")
                 return
 
-            status_obj = await session.scalar(
-                select(UserVacancyStatus).where(
-                    (UserVacancyStatus.user_id == user_id) & (UserVacancyStatus.vacancy_id == vacancy_obj.id)
-                )
-            )
-
-            if status_obj:
-                status_obj.status = UserVacancyStatusEnum.NOT_INTERESTED # type: ignore
-            else:
-                new_status = UserVacancyStatus(
-                    user_id=user_id, vacancy_id=vacancy_obj.id,
-                    status=UserVacancyStatusEnum.NOT_INTERESTED # type: ignore
-                )
-                session.add(new_status)
-            
+            await set_vacancy_status(session, user_id, vacancy_id, UserVacancyStatusEnum.NOT_INTERESTED)
             await session.commit()
             if not callback.message: return
             await callback.message.answer("👍 Хорошо, я учту, что эта вакансия вам не интересна.")
@@ -1,12 +1,17 @@
 import asyncio
+from typing import Optional
+
 from aiogram import F, types, Router
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from sqlalchemy import select, update
-from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ...db.models import User, Vacancy, UserVacancyStatus
+from ...db.models import User, Vacancy, LLMSettings
+from ...db.repositories import set_vacancy_status
+from ...enums import UserVacancyStatusEnum
+from ...services.hh_client import HHApiClient
 from ...services.llm_service import generate_resume, generate_cover_letter
+from ...services.vacancy_details import ensure_vacancy_details
 from ...utils.logger import logger
 
 actions_router = Router()
@@ -53,7 +58,12 @@ async def _generate_and_send(
 
 
 @actions_router.callback_query(F.data.startswith("vacancy_action|"))
-async def process_vacancy_action(callback: types.CallbackQuery, session: AsyncSession):
+async def process_vacancy_action(
+    callback: types.CallbackQuery,
+    session: AsyncSession,
+    user: Optional[User] = None,  # Из DbSessionMiddleware (кэш пользователей)
+    hh_client: Optional[HHApiClient] = None,  # Общий клиент hh.ru из main()
+):
     """Обрабатывает нажатия на кнопки под вакансией."""
     try:
         _, hh_id, action = callback.data.split("|")
@@ -71,17 +81,9 @@ async def process_vacancy_action(callback: types.CallbackQuery, session: AsyncSe
         )
         return
 
-    # Выполняем запросы к БД параллельно для ускорения
-    user_result, vacancy_result = await asyncio.gather(
-        session.scalar(
-            select(User)
-            .options(selectinload(User.llm_settings))
-            .where(User.telegram_id == str(callback.from_user.id))
-        ),
-        session.scalar(select(Vacancy).where(Vacancy.hh_id == hh_id)),
-    )
-    user = user_result
-    vacancy = vacancy_result
+    # ИСПРАВЛЕНИЕ: пользователь уже загружен middleware; запросы к одной
+    # AsyncSession нельзя выполнять параллельно, поэтому - по очереди
+    vacancy = await session.scalar(select(Vacancy).where(Vacancy.hh_id == hh_id))
 
     if not user or not vacancy:
         logger.warning(
@@ -92,7 +94,10 @@ async def process_vacancy_action(callback: types.CallbackQuery, session: AsyncSe
         return
 
     if action in ["generate_resume", "generate_cover_letter"]:
-        if not user.llm_settings:
+        llm_settings_obj = await session.scalar(
+            select(LLMSettings).where(LLMSettings.user_id == user.id)
+        )
+        if not llm_settings_obj:
             await callback.message.answer(
                 "⚠️ Сначала настройте ваш LLM API в меню настроек."
             )
@@ -100,14 +105,20 @@ async def process_vacancy_action(callback: types.CallbackQuery, session: AsyncSe
             return
 
         llm_settings = {
-            "base_url": user.llm_settings.base_url,
-            "api_key": user.llm_settings.api_key,
-            "model_name": user.llm_settings.model_name,
+            "base_url": llm_settings_obj.base_url,
+            "api_key": llm_settings_obj.api_key,
+            "model_name": llm_settings_obj.model_name,
         }
+        # Полное описание и навыки загружаются с hh.ru один раз и сохраняются в БД
+        if await ensure_vacancy_details(session, [vacancy], hh_client):
+            await session.commit()
+
         vacancy_info = {
             "title": vacancy.title,
             "company": vacancy.company,
             "snippet": vacancy.description_snippet,
+            "description": vacancy.description or vacancy.description_snippet,
+            "key_skills": vacancy.key_skills or [],
         }
         user_profile = {
             "telegram_id": user.telegram_id,
@@ -137,21 +148,9 @@ async def process_vacancy_action(callback: types.CallbackQuery, session: AsyncSe
             )
 
     elif action == "not_interested":
-        status_to_update = await session.scalar(
-            select(UserVacancyStatus).where(
-                UserVacancyStatus.user_id == user.id,
-                UserVacancyStatus.vacancy_id == vacancy.id,
-            )
-        )
-
-        if status_to_update:
-            status_to_update.status = "not_interested"
-        else:
-            new_status = UserVacancyStatus(
-                user_id=user.id, vacancy_id=vacancy.id, status="not_interested"
-            )
-            session.add(new_status)
-
+        # ИСПРАВЛЕНИЕ: статус из UserVacancyStatusEnum (в БД значения в верхнем регистре),
+        # запись одним INSERT ... ON CONFLICT без загрузки строки статуса
+        await set_vacancy_status(session, user.id, vacancy.id, UserVacancyStatusEnum.NOT_INTERESTED)
         await session.commit()
 
         await callback.answer("Отмечено как 'Неинтересно'")
@@ -1,48 +1,137 @@
 # hh_bot/handlers/vacancies/saved.py
+import html
+import os
+from dataclasses import dataclass, field
+from typing import List, Optional
+
 from aiogram import F, types, Router
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.filters import Command
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # ИСПРАВЛЕННЫЕ ИМПОРТЫ
 from ...db.models import User, Vacancy, UserVacancyStatus
-from ...keyboards.inline_keyboards import get_vacancy_actions_keyboard, get_main_menu_keyboard
+from ...db.repositories import transition_vacancy_statuses
+from ...db.routing import REPLICA
+from ...enums import UserVacancyStatusEnum
+from ...keyboards.inline_keyboards import get_saved_vacancies_page_keyboard, get_main_menu_keyboard
 from ...utils.logger import logger
 
 # Роутер для сохраненных вакансий
 saved_router = Router()
 
-# --- Вспомогательная функция ---
-async def _get_vacancy_texts_for_user(session: AsyncSession, user_id: str) -> list[tuple[str, types.InlineKeyboardMarkup]]:
-    # ... (код функции без изменений) ...
+# Сколько вакансий показывать в одном сообщении
+SAVED_VACANCIES_PAGE_SIZE = int(os.getenv("SAVED_VACANCIES_PAGE_SIZE", "5"))
+
+# Статусы, которые попадают в список сохраненных вакансий
+_LISTED_STATUSES = (UserVacancyStatusEnum.SENT, UserVacancyStatusEnum.VIEWED)
+
+
+@dataclass
+class SavedVacanciesPage:
+    """Страница списка сохраненных вакансий."""
+    # Пары (ID строки user_vacancy_status, вакансия) в порядке (created_at, id)
+    items: List[tuple[int, Vacancy]] = field(default_factory=list)
+    has_prev: bool = False
+    has_next: bool = False
+
+    @property
+    def first_cursor(self) -> Optional[int]:
+        return self.items[0][0] if self.items else None
+
+    @property
+    def last_cursor(self) -> Optional[int]:
+        return self.items[-1][0] if self.items else None
+
+
+# --- Вспомогательные функции ---
+async def get_saved_vacancies_page(
+    session: AsyncSession,
+    user_id: int,
+    cursor: Optional[int] = None,
+    direction: str = "next",
+    page_size: int = SAVED_VACANCIES_PAGE_SIZE,
+) -> SavedVacanciesPage:
+    """
+    Загружает одну страницу сохраненных вакансий пользователя.
+
+    Пагинация по ключу (created_at, id): курсор - ID строки user_vacancy_status,
+    на которой закончилась (direction="next") или с которой началась
+    (direction="prev") текущая страница. Фильтр по статусу выполняется в SQL,
+    из БД читается не больше page_size + 1 строк (лишняя строка показывает,
+    есть ли следующая страница).
+    """
     stmt = (
-        select(User)
-        .options(selectinload(User.viewed_vacancies).selectinload(UserVacancyStatus.vacancy))
-        .where(User.telegram_id == user_id)
+        select(UserVacancyStatus.id, Vacancy)
+        .join(Vacancy, Vacancy.id == UserVacancyStatus.vacancy_id)
+        .where(
+            UserVacancyStatus.user_id == user_id,
+            UserVacancyStatus.status.in_(_LISTED_STATUSES),
+        )
     )
-    result = await session.execute(stmt)
-    user = result.scalar_one_or_none()
-
-    if not user or not user.viewed_vacancies:
-        return []
-
-    vacancy_data = []
-    for user_vacancy in user.viewed_vacancies:
-        if user_vacancy.status in ["sent", "viewed"]:
-            vac = user_vacancy.vacancy
-            salary_text = f"от {vac.salary}" if vac.salary else "Не указана"
-            text = (
-                f"🏢 *{vac.title}*\n"
-                f"📍 Компания: {vac.company}\n"
-                f"💰 Зарплата: {salary_text}\n"
-                f"🔗 [Смотреть вакансию]({vac.link})"
-            )
-            keyboard = get_vacancy_actions_keyboard(vac.hh_id)
-            vacancy_data.append((text, keyboard))
-            if user_vacancy.status == "sent":
-                user_vacancy.status = "viewed"
-    return vacancy_data
+    key = tuple_(UserVacancyStatus.created_at, UserVacancyStatus.id)
+    backward = cursor is not None and direction == "prev"
+
+    if cursor is not None:
+        cursor_created_at = (
+            select(UserVacancyStatus.created_at)
+            .where(UserVacancyStatus.id == cursor, UserVacancyStatus.user_id == user_id)
+            .scalar_subquery()
+        )
+        cursor_key = tuple_(cursor_created_at, cursor)
+        stmt = stmt.where(key < cursor_key if backward else key > cursor_key)
+
+    if backward:
+        stmt = stmt.order_by(UserVacancyStatus.created_at.desc(), UserVacancyStatus.id.desc())
+    else:
+        stmt = stmt.order_by(UserVacancyStatus.created_at, UserVacancyStatus.id)
+
+    # Список только читается - его можно выполнить на реплике
+    result = await session.execute(stmt.limit(page_size + 1), bind_arguments={REPLICA: True})
+    rows = [tuple(row) for row in result.all()]
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    if cursor is not None and not rows:
+        # Курсор устарел (например, вакансии с соседней страницы скрыты) - начинаем сначала
+        return await get_saved_vacancies_page(session, user_id, page_size=page_size)
+
+    if backward:
+        rows.reverse()
+        return SavedVacanciesPage(items=rows, has_prev=has_more, has_next=True)
+    return SavedVacanciesPage(items=rows, has_prev=cursor is not None, has_next=has_more)
+
+
+async def mark_page_viewed(session: AsyncSession, user_id: int, page: SavedVacanciesPage) -> None:
+    """Переводит показанные вакансии из SENT в VIEWED одним UPDATE."""
+    status_ids = [status_id for status_id, _ in page.items]
+    if not status_ids:
+        return
+    await transition_vacancy_statuses(
+        session, user_id, UserVacancyStatusEnum.VIEWED, status_ids=status_ids
+    )
+    await session.commit()
+
+
+def render_saved_vacancies_page(page: SavedVacanciesPage) -> tuple[str, types.InlineKeyboardMarkup]:
+    """Текст страницы (HTML) и клавиатура с действиями и навигацией."""
+    lines = ["📋 <b>Сохраненные вакансии</b>"]
+    for number, (_, vac) in enumerate(page.items, start=1):
+        salary_text = f"от {html.escape(vac.salary)}" if vac.salary else "Не указана"
+        lines.append(
+            f"\n{number}. 🏢 <b>{html.escape(vac.title or '')}</b>\n"
+            f"📍 Компания: {html.escape(vac.company or '')}\n"
+            f"💰 Зарплата: {salary_text}\n"
+            f"🔗 <a href=\"{html.escape(vac.link or '', quote=True)}\">Смотреть вакансию</a>"
+        )
+    lines.append("\nКнопки с номером вакансии: 📄 - адаптированное резюме, 💾 - сохранить, 🔗 - откликнуться.")
+    keyboard = get_saved_vacancies_page_keyboard(
+        [(vac.hh_id, vac.apply_url) for _, vac in page.items],
+        prev_cursor=page.first_cursor if page.has_prev else None,
+        next_cursor=page.last_cursor if page.has_next else None,
+    )
+    return "\n".join(lines), keyboard
 
 # --- Хэндлеры меню ---
 @saved_router.callback_query(F.data == "menu_search")
@@ -63,23 +152,56 @@ async def handle_main_menu(callback: types.CallbackQuery):
     await callback.message.answer("Вы в главном меню:", reply_markup=get_main_menu_keyboard())
 
 # --- Хэндлеры для просмотра сохраненных вакансий ---
+async def _load_first_page(session: AsyncSession, user: User) -> Optional[tuple[str, types.InlineKeyboardMarkup]]:
+    page = await get_saved_vacancies_page(session, user.id)
+    if not page.items:
+        return None
+    await mark_page_viewed(session, user.id, page)
+    return render_saved_vacancies_page(page)
+
 @saved_router.message(Command("vacancies"))
-async def cmd_show_vacancies(message: types.Message, session: AsyncSession):
-    """Показывает вакансии по команде."""
-    vacancy_data = await _get_vacancy_texts_for_user(session, str(message.from_user.id))
-    if not vacancy_data:
+async def cmd_show_vacancies(message: types.Message, session: AsyncSession, user: User):
+    """Показывает первую страницу вакансий по команде."""
+    rendered = await _load_first_page(session, user)
+    if not rendered:
         await message.answer("Для вас пока нет вакансий.")
         return
-    for text, keyboard in vacancy_data:
-        await message.answer(text, reply_markup=keyboard, parse_mode="Markdown")
+    text, keyboard = rendered
+    await message.answer(text, reply_markup=keyboard, parse_mode="HTML", disable_web_page_preview=True)
 
 @saved_router.callback_query(F.data == "view_saved_vacancies")
-async def handle_view_saved_vacancies(callback: types.CallbackQuery, session: AsyncSession):
-    """Показывает сохраненные вакансии по кнопке."""
+async def handle_view_saved_vacancies(callback: types.CallbackQuery, session: AsyncSession, user: User):
+    """Показывает первую страницу сохраненных вакансий по кнопке."""
     await callback.answer()
-    vacancy_data = await _get_vacancy_texts_for_user(session, str(callback.from_user.id))
-    if not vacancy_data:
+    rendered = await _load_first_page(session, user)
+    if not rendered:
         await callback.message.answer("У вас пока нет сохраненных вакансий.")
         return
-    for text, keyboard in vacancy_data:
-        await callback.message.answer(text, reply_markup=keyboard, parse_mode="Markdown")
\ No newline at end of file
+    text, keyboard = rendered
+    await callback.message.answer(text, reply_markup=keyboard, parse_mode="HTML", disable_web_page_preview=True)
+
+@saved_router.callback_query(F.data.startswith("saved_page|"))
+async def handle_saved_vacancies_page(callback: types.CallbackQuery, session: AsyncSession, user: User):
+    """Листает список: редактирует то же сообщение вместо отправки новых."""
+    try:
+        _, direction, cursor = callback.data.split("|")
+        cursor_id = int(cursor)
+    except ValueError:
+        logger.error(f"Неверный формат callback_data: {callback.data}")
+        await callback.answer("Ошибка в данных кнопки.", show_alert=True)
+        return
+
+    page = await get_saved_vacancies_page(session, user.id, cursor=cursor_id, direction=direction)
+    await callback.answer()
+    if not page.items:
+        await callback.message.edit_text("У вас пока нет сохраненных вакансий.")
+        return
+    await mark_page_viewed(session, user.id, page)
+    text, keyboard = render_saved_vacancies_page(page)
+    try:
+        await callback.message.edit_text(
+            text, reply_markup=keyboard, parse_mode="HTML", disable_web_page_preview=True
+        )
+    except TelegramBadRequest as e:
+        # Например, "message is not modified" при повторном нажатии
+        logger.warning(f"Не удалось обновить страницу сохраненных вакансий: {e}")
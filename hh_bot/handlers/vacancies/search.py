@@ -1,28 +1,21 @@
 # hh_bot/handlers/vacancies/search.py
 
+from typing import Optional
+
 from aiogram import F, types, Router
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 
 from ...services.search_service import process_search_results
+from ...services.hh_client import HHApiClient
+from ...services.hh_areas import get_area_index
 from ...db.models import User
 from ...utils.logger import logger
 
 # Роутер для поиска
 search_router = Router()
 
-# --- Словарь для сопоставления названий городов с ID в hh.ru ---
-CITY_MAP = {
-    "санкт-петербург": 2,
-    "спб": 2,
-    "москва": 1,
-    "мск": 1,
-    # ... добавьте другие города
-}
-
-
 # --- Состояния для нового поиска (с уникальными названиями) ---
 class NewSearchStates(StatesGroup):
     search_position = State()  # <--- ИЗМЕНЕНО
@@ -58,19 +51,14 @@ async def process_search_position(message: types.Message, state: FSMContext):
 async def process_search_city(message: types.Message, state: FSMContext):
     """Сохраняет город (по названию или ID) и запрашивает минимальную зарплату."""
     user_input = message.text.strip()
-    city_id = None
+    areas = get_area_index()
+    # Справочник регионов hh.ru понимает и название, и числовой ID
+    city_id = areas.resolve(user_input)
     city_name_for_display = None
 
-    if user_input.isdigit():
-        city_id = int(user_input)
-        city_name_for_display = f"с ID {city_id}"
-        logger.info(f"Пользователь ввел числовой ID города: {city_id}")
-    else:
-        city_name_lower = user_input.lower()
-        city_id = CITY_MAP.get(city_name_lower)
-        if city_id:
-            city_name_for_display = user_input.title()
-            logger.info(f"Найден город '{user_input}' с ID {city_id}")
+    if city_id:
+        city_name_for_display = areas.name_of(city_id) or f"с ID {city_id}"
+        logger.info(f"Найден город '{user_input}' с ID {city_id}")
 
     if not city_id:
         await message.answer(
@@ -88,17 +76,19 @@ async def process_search_city(message: types.Message, state: FSMContext):
 # <--- ИЗМЕНЕНО: Декоратор и состояние
 @search_router.message(NewSearchStates.search_salary_min)
 async def process_search_salary(
-    message: types.Message, state: FSMContext, session: AsyncSession
+    message: types.Message,
+    state: FSMContext,
+    session: AsyncSession,
+    user: Optional[User] = None,
+    hh_client: Optional[HHApiClient] = None,
 ):
     """
     Финальный шаг: собирает все данные и вызывает сервис для обработки.
+    Пользователь приходит из DbSessionMiddleware (из кэша, без запроса к БД).
     """
-    telegram_id_str = str(message.from_user.id)
-    user = await session.scalar(select(User).where(User.telegram_id == telegram_id_str))
-
     if not user:
         logger.error(
-            f"Пользователь с ID {telegram_id_str} не найден в БД во время поиска!"
+            f"Пользователь с ID {message.from_user.id} не найден в БД во время поиска!"
         )
         await message.answer("Произошла ошибка. Перезапустите бота с помощью /start.")
         await state.clear()
@@ -125,6 +115,7 @@ async def process_search_salary(
         session=session,
         user=user,
         filters_dict=filters_dict,
+        hh_client=hh_client,
     )
 
     await state.clear()
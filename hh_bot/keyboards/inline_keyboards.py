@@ -1,6 +1,6 @@
 # hh_bot/keyboards/inline_keyboards.py
 
-from typing import Optional
+from typing import List, Optional, Tuple
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
@@ -160,4 +160,32 @@ def get_apply_confirmation_keyboard(vacancy_hh_id: str) -> InlineKeyboardMarkup:
     """
     builder = InlineKeyboardBuilder()
     builder.button(text="✅ Я откликнулся на hh.ru", callback_data=f"confirm_applied|{vacancy_hh_id}")
-    return builder.as_markup()
\ No newline at end of file
+    return builder.as_markup()
+
+def get_saved_vacancies_page_keyboard(
+    vacancies: List[Tuple[str, Optional[str]]],
+    prev_cursor: Optional[int] = None,
+    next_cursor: Optional[int] = None,
+) -> InlineKeyboardMarkup:
+    """
+    Клавиатура страницы сохраненных вакансий: для каждой вакансии (hh_id, apply_url)
+    строка с ее номером на странице - резюме, "Сохранить" и отклик по ссылке
+    (как в `get_vacancy_actions_keyboard`), затем навигация назад/вперед.
+    """
+    builder = InlineKeyboardBuilder()
+    for number, (hh_id, apply_url) in enumerate(vacancies, start=1):
+        actions = [
+            InlineKeyboardButton(text=f"📄 {number}", callback_data=f"vacancy_action|{hh_id}|generate_resume"),
+            InlineKeyboardButton(text=f"💾 {number}", callback_data=f"vacancy_action|{hh_id}|save"),
+        ]
+        if apply_url:
+            actions.append(InlineKeyboardButton(text=f"🔗 {number}", url=apply_url))
+        builder.row(*actions)
+    navigation = []
+    if prev_cursor is not None:
+        navigation.append(InlineKeyboardButton(text="⬅️ Назад", callback_data=f"saved_page|prev|{prev_cursor}"))
+    if next_cursor is not None:
+        navigation.append(InlineKeyboardButton(text="Вперед ➡️", callback_data=f"saved_page|next|{next_cursor}"))
+    if navigation:
+        builder.row(*navigation)
+    return builder.as_markup()
@@ -1,25 +1,119 @@
 # hh_bot/middlewares.py
 
-from typing import Any, Awaitable, Callable, Dict, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 
-from aiogram import BaseMiddleware
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
 from aiogram.types import TelegramObject, User
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from .db.models import User as DBUser  # Переименовываем, чтобы избежать конфликта имен
+from .db.routing import REPLICA
+from .services.telegram_sender import TelegramSendScheduler
+from .services.user_cache import UserIdentityCache
 from .utils.logger import logger
 
 
+class LazySession:
+    """
+    Прокси `AsyncSession` для хэндлеров: сессия создается при первом
+    обращении к ней. Апдейты, хэндлеры которых не работают с БД (меню,
+    обработчики ошибок), не создают сессию и не занимают соединение из пула.
+    """
+
+    def __init__(self, session_pool: async_sessionmaker[AsyncSession]):
+        self._session_pool = session_pool
+        self._session: Optional[AsyncSession] = None
+        self._pending: List[Any] = []
+
+    @property
+    def opened(self) -> bool:
+        """Была ли сессия создана."""
+        return self._session is not None
+
+    def get(self) -> AsyncSession:
+        """Настоящая сессия (создается при первом вызове)."""
+        if self._session is None:
+            self._session = self._session_pool()
+            for instance in self._pending:
+                self._session.add(instance)
+            self._pending.clear()
+        return self._session
+
+    def attach(self, instance: Any) -> None:
+        """Добавит отвязанный объект в сессию, когда она будет создана."""
+        if self._session is not None:
+            self._session.add(instance)
+        else:
+            self._pending.append(instance)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.get(), name)
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+
+
 class DbSessionMiddleware(BaseMiddleware):
     """
     Этот middleware предоставляет сессию базы данных и объект пользователя
     в данные хэндлера.
+
+    Сессия передается как `LazySession` и создается при первом обращении.
+    Пользователь берется из `UserIdentityCache` без запроса к БД, если он
+    там есть; сам кэш доступен хэндлерам как аргумент `user_cache` - для
+    сброса записи после изменения пользователя или его настроек.
     """
 
-    def __init__(self, session_pool: async_sessionmaker[AsyncSession]):
+    def __init__(
+        self,
+        session_pool: async_sessionmaker[AsyncSession],
+        user_cache: Optional[UserIdentityCache] = None,
+    ):
         super().__init__()
         self.session_pool = session_pool
+        self.user_cache = user_cache if user_cache is not None else UserIdentityCache()
+        # Сколько апдейтов обработано и скольким из них понадобилась сессия БД
+        self.updates_total = 0
+        self.updates_with_db = 0
+
+    async def _load_user(self, session: LazySession, telegram_user: User) -> DBUser:
+        # Преобразуем ID пользователя в строку
+        telegram_id_str = str(telegram_user.id)
+
+        cached = self.user_cache.get(telegram_id_str)
+        if cached is not None:
+            # Копия из кэша присоединяется к сессии без SELECT (и только если сессия понадобится)
+            session.attach(cached)
+            return cached
+
+        # Ищем пользователя в базе данных по строковому ID (сначала на реплике)
+        stmt = select(DBUser).where(DBUser.telegram_id == telegram_id_str)
+        db_user = await session.scalar(stmt, bind_arguments={REPLICA: True})
+        if not db_user:
+            # Реплика может отставать - перед созданием проверяем основную БД
+            db_user = await session.scalar(stmt)
+
+        # Если пользователя нет, создаем его
+        if not db_user:
+            # ИСПРАВЛЕНИЕ: у модели нет колонок username/first_name/last_name,
+            # профиль заполняется при регистрации
+            db_user = DBUser(telegram_id=telegram_id_str)
+            session.add(db_user)
+            await session.commit()
+            await session.refresh(
+                db_user
+            )  # Обновляем объект, чтобы получить ID из БД
+            logger.info(
+                f"Создан новый пользователь с telegram_id {telegram_id_str}"
+            )
+
+        self.user_cache.put(db_user)
+        return db_user
 
     async def __call__(
         self,
@@ -27,37 +121,17 @@ class DbSessionMiddleware(BaseMiddleware):
         event: TelegramObject,
         data: Dict[str, Any],
     ) -> Any:
-        async with self.session_pool() as session:
+        session = LazySession(self.session_pool)
+        self.updates_total += 1
+        try:
             data["session"] = session
+            data["user_cache"] = self.user_cache
 
             # ИСПРАВЛЕНО: Получаем пользователя из data, куда его положил aiogram
             telegram_user: Optional[User] = data.get("event_from_user")
 
             if telegram_user:
-                # Преобразуем ID пользователя в строку
-                telegram_id_str = str(telegram_user.id)
-
-                # Ищем пользователя в базе данных по строковому ID
-                db_user = await session.scalar(
-                    select(DBUser).where(DBUser.telegram_id == telegram_id_str)
-                )
-
-                # Если пользователя нет, создаем его
-                if not db_user:
-                    db_user = DBUser(
-                        telegram_id=telegram_id_str,
-                        username=telegram_user.username,
-                        first_name=telegram_user.first_name,
-                        last_name=telegram_user.last_name,
-                    )
-                    session.add(db_user)
-                    await session.commit()
-                    await session.refresh(
-                        db_user
-                    )  # Обновляем объект, чтобы получить ID из БД
-                    logger.info(
-                        f"Создан новый пользователь с telegram_id {telegram_id_str}"
-                    )
+                db_user = await self._load_user(session, telegram_user)
 
                 # Добавляем объект пользователя из БД в данные под ключом 'user'
                 data["user"] = db_user
@@ -67,3 +141,34 @@ class DbSessionMiddleware(BaseMiddleware):
 
             # Вызываем хэндлер, передавая ему обновленные данные
             return await handler(event, data)
+        finally:
+            if session.opened:
+                self.updates_with_db += 1
+            await session.close()
+
+    def metrics(self) -> Dict[str, int]:
+        """Сколько апдейтов обработано и скольким понадобилась БД."""
+        return {"updates": self.updates_total, "updates_with_db": self.updates_with_db}
+
+
+class SendRateMiddleware(BaseRequestMiddleware):
+    """
+    Middleware запросов к Bot API: все методы, адресованные конкретному чату
+    (send_message, edit_message_text, answer и т.п.), проходят через
+    `TelegramSendScheduler` с его лимитами и приоритетами.
+    Остальные запросы (get_me, get_updates, ...) выполняются напрямую.
+    """
+
+    def __init__(self, scheduler: TelegramSendScheduler):
+        self.scheduler = scheduler
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Any:
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None:
+            return await make_request(bot, method)
+        return await self.scheduler.submit(chat_id, lambda: make_request(bot, method))
@@ -0,0 +1,228 @@
+"""
+Справочник регионов hh.ru (/areas) для поиска ID города по названию.
+
+Дерево регионов загружается с hh.ru, сохраняется на диск и периодически
+обновляется. По нему заранее строится индекс нормализованных названий
+(регистр, ё/е, дефисы, сокращения вроде "спб"), поэтому город
+определяется одним обращением к словарю.
+
+Пока справочник не загружен (или hh.ru недоступен при первом запуске),
+работает встроенный список крупных городов.
+"""
+import asyncio
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+
+from ..utils.logger import logger
+from .hh_client import HHApiClient
+
+# --- Настройки справочника (можно переопределить через .env) ---
+# Файл со снимком справочника. Пустое значение - не сохранять на диск.
+HH_AREAS_SNAPSHOT_PATH = os.getenv("HH_AREAS_SNAPSHOT_PATH", "data/hh_areas.json")
+HH_AREAS_REFRESH_HOURS = float(os.getenv("HH_AREAS_REFRESH_HOURS", "24"))  # Как часто обновлять справочник
+
+# Регионы, которые известны без загрузки справочника
+_SEED_AREAS: List[Tuple[str, str]] = [
+    ("113", "Россия"),
+    ("1", "Москва"),
+    ("2", "Санкт-Петербург"),
+    ("3", "Екатеринбург"),
+    ("4", "Новосибирск"),
+    ("66", "Нижний Новгород"),
+    ("88", "Казань"),
+]
+
+# Сокращения и разговорные названия -> нормализованное официальное название
+AREA_ALIASES: Dict[str, str] = {
+    "мск": "москва",
+    "спб": "санкт петербург",
+    "питер": "санкт петербург",
+    "петербург": "санкт петербург",
+    "екб": "екатеринбург",
+    "нск": "новосибирск",
+    "нн": "нижний новгород",
+    "рф": "россия",
+}
+
+_SEPARATORS_RE = re.compile(r"[\s\-‐–—]+")
+_CITY_PREFIX_RE = re.compile(r"^(г\.|г |город )")
+
+
+def normalize_area_name(name: str) -> str:
+    """Приводит название региона к виду для поиска: "г. Санкт-Петербург" -> "санкт петербург"."""
+    value = name.casefold().replace("ё", "е").strip()
+    value = _CITY_PREFIX_RE.sub("", value)
+    return _SEPARATORS_RE.sub(" ", value).strip()
+
+
+def flatten_areas(tree: Iterable[Dict[str, Any]]) -> List[Tuple[str, str]]:
+    """
+    Превращает дерево /areas в список (id, название) в порядке обхода в ширину:
+    страны, затем регионы, затем города. Так при совпадении названий
+    более крупный регион оказывается раньше.
+    """
+    flat: List[Tuple[str, str]] = []
+    level = list(tree)
+    while level:
+        next_level = []
+        for area in level:
+            flat.append((str(area["id"]), area["name"]))
+            next_level.extend(area.get("areas") or ())
+        level = next_level
+    return flat
+
+
+class AreaIndex:
+    """Индекс названий регионов hh.ru с поиском за O(1)."""
+
+    def __init__(self, areas: Iterable[Tuple[str, str]]):
+        self._ids: Dict[str, int] = {}
+        self._names: Dict[int, str] = {}
+        for area_id, name in areas:
+            key = normalize_area_name(name)
+            # Первое вхождение - самый крупный регион с таким названием
+            self._ids.setdefault(key, int(area_id))
+            self._names[int(area_id)] = name
+        for alias, target in AREA_ALIASES.items():
+            if target in self._ids:
+                self._ids.setdefault(alias, self._ids[target])
+
+    @classmethod
+    def from_seed(cls) -> "AreaIndex":
+        """Индекс по встроенному списку крупных городов."""
+        return cls(_SEED_AREAS)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def resolve(self, name: Optional[str]) -> Optional[int]:
+        """
+        Возвращает ID региона по названию или по его числовому ID.
+        None - если регион не найден.
+        """
+        if not name:
+            return None
+        value = str(name).strip()
+        if value.isdigit():
+            return int(value)
+        return self._ids.get(normalize_area_name(value))
+
+    def name_of(self, area_id: int) -> Optional[str]:
+        """Официальное название региона по ID."""
+        return self._names.get(area_id)
+
+
+_area_index: AreaIndex = AreaIndex.from_seed()
+
+
+def get_area_index() -> AreaIndex:
+    """Возвращает текущий индекс регионов."""
+    return _area_index
+
+
+def set_area_index(index: AreaIndex) -> None:
+    """Заменяет текущий индекс регионов (после загрузки справочника)."""
+    global _area_index
+    _area_index = index
+
+
+class AreaLoader:
+    """
+    Загружает справочник регионов и держит его актуальным.
+
+    При старте используется снимок с диска, если он не старше
+    `refresh_interval`; иначе справочник запрашивается у hh.ru.
+    Если hh.ru недоступен, остается прежний (даже устаревший) справочник.
+    """
+
+    def __init__(
+        self,
+        client: HHApiClient,
+        snapshot_path: str = HH_AREAS_SNAPSHOT_PATH,
+        refresh_interval: float = HH_AREAS_REFRESH_HOURS * 3600,
+    ):
+        self.client = client
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self.refresh_interval = refresh_interval
+        self._task: Optional[asyncio.Task] = None
+
+    def _read_snapshot(self) -> Optional[Tuple[float, List[Tuple[str, str]]]]:
+        if self.snapshot_path is None or not self.snapshot_path.exists():
+            return None
+        try:
+            data = json.loads(self.snapshot_path.read_text(encoding="utf-8"))
+            return data["fetched_at"], [tuple(area) for area in data["areas"]]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Не удалось прочитать снимок справочника регионов: {e}")
+            return None
+
+    def _write_snapshot(self, areas: List[Tuple[str, str]]) -> None:
+        if self.snapshot_path is None:
+            return
+        self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.snapshot_path.with_suffix(".tmp")
+        tmp_path.write_text(
+            json.dumps({"fetched_at": time.time(), "areas": areas}, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        # Атомарная замена: читатель не увидит недописанный файл
+        tmp_path.replace(self.snapshot_path)
+
+    async def _fetch(self) -> Optional[List[Tuple[str, str]]]:
+        try:
+            tree = await self.client.get_json("/areas", cache_ttl=self.refresh_interval)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"Не удалось загрузить справочник регионов hh.ru: {e}")
+            return None
+        areas = flatten_areas(tree)
+        try:
+            await asyncio.to_thread(self._write_snapshot, areas)
+        except OSError as e:
+            logger.warning(f"Не удалось сохранить снимок справочника регионов: {e}")
+        return areas
+
+    async def load(self, force: bool = False) -> AreaIndex:
+        """
+        Загружает справочник и делает его текущим.
+
+        Args:
+            force: Не использовать снимок с диска, даже если он свежий.
+        """
+        snapshot = await asyncio.to_thread(self._read_snapshot)
+        areas = None
+        if snapshot is not None and not force and time.time() - snapshot[0] < self.refresh_interval:
+            areas = snapshot[1]
+        else:
+            areas = await self._fetch()
+            if areas is None and snapshot is not None and len(get_area_index()) < len(snapshot[1]):
+                logger.info("Использую устаревший снимок справочника регионов")
+                areas = snapshot[1]
+
+        if areas:
+            set_area_index(AreaIndex(areas))
+            logger.info(f"Справочник регионов hh.ru загружен: {len(areas)} регионов")
+        return get_area_index()
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.load(force=True)
+
+    async def start(self) -> None:
+        """Загружает справочник и запускает его периодическое обновление."""
+        await self.load()
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def close(self) -> None:
+        """Останавливает периодическое обновление."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
@@ -0,0 +1,299 @@
+"""
+Кэш ответов API hh.ru.
+
+Интерактивный поиск и ежедневная рассылка часто повторяют один и тот же
+запрос в течение нескольких минут. Кэш стоит перед сетевыми запросами
+`HHApiClient` и хранит уже разобранные ответы по каноническому ключу запроса.
+
+- У каждой записи свой TTL.
+- Память ограничена и по числу записей, и по примерному размеру в байтах
+  (вытесняются давно не использованные записи - LRU).
+- Опционально записи дублируются в SQLite, чтобы кэш переживал перезапуск.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from ..utils.logger import logger
+
+# --- Настройки кэша (можно переопределить через .env) ---
+HH_CACHE_TTL = float(os.getenv("HH_CACHE_TTL", "600"))  # Время жизни записи в секундах
+HH_CACHE_MAX_ENTRIES = int(os.getenv("HH_CACHE_MAX_ENTRIES", "1000"))
+HH_CACHE_MAX_BYTES = int(os.getenv("HH_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+# Путь к файлу SQLite. Пустое значение - кэш только в памяти.
+HH_CACHE_DB_PATH = os.getenv("HH_CACHE_DB_PATH", "")
+# Для скольких запросов хранить валидаторы (ETag/Last-Modified) для условных запросов
+HH_VALIDATORS_MAX_ENTRIES = int(os.getenv("HH_VALIDATORS_MAX_ENTRIES", "2000"))
+# Лимит памяти под сохраненные вместе с валидаторами ответы
+HH_VALIDATORS_MAX_BYTES = int(os.getenv("HH_VALIDATORS_MAX_BYTES", str(20 * 1024 * 1024)))
+
+
+@dataclass
+class CacheStats:
+    """Счетчики работы кэша."""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0  # Вытеснено из-за лимитов памяти
+    expirations: int = 0  # Удалено по истечении TTL
+    disk_hits: int = 0  # Из них найдено только на диске
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class SQLiteCacheBackend:
+    """
+    Хранилище записей кэша в файле SQLite.
+
+    sqlite3 - блокирующий модуль, поэтому все обращения выполняются
+    в отдельном потоке через `asyncio.to_thread`.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = asyncio.Lock()
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS hh_cache ("
+                "key TEXT PRIMARY KEY, expires_at REAL NOT NULL, value TEXT NOT NULL)"
+            )
+            # Старые записи от прошлых запусков больше не нужны
+            self._conn.execute("DELETE FROM hh_cache WHERE expires_at <= ?", (time.time(),))
+
+    def _get(self, key: str) -> Optional[Tuple[float, str]]:
+        row = self._conn.execute(
+            "SELECT expires_at, value FROM hh_cache WHERE key = ?", (key,)
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def _set(self, key: str, expires_at: float, value: str) -> None:
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO hh_cache (key, expires_at, value) VALUES (?, ?, ?)",
+                (key, expires_at, value),
+            )
+
+    def _delete(self, key: str) -> None:
+        with self._conn:
+            self._conn.execute("DELETE FROM hh_cache WHERE key = ?", (key,))
+
+    async def get(self, key: str) -> Optional[Tuple[float, str]]:
+        async with self._lock:
+            return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, expires_at: float, value: str) -> None:
+        async with self._lock:
+            await asyncio.to_thread(self._set, key, expires_at, value)
+
+    async def delete(self, key: str) -> None:
+        async with self._lock:
+            await asyncio.to_thread(self._delete, key)
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class ResponseCache:
+    """
+    TTL + LRU кэш разобранных ответов hh.ru.
+
+    Значения считаются неизменяемыми: вызывающий код не должен
+    модифицировать полученные из кэша словари и списки.
+    """
+
+    def __init__(
+        self,
+        ttl: float = HH_CACHE_TTL,
+        max_entries: int = HH_CACHE_MAX_ENTRIES,
+        max_bytes: int = HH_CACHE_MAX_BYTES,
+        backend: Optional[SQLiteCacheBackend] = None,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.backend = backend
+        self.stats = CacheStats()
+        # key -> (expires_at, size, value); порядок - от давно использованных к свежим
+        self._entries: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+        self._size = 0
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        """Создает кэш по настройкам из переменных окружения."""
+        backend = SQLiteCacheBackend(HH_CACHE_DB_PATH) if HH_CACHE_DB_PATH else None
+        return cls(backend=backend)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        """Примерный объем данных в памяти."""
+        return self._size
+
+    def _drop(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._size -= size
+
+    def _store(self, key: str, expires_at: float, size: int, value: Any) -> None:
+        if key in self._entries:
+            self._drop(key)
+        if size > self.max_bytes:
+            # Слишком большой ответ не кэшируем в памяти вовсе
+            return
+        self._entries[key] = (expires_at, size, value)
+        self._size += size
+        while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._drop(oldest_key)
+            self.stats.evictions += 1
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Возвращает значение по ключу или None, если записи нет или она устарела."""
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return entry[2]
+            self._drop(key)
+            self.stats.expirations += 1
+
+        if self.backend is not None:
+            try:
+                stored = await self.backend.get(key)
+            except sqlite3.Error as e:
+                logger.warning(f"Не удалось прочитать кэш hh.ru с диска: {e}")
+                stored = None
+            if stored is not None:
+                expires_at, raw = stored
+                if expires_at > now:
+                    value = json.loads(raw)
+                    self._store(key, expires_at, len(raw), value)
+                    self.stats.hits += 1
+                    self.stats.disk_hits += 1
+                    return value
+                await self.backend.delete(key)
+                self.stats.expirations += 1
+
+        self.stats.misses += 1
+        return None
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None, size: Optional[int] = None) -> None:
+        """
+        Сохраняет значение.
+
+        Args:
+            key: Канонический ключ запроса.
+            value: Разобранный ответ.
+            ttl: Время жизни записи; по умолчанию - общий TTL кэша.
+            size: Размер распакованного тела ответа в байтах, если известен.
+        """
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        raw: Optional[str] = None
+        if size is None or self.backend is not None:
+            raw = json.dumps(value, ensure_ascii=False)
+            size = size or len(raw)
+        self._store(key, expires_at, size, value)
+
+        if self.backend is not None and raw is not None:
+            try:
+                await self.backend.set(key, expires_at, raw)
+            except sqlite3.Error as e:
+                logger.warning(f"Не удалось сохранить кэш hh.ru на диск: {e}")
+
+    def clear(self) -> None:
+        """Очищает кэш в памяти (записи на диске не трогаются)."""
+        self._entries.clear()
+        self._size = 0
+
+    def close(self) -> None:
+        """Закрывает дисковое хранилище, если оно используется."""
+        if self.backend is not None:
+            self.backend.close()
+            self.backend = None
+
+
+class ConditionalEntry(NamedTuple):
+    """Валидаторы ответа и сам разобранный ответ для условного запроса."""
+    etag: Optional[str]
+    last_modified: Optional[str]
+    payload: Any
+    size: int  # Примерный размер ответа в байтах
+
+
+class ValidatorStore:
+    """
+    Хранилище валидаторов (ETag / Last-Modified) по ключу запроса.
+
+    В отличие от ResponseCache записи не устаревают по времени: по ним
+    отправляется условный запрос, и при ответе 304 Not Modified
+    переиспользуется уже разобранный ответ без загрузки и декодирования тела.
+    Как и в ResponseCache, память ограничена числом записей и примерным
+    размером ответов в байтах (LRU).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = HH_VALIDATORS_MAX_ENTRIES,
+        max_bytes: int = HH_VALIDATORS_MAX_BYTES,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.not_modified = 0  # Сколько раз сервер ответил 304
+        self._entries: "OrderedDict[str, ConditionalEntry]" = OrderedDict()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        """Примерный объем сохраненных ответов."""
+        return self._size
+
+    def _drop(self, key: str) -> None:
+        self._size -= self._entries.pop(key).size
+
+    def get(self, key: str) -> Optional[ConditionalEntry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def set(
+        self,
+        key: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        payload: Any,
+        size: Optional[int] = None,
+    ) -> None:
+        """
+        Запоминает валидаторы; ответы без валидаторов не сохраняются.
+
+        Args:
+            size: Размер распакованного тела ответа в байтах, если известен.
+        """
+        if key in self._entries:
+            self._drop(key)
+        if not etag and not last_modified:
+            return
+        if size is None:
+            size = len(json.dumps(payload, ensure_ascii=False))
+        if size > self.max_bytes:
+            # Слишком большой ответ не храним - запрос будет безусловным
+            return
+        self._entries[key] = ConditionalEntry(etag, last_modified, payload, size)
+        self._size += size
+        while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+            self._drop(next(iter(self._entries)))
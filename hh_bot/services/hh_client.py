@@ -0,0 +1,358 @@
+"""
+Долгоживущий HTTP-клиент для API hh.ru.
+
+Клиент держит один `aiohttp.ClientSession` с настроенным пулом соединений,
+поэтому интерактивный поиск и ежедневная рассылка переиспользуют "тёплые"
+соединения вместо нового DNS + TCP + TLS рукопожатия на каждый запрос.
+Создается один раз в `main.main()` и закрывается в его блоке `finally`.
+"""
+import asyncio
+import json
+import os
+import random
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import aiohttp
+
+from ..utils.logger import logger
+from ..utils.rate_limit import TokenBucket
+from .hh_cache import ResponseCache, ValidatorStore
+
+# --- Настройки клиента (можно переопределить через .env) ---
+HH_API_BASE_URL = os.getenv("HH_API_BASE_URL", "https://api.hh.ru").rstrip("/")
+HH_USER_AGENT = os.getenv("HH_USER_AGENT", "prof_compass_bot/1.0")
+
+HH_HTTP_POOL_LIMIT = int(os.getenv("HH_HTTP_POOL_LIMIT", "20"))  # Всего соединений в пуле
+HH_HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HH_HTTP_POOL_LIMIT_PER_HOST", "10"))  # Соединений на один хост
+HH_HTTP_KEEPALIVE = float(os.getenv("HH_HTTP_KEEPALIVE", "60"))  # Сколько секунд держать простаивающее соединение
+HH_HTTP_DNS_TTL = int(os.getenv("HH_HTTP_DNS_TTL", "300"))  # Время жизни DNS-кэша в секундах
+HH_HTTP_TIMEOUT = float(os.getenv("HH_HTTP_TIMEOUT", "30"))  # Общий таймаут одного запроса
+
+# --- Ограничение частоты и повторы ---
+HH_RATE_LIMIT = float(os.getenv("HH_RATE_LIMIT", "5"))  # Запросов в секунду в среднем
+HH_RATE_BURST = float(os.getenv("HH_RATE_BURST", "10"))  # Допустимый всплеск запросов
+HH_MAX_RETRIES = int(os.getenv("HH_MAX_RETRIES", "3"))  # Повторов после первой попытки
+HH_BACKOFF_BASE = float(os.getenv("HH_BACKOFF_BASE", "0.5"))  # Базовая задержка между повторами
+HH_BACKOFF_MAX = float(os.getenv("HH_BACKOFF_MAX", "30"))  # Максимальная задержка между повторами
+
+# Сколько карточек /vacancies/{id} загружать одновременно
+HH_DETAILS_CONCURRENCY = int(os.getenv("HH_DETAILS_CONCURRENCY", "5"))
+# Сколько держать карточку вакансии в кэше ответов (она меняется редко)
+HH_DETAILS_CACHE_TTL = float(os.getenv("HH_DETAILS_CACHE_TTL", "86400"))
+
+# Декодер JSON: auto (orjson -> msgspec -> json), orjson, msgspec или json
+HH_JSON_DECODER = os.getenv("HH_JSON_DECODER", "auto").lower()
+
+# Общее ведро токенов для всех клиентов процесса: hh.ru ограничивает частоту
+# запросов по нашему приложению целиком, а не по отдельному соединению
+_shared_rate_limiter: Optional[TokenBucket] = None
+
+
+def get_shared_rate_limiter() -> TokenBucket:
+    """Возвращает ограничитель частоты, общий для всех клиентов hh.ru."""
+    global _shared_rate_limiter
+    if _shared_rate_limiter is None:
+        _shared_rate_limiter = TokenBucket(rate=HH_RATE_LIMIT, capacity=HH_RATE_BURST)
+    return _shared_rate_limiter
+
+
+class HHApiError(aiohttp.ClientError):
+    """hh.ru не ответил успешно даже после повторов."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class HHThrottledError(HHApiError):
+    """hh.ru ограничил частоту запросов (429)."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message, status=429)
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Разбирает заголовок Retry-After: число секунд или HTTP-дата."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def resolve_json_decoder(name: str = HH_JSON_DECODER) -> Callable[[str], Any]:
+    """
+    Возвращает функцию разбора JSON по имени.
+
+    orjson и msgspec - необязательные зависимости: в режиме "auto" берется
+    первая установленная, иначе - стандартный `json.loads`. Если явно
+    запрошенная библиотека не установлена, используется `json.loads`.
+    """
+    candidates = ("orjson", "msgspec") if name == "auto" else (name,)
+    for candidate in candidates:
+        if candidate == "orjson":
+            try:
+                import orjson
+            except ImportError:
+                continue
+            return orjson.loads
+        if candidate == "msgspec":
+            try:
+                import msgspec
+            except ImportError:
+                continue
+            return msgspec.json.decode
+    if name not in ("auto", "json"):
+        logger.warning(f"Декодер JSON '{name}' недоступен, используется стандартный json")
+    return json.loads
+
+
+def canonical_query_key(params: Dict[str, Any]) -> str:
+    """
+    Строит канонический ключ запроса по его параметрам.
+
+    Порядок параметров, пустые значения, регистр и лишние пробелы в тексте
+    поиска не влияют на ключ: для hh.ru "Python  разработчик" и
+    "python разработчик" - один и тот же запрос.
+    """
+    normalized = {}
+    for key, value in params.items():
+        if value is None:
+            continue
+        if isinstance(value, str):
+            value = " ".join(value.split())
+            if key == "text":
+                value = value.casefold()
+        normalized[key] = str(value)
+    return json.dumps(normalized, ensure_ascii=False, sort_keys=True)
+
+
+class HHApiClient:
+    """
+    Клиент API hh.ru с общим пулом соединений.
+
+    Сессия создается лениво при первом запросе (для этого нужен запущенный
+    цикл событий), поэтому объект можно безопасно создать заранее.
+    Если передан `cache`, ответы берутся из него, пока не истек их TTL.
+    Для повторных запросов клиент отправляет If-None-Match / If-Modified-Since
+    и при ответе 304 отдает ранее разобранный ответ.
+
+    Перед каждым запросом берется токен из общего ограничителя частоты.
+    Ответы 429/5xx и сетевые сбои повторяются с экспоненциальной задержкой
+    со случайным разбросом (jitter); заголовок Retry-After имеет приоритет.
+
+    Тело ответа разбирается функцией `json_loads` - по умолчанию самой быстрой
+    из установленных библиотек (см. `resolve_json_decoder`).
+    """
+
+    def __init__(
+        self,
+        base_url: str = HH_API_BASE_URL,
+        *,
+        limit: int = HH_HTTP_POOL_LIMIT,
+        limit_per_host: int = HH_HTTP_POOL_LIMIT_PER_HOST,
+        keepalive_timeout: float = HH_HTTP_KEEPALIVE,
+        dns_cache_ttl: int = HH_HTTP_DNS_TTL,
+        timeout: float = HH_HTTP_TIMEOUT,
+        user_agent: str = HH_USER_AGENT,
+        cache: Optional[ResponseCache] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        validators: Optional[ValidatorStore] = None,
+        max_retries: int = HH_MAX_RETRIES,
+        backoff_base: float = HH_BACKOFF_BASE,
+        backoff_max: float = HH_BACKOFF_MAX,
+        json_loads: Optional[Callable[[str], Any]] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self._limit = limit
+        self._limit_per_host = limit_per_host
+        self._keepalive_timeout = keepalive_timeout
+        self._dns_cache_ttl = dns_cache_ttl
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self._headers = {"User-Agent": user_agent, "HH-User-Agent": user_agent}
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.cache = cache
+        self.rate_limiter = rate_limiter or get_shared_rate_limiter()
+        self.validators = validators if validators is not None else ValidatorStore()
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.json_loads = json_loads or resolve_json_decoder()
+
+    @property
+    def closed(self) -> bool:
+        """True, если сессия еще не создана или уже закрыта."""
+        return self._session is None or self._session.closed
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Возвращает общую сессию, создавая ее при первом обращении."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self._limit,
+                limit_per_host=self._limit_per_host,
+                keepalive_timeout=self._keepalive_timeout,
+                ttl_dns_cache=self._dns_cache_ttl,
+                use_dns_cache=True,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self._timeout,
+                headers=self._headers,
+            )
+            logger.info(
+                f"Создан пул соединений к hh.ru (limit={self._limit}, per_host={self._limit_per_host})"
+            )
+        return self._session
+
+    async def get_json(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        cache_ttl: Optional[float] = None,
+    ) -> Any:
+        """
+        Выполняет GET-запрос к API hh.ru и возвращает разобранный JSON.
+
+        Args:
+            path: Путь относительно базового URL API (например, "/vacancies").
+            params: Параметры запроса.
+            cache_ttl: Время жизни ответа в кэше; по умолчанию - TTL самого кэша.
+
+        Raises:
+            HHThrottledError: hh.ru продолжает отвечать 429 после всех повторов.
+            HHApiError: 5xx или сетевой сбой после всех повторов.
+            aiohttp.ClientResponseError: прочие ответы 4xx (без повторов).
+
+        Ошибочные ответы не кэшируются.
+        """
+        cache_key = f"{path}?{canonical_query_key(params or {})}"
+        if self.cache is not None:
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        # Условный запрос: если ответ не изменился, сервер вернет 304 без тела
+        conditional = self.validators.get(cache_key)
+        request_headers = {}
+        if conditional is not None:
+            if conditional.etag:
+                request_headers["If-None-Match"] = conditional.etag
+            if conditional.last_modified:
+                request_headers["If-Modified-Since"] = conditional.last_modified
+
+        session = self._get_session()
+        url = f"{self.base_url}{path}"
+        attempt = 0
+        while True:
+            await self.rate_limiter.acquire()
+            retry_after = None
+            try:
+                async with session.get(url, params=params, headers=request_headers or None) as response:
+                    if response.status == 304 and conditional is not None:
+                        self.validators.not_modified += 1
+                        data = conditional.payload
+                        body_size = conditional.size
+                        break
+                    if response.status == 429 or response.status >= 500:
+                        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                        if response.status == 429:
+                            error: HHApiError = HHThrottledError(
+                                "hh.ru ограничил частоту запросов", retry_after=retry_after
+                            )
+                        else:
+                            error = HHApiError(f"hh.ru вернул ошибку {response.status}", status=response.status)
+                    else:
+                        # raise_for_status вызовет исключение для остальных кодов 4xx
+                        response.raise_for_status()
+                        # Content-Length - размер сжатого тела (и его нет у chunked-ответов),
+                        # поэтому для лимитов кэша учитываем размер уже распакованного тела
+                        body_size = len(await response.read())
+                        data = await response.json(loads=self.json_loads)
+                        self.validators.set(
+                            cache_key,
+                            etag=response.headers.get("ETag"),
+                            last_modified=response.headers.get("Last-Modified"),
+                            payload=data,
+                            size=body_size,
+                        )
+                        break
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                error = HHApiError(f"Сетевая ошибка при запросе к hh.ru: {e!r}")
+
+            delay = self._retry_delay(attempt, retry_after)
+            if isinstance(error, HHThrottledError):
+                # Тормозим всех, кто делит ограничитель, а не только этот запрос
+                self.rate_limiter.pause(min(delay, self.backoff_max))
+            if attempt >= self.max_retries or delay > self.backoff_max:
+                raise error
+            logger.warning(f"{error}. Повтор {attempt + 1}/{self.max_retries} через {delay:.1f} с.")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+        if self.cache is not None:
+            await self.cache.set(cache_key, data, ttl=cache_ttl, size=body_size)
+        return data
+
+    async def get_vacancy_details(
+        self,
+        hh_ids: Iterable[str],
+        concurrency: int = HH_DETAILS_CONCURRENCY,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Загружает полные карточки вакансий (/vacancies/{id}) пачкой.
+
+        Одновременно выполняется не больше `concurrency` запросов, повторяющиеся
+        id запрашиваются один раз. Ответы кэшируются по id вакансии.
+
+        Returns:
+            Словарь {hh_id: карточка}. Вакансии, которые не удалось получить
+            (например, удаленные - 404), в него не попадают, ошибка только логируется.
+        """
+        unique_ids = list(dict.fromkeys(str(hh_id) for hh_id in hh_ids))
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        details: Dict[str, Dict[str, Any]] = {}
+
+        async def fetch_one(hh_id: str) -> None:
+            async with semaphore:
+                try:
+                    details[hh_id] = await self.get_json(f"/vacancies/{hh_id}", cache_ttl=HH_DETAILS_CACHE_TTL)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    logger.warning(f"Не удалось получить карточку вакансии {hh_id} с hh.ru: {e}")
+
+        await asyncio.gather(*(fetch_one(hh_id) for hh_id in unique_ids))
+        return details
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[float]) -> float:
+        """Задержка перед повтором: Retry-After или экспонента с полным разбросом."""
+        if retry_after is not None:
+            return retry_after
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def close(self) -> None:
+        """Закрывает сессию и все соединения пула."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            logger.info("Пул соединений к hh.ru закрыт")
+        self._session = None
+        if self.cache is not None:
+            logger.info(
+                f"Статистика кэша hh.ru: {self.cache.stats.as_dict()}, "
+                f"ответов 304: {self.validators.not_modified}"
+            )
+            self.cache.close()
+
+    async def __aenter__(self) -> "HHApiClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
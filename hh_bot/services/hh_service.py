@@ -1,62 +1,208 @@
 """
 Сервис для взаимодействия с API hh.ru.
 """
+import asyncio
+import logging
+import os
+from typing import AsyncIterator, Dict, List, Optional, Set
+
 import aiohttp
 import json  # <--- Добавлен для красивого вывода в лог
 
 # Импортируем логгер из папки utils
+from ..enums import HHFetchStatusEnum
 from ..utils.logger import logger
+from .hh_client import HHApiClient, HHThrottledError
+from .vacancy_record import VacancyRecord, parse_vacancies
 
-async def fetch_vacancies(filters: dict) -> list[dict]:
-    """
-    Асинхронно получает вакансии с hh.ru на основе фильтров.
+# --- Настройки постраничной загрузки (можно переопределить через .env) ---
+HH_PER_PAGE = int(os.getenv("HH_PER_PAGE", "50"))  # Вакансий на одной странице (максимум у hh.ru - 100)
+HH_MAX_PAGES = int(os.getenv("HH_MAX_PAGES", "10"))  # Сколько страниц читать в постраничном режиме
+HH_PAGE_CONCURRENCY = int(os.getenv("HH_PAGE_CONCURRENCY", "4"))  # Сколько страниц загружать одновременно
+# API hh.ru не отдает больше 2000 вакансий на один поисковый запрос
+HH_MAX_DEPTH = 2000
 
-    Args:
-        filters: Словарь с параметрами поиска (должность, город, зарплата и т.д.).
 
-    Returns:
-        Список словарей с информацией о вакансиях.
-        Возвращает пустой список в случае ошибки.
+class VacancySearchResult(list):
     """
-    # API hh.ru для поиска вакансий
-    url = "https://api.hh.ru/vacancies"
-    
-    # Подготовка параметров для запроса
+    Список вакансий (VacancyRecord) вместе со статусом запроса.
+
+    Ведет себя как обычный список, но позволяет отличить
+    "вакансий нет" (пустой список со статусом OK) от "hh.ru недоступен".
+    """
+
+    def __init__(
+        self,
+        items=(),
+        status: HHFetchStatusEnum = HHFetchStatusEnum.OK,
+        error: Optional[str] = None,
+    ):
+        super().__init__(items)
+        self.status = status
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.status == HHFetchStatusEnum.OK
+
+    @property
+    def throttled(self) -> bool:
+        return self.status == HHFetchStatusEnum.THROTTLED
+
+
+def build_search_params(filters: dict, per_page: int = HH_PER_PAGE) -> dict:
+    """Преобразует фильтры пользователя в параметры запроса к /vacancies."""
     params = {
         'text': filters.get('position', ''),
-        'area': filters.get('city'), # Стало
+        # ИСПРАВЛЕНИЕ: вызывающий код передает ID региона hh.ru в 'city_id'
+        'area': filters.get('city_id'),
         'salary': filters.get('salary_min'),
         'only_with_salary': 'true' if filters.get('salary_min') else 'false',
         'schedule': 'remote' if filters.get('remote') else None,
         'period': filters.get('freshness_days', 1),
         'employment': filters.get('employment'),
         'experience': filters.get('experience'),
-        'per_page': 50 # Ограничиваем количество для одного запроса
+        'per_page': per_page # Ограничиваем количество для одного запроса
     }
-    
+
     # Убираем None значения из параметров, чтобы не сломать запрос
-    params = {k: v for k, v in params.items() if v is not None}
+    return {k: v for k, v in params.items() if v is not None}
+
+
+def _take_new_items(items: List[dict], seen_ids: Set[str]) -> List[VacancyRecord]:
+    """
+    Разбирает вакансии страницы и отбрасывает уже полученные на предыдущих страницах.
+    Пока мы читаем страницы, выдача hh.ru может сдвинуться, и одна
+    вакансия попадет на две соседние страницы.
+    """
+    new_items = []
+    for record in parse_vacancies(items):
+        if record.id in seen_ids:
+            continue
+        seen_ids.add(record.id)
+        new_items.append(record)
+    return new_items
+
+
+async def iter_vacancy_pages(
+    filters: dict,
+    client: Optional[HHApiClient] = None,
+    max_pages: int = HH_MAX_PAGES,
+    concurrency: int = HH_PAGE_CONCURRENCY,
+) -> AsyncIterator[List[VacancyRecord]]:
+    """
+    Постранично получает вакансии с hh.ru и отдает их по мере загрузки.
+
+    Сначала читается первая страница: из нее берется общее число страниц `pages`.
+    Остальные страницы (не больше `max_pages`) загружаются параллельно,
+    не более `concurrency` одновременно, но выдаются по порядку номеров,
+    чтобы сохранить ранжирование hh.ru: страница отдается, как только готовы
+    она и все предыдущие, не дожидаясь последней.
+
+    Args:
+        filters: Словарь с параметрами поиска (должность, город, зарплата и т.д.).
+        client: Общий клиент hh.ru. Если не передан, создается временный.
+        max_pages: Максимальное количество страниц, включая первую.
+        concurrency: Максимальное количество одновременных запросов страниц.
+
+    Yields:
+        Списки разобранных вакансий (по одному на страницу), без повторов между страницами.
+
+    Raises:
+        aiohttp.ClientError: Если не удалось получить первую страницу.
+        Ошибки остальных страниц только логируются.
+    """
+    params = build_search_params(filters)
 
     # --- ДОБАВЛЕНО: Логирование параметров запроса ---
-    # json.dumps делает словарь читаемым, ensure_ascii=False сохраняет кириллицу
-    logger.info(f"Отправляю запрос к hh.ru с параметрами: {json.dumps(params, ensure_ascii=False, indent=2)}")
+    # json.dumps делает словарь читаемым, ensure_ascii=False сохраняет кириллицу.
+    # Сериализуем только если INFO действительно попадет в лог.
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(f"Отправляю запрос к hh.ru с параметрами: {json.dumps(params, ensure_ascii=False, indent=2)}")
+
+    # Без общего клиента открываем временный, чтобы функция работала и вне main()
+    own_client = client is None
+    http_client = client or HHApiClient()
+    pending: Set[asyncio.Task] = set()
+
+    try:
+        data = await http_client.get_json("/vacancies", params={**params, 'page': 0})
+
+        # --- ИЗМЕНЕНО: Более подробное логирование ответа ---
+        found_count = data.get('found', 0)
+        items_count = len(data.get('items', []))
+        logger.info(f"hh.ru вернул ответ. Найдено всего: {found_count}. Получено на странице: {items_count}.")
+
+        seen_ids: Set[str] = set()
+        yield _take_new_items(data.get('items', []), seen_ids)
+
+        per_page = params['per_page']
+        total_pages = min(data.get('pages', 1), max_pages, HH_MAX_DEPTH // per_page)
+        if total_pages <= 1:
+            return
+
+        logger.info(f"Загружаю еще {total_pages - 1} стр. с hh.ru (параллельно до {concurrency}).")
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def fetch_page(page: int) -> Dict:
+            async with semaphore:
+                return await http_client.get_json("/vacancies", params={**params, 'page': page})
 
+        tasks = [asyncio.create_task(fetch_page(page)) for page in range(1, total_pages)]
+        pending = set(tasks)
+        # Ждем страницы по порядку; следующие тем временем продолжают загружаться
+        for task in tasks:
+            try:
+                page_data = await task
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # Одна неудачная страница не должна терять остальные результаты
+                logger.warning(f"Не удалось получить страницу вакансий с hh.ru: {e}")
+                continue
+            finally:
+                pending.discard(task)
+
+            page_items = _take_new_items(page_data.get('items', []), seen_ids)
+            if page_items:
+                yield page_items
+    finally:
+        # Если потребитель прервал итерацию, отменяем незавершенные запросы
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        if own_client:
+            await http_client.close()
+
+
+async def fetch_vacancies(
+    filters: dict,
+    client: Optional[HHApiClient] = None,
+    max_pages: int = 1,
+) -> VacancySearchResult:
+    """
+    Асинхронно получает вакансии с hh.ru на основе фильтров.
+
+    Args:
+        filters: Словарь с параметрами поиска (должность, город, зарплата и т.д.).
+        client: Общий клиент hh.ru с пулом соединений. Если не передан,
+            создается временный клиент только на этот запрос.
+        max_pages: Сколько страниц выдачи прочитать. По умолчанию только первую.
+
+    Returns:
+        Список разобранных вакансий VacancyRecord (VacancySearchResult).
+        В случае ошибки список пуст, а статус показывает ее причину.
+    """
+    vacancies: List[VacancyRecord] = []
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params) as response:
-                # raise_for_status вызовет исключение для кодов 4xx/5xx
-                response.raise_for_status()
-                data = await response.json()
-                
-                # --- ИЗМЕНЕНО: Более подробное логирование ответа ---
-                found_count = data.get('found', 0)
-                items_count = len(data.get('items', []))
-                logger.info(f"hh.ru вернул ответ. Найдено всего: {found_count}. Получено на странице: {items_count}.")
-                
-                return data.get('items', [])
+        async for page_items in iter_vacancy_pages(filters, client=client, max_pages=max_pages):
+            vacancies.extend(page_items)
+        return VacancySearchResult(vacancies)
+    except HHThrottledError as e:
+        logger.error(f"hh.ru ограничил частоту запросов: {e}")
+        return VacancySearchResult(status=HHFetchStatusEnum.THROTTLED, error=str(e))
     except aiohttp.ClientError as e:
         logger.error(f"Ошибка при запросе к API hh.ru: {e}")
-        return [] # Возвращаем пустой список в случае ошибки
+        return VacancySearchResult(status=HHFetchStatusEnum.ERROR, error=str(e))
     except Exception as e:
         logger.error(f"Произошла непредвиденная ошибка при запросе к hh.ru: {e}")
-        return []
\ No newline at end of file
+        return VacancySearchResult(status=HHFetchStatusEnum.ERROR, error=str(e))
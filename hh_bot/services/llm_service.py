@@ -10,6 +10,9 @@ async def generate_resume(
     ВРЕМЕННАЯ ЗАГЛУШКА.
     Генерирует шаблонный текст резюме на основе данных пользователя и вакансии.
     Замените этот код на реальный вызов API, когда будете готовы.
+
+    В `vacancy_info` помимо title/company могут быть полное описание
+    (`description`) и ключевые навыки (`key_skills`) из карточки hh.ru.
     """
     logger.warning("Используется ЗАГЛУШКА для генерации резюме! LLM не вызывается.")
 
@@ -17,8 +20,11 @@ async def generate_resume(
     vacancy_title = vacancy_info.get("title", "Не указана")
     company_name = vacancy_info.get("company", "Не указана")
 
+    key_skills = vacancy_info.get("key_skills") or []
+
     full_name = user_profile.get("full_name", "Кандидат")
     base_resume = user_profile.get("base_resume", "Не указан")
+    skills_block = f"\n    <b>Навыки под вакансию:</b> {', '.join(key_skills)}\n" if key_skills else ""
 
     # Формируем текст резюме, используя данные о вакансии
     resume_text = f"""
@@ -28,7 +34,7 @@ async def generate_resume(
 
     <b>Ключевой опыт:</b>
     {base_resume}
-
+{skills_block}
     <b>Обо мне:</b>
     Мой опыт и навыки отлично подходят для требований, указанных в вашей вакансии. Я уверен, что смогу стать ценным членом вашей команды.
     """
@@ -47,6 +53,10 @@ async def generate_cover_letter(
     vacancy_title = vacancy_info.get("title", "Не указана")
     company_name = vacancy_info.get("company", "Не указана")
     full_name = user_profile.get("full_name", "Кандидат")
+    key_skills = vacancy_info.get("key_skills") or []
+    skills_sentence = (
+        f"\n    Особенно хочу отметить свой опыт в: {', '.join(key_skills)}.\n" if key_skills else ""
+    )
 
     return f"""
     <b>Сопроводительное письмо</b>
@@ -54,7 +64,7 @@ async def generate_cover_letter(
     Уважаемый рекрутер компании "{company_name}",
 
     С большим интересом ознакомился с вашей вакансией на должность "{vacancy_title}" и уверен, что мой опыт отлично соответствует вашим требованиям.
-
+{skills_sentence}
     Буду рад подробно рассказать о своем опыте на собеседовании.
 
     С уважением,
@@ -1,5 +1,5 @@
 # Импортируем и экспортируем основные функции для удобного использования
-from .service import setup_scheduler, shutdown_scheduler, scheduler # <-- ИСПРАВЛЕНО: start_scheduler -> setup_scheduler
+from .service import setup_scheduler, schedule_digest_resume, shutdown_scheduler, scheduler # <-- ИСПРАВЛЕНО: start_scheduler -> setup_scheduler
 from .config import set_bot_instance, set_session_maker, get_bot, get_session_maker
 
 # Экспортируем для использования в других частях проекта
@@ -7,6 +7,7 @@ __all__ = [
     "set_bot_instance",
     "set_session_maker",
     "setup_scheduler", # <-- ИСПРАВЛЕНО: start_scheduler -> setup_scheduler
+    "schedule_digest_resume",
     "shutdown_scheduler",
     "scheduler",
     "get_bot",
@@ -1,17 +1,28 @@
 """Константы, используемые в фоновых задачах."""
+import os
 
-from typing import Dict
+# Лимит вакансий в одном дайджесте
+DIGEST_VACANCY_LIMIT = 10
 
-# Словарь для сопоставления названий городов и их ID в API hh.ru
-CITY_MAP: Dict[str, int] = {
-    "москва": 1,
-    "санкт-петербург": 2,
-    "новосибирск": 4,
-    "екатеринбург": 3,
-    "нижний новгород": 66,
-    "казань": 35,
-    # ... добавьте другие города по мере необходимости
-}
+# --- Параллельная рассылка (можно переопределить через .env) ---
+# Сколько пользователей обрабатывается одновременно. Каждый обрабатываемый
+# пользователь держит свою сессию БД, поэтому значение не должно превышать
+# размер пула соединений (pool_size + max_overflow).
+DIGEST_WORKERS = int(os.getenv("DIGEST_WORKERS", "8"))
+DIGEST_HH_CONCURRENCY = int(os.getenv("DIGEST_HH_CONCURRENCY", "4"))  # Одновременных запросов к hh.ru (групп, загружаемых параллельно)
+DIGEST_DB_CONCURRENCY = int(os.getenv("DIGEST_DB_CONCURRENCY", "4"))  # Одновременных сверок/записей в БД
+DIGEST_SEND_CONCURRENCY = int(os.getenv("DIGEST_SEND_CONCURRENCY", "8"))  # Одновременных отправок в Telegram
 
-# Лимит вакансий в одном дайджесте
-DIGEST_VACANCY_LIMIT = 10
\ No newline at end of file
+# --- Разнесение рассылки во времени (можно переопределить через .env) ---
+# Пользователи делятся на DIGEST_SHARDS частей по ID; каждая часть - отдельная
+# задача планировщика, запускаемая через DIGEST_SHARD_INTERVAL_MINUTES минут
+# после предыдущей. Так нагрузка на hh.ru, БД и Telegram распределяется по окну.
+DIGEST_SHARDS = int(os.getenv("DIGEST_SHARDS", "1"))
+DIGEST_START_TIME = os.getenv("DIGEST_START_TIME", "09:00")  # Время запуска первой части, ЧЧ:ММ
+DIGEST_SHARD_INTERVAL_MINUTES = int(os.getenv("DIGEST_SHARD_INTERVAL_MINUTES", "10"))
+DIGEST_TIMEZONE = os.getenv("SCHEDULER_TIMEZONE", "Europe/Moscow")
+# Сколько дней хранить записи о запусках рассылки (для возобновления после перезапуска)
+DIGEST_RUNS_KEEP_DAYS = int(os.getenv("DIGEST_RUNS_KEEP_DAYS", "14"))
+# Сколько раз за день пытаться обработать пользователя, если обработка падает
+# (повторы выполняются при продолжении запуска, см. runs.py)
+DIGEST_MAX_ATTEMPTS = int(os.getenv("DIGEST_MAX_ATTEMPTS", "3"))
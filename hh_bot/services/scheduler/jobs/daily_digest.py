@@ -1,40 +1,183 @@
 """
 Главная логика фоновой задачи ежедневной рассылки.
 Этот файл является оркестратором, вызывающим другие модули.
+
+Пользователи группируются по одинаковым запросам к hh.ru (см. `planner.py`):
+загрузка вакансий и сверка с БД выполняются один раз на группу.
+Затем пользователи обрабатываются параллельно пулом из `DIGEST_WORKERS` воркеров.
+Каждый этап (загрузка с hh.ru, сверка с БД, отправка в Telegram) ограничен
+своим семафором, чтобы ни один внешний сервис не получил больше запросов,
+чем он выдерживает. Ошибка одного пользователя не влияет на остальных.
+
+Прогресс рассылки сохраняется в БД (см. `runs.py`): после перезапуска
+процесса прерванный запуск продолжается с необработанных пользователей.
 """
+import asyncio
 import logging
-from typing import List, Tuple
+from datetime import date, datetime, timedelta
+from functools import partial
+from typing import List, Optional, Tuple
+from zoneinfo import ZoneInfo
 
 from aiogram import Bot
 from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
 from sqlalchemy import select
 
-from hh_bot.services.hh_service import fetch_vacancies
+from hh_bot.db.pool_metrics import get_engine_pool_metrics
+from hh_bot.db.routing import read_only_session
+from hh_bot.services.hh_service import iter_vacancy_pages
+from hh_bot.services.hh_client import HHApiClient, HHApiError, HHThrottledError
+from hh_bot.services.telegram_sender import MessagePriority, send_priority
 from hh_bot.utils.logger import logger
 
 # Локальные импорты из нашей новой структуры
-from .constants import DIGEST_VACANCY_LIMIT
-from .storage import find_and_process_new_vacancies, mark_vacancies_as_sent
+from .constants import (
+    DIGEST_VACANCY_LIMIT,
+    DIGEST_WORKERS,
+    DIGEST_HH_CONCURRENCY,
+    DIGEST_DB_CONCURRENCY,
+    DIGEST_SEND_CONCURRENCY,
+    DIGEST_TIMEZONE,
+    DIGEST_RUNS_KEEP_DAYS,
+)
+from .runs import DigestCheckpoint, find_unfinished_runs, prune_digest_runs, start_digest_run
+from .planner import DigestPlanner
+from .storage import mark_vacancies_as_sent
 from .processing import prepare_hh_filters
 from .formatting import format_digest_message
 from ....db.models import User, SearchFilter
+from ....enums import DigestRunItemStatusEnum
+
+
+def digest_today() -> date:
+    """Текущая дата рассылки в часовом поясе планировщика."""
+    return datetime.now(ZoneInfo(DIGEST_TIMEZONE)).date()
+
+
+class DigestStageLimits:
+    """Семафоры, ограничивающие параллельность отдельных этапов рассылки."""
+
+    def __init__(
+        self,
+        hh: int = DIGEST_HH_CONCURRENCY,
+        db: int = DIGEST_DB_CONCURRENCY,
+        send: int = DIGEST_SEND_CONCURRENCY,
+    ):
+        self.hh = asyncio.Semaphore(max(1, hh))
+        self.db = asyncio.Semaphore(max(1, db))
+        self.send = asyncio.Semaphore(max(1, send))
+
+
+async def _process_user(
+    bot: Bot,
+    async_session_maker: async_sessionmaker[AsyncSession],
+    planner: DigestPlanner,
+    limits: DigestStageLimits,
+    user: User,
+    search_filters: SearchFilter,
+) -> bool:
+    """
+    Готовит и отправляет подборку одному пользователю в его собственной сессии.
+
+    Вакансии помечаются отправленными только после успешной отправки: при
+    сбое отправки они попадут в следующую подборку, а при остановке процесса
+    между отправкой и коммитом отметок подборка при продолжении запуска
+    уйдет повторно (доставка "хотя бы один раз").
+
+    Returns:
+        True - пользователь обработан (в том числе если новых вакансий нет),
+        False - обработка завершилась ошибкой.
+    """
+    async with async_session_maker() as user_session:
+        try:
+            logger.info(f"Обработка пользователя {user.full_name} (ID: {user.telegram_id})")
+
+            # 1. Подготовка фильтров для HH, используя уже загруженный объект
+            filters_dict = prepare_hh_filters(search_filters)
+            if search_filters.city and not filters_dict.get('city_id'): # type: ignore
+                logger.warning(f"Город '{search_filters.city}' не найден в справочнике регионов hh.ru для пользователя {user.telegram_id}.") # type: ignore
+
+            # 2-3. Новые вакансии пользователя: группа с таким же запросом
+            # загружает их с hh.ru и сверяет с БД один раз на всех
+            new_vacancies = await planner.new_vacancies_for(user.id) # type: ignore
+
+            if not new_vacancies:
+                logger.info(f"Для пользователя {user.telegram_id} не найдено новых вакансий.") # type: ignore
+                return True
+
+            # 4. Отправка подборки пользователю
+            vacancies_to_send = new_vacancies[:DIGEST_VACANCY_LIMIT]
+            digest_text = format_digest_message(vacancies_to_send)
+
+            # СНАЧАЛА отправляем сообщение
+            async with limits.send:
+                await bot.send_message(
+                    chat_id=int(user.telegram_id), # type: ignore
+                    text=digest_text,
+                    parse_mode="Markdown",
+                    disable_web_page_preview=True
+                )
+            logger.info(f"Отправлена подборка из {len(vacancies_to_send)} вакансий пользователю {user.telegram_id}") # type: ignore
+
+            # ТОЛЬКО ПОСЛЕ УСПЕШНОЙ ОТПРАВКИ помечаем вакансии как отправленные.
+            # ИСПРАВЛЕНИЕ: помечаем только вошедшие в подборку - остальные новые
+            # вакансии останутся неотправленными и попадут в следующие подборки
+            sent_vacancy_objects = [v for v, _ in vacancies_to_send]
+            async with limits.db:
+                await mark_vacancies_as_sent(user_session, user.id, sent_vacancy_objects) # type: ignore
+                # И коммитим изменения
+                await user_session.commit()
+            return True
+        except HHThrottledError as e:
+            # Не "нет вакансий", а ограничение hh.ru - пишем отдельно, чтобы это было видно
+            logger.warning(f"hh.ru ограничил запросы, подборка для {user.telegram_id} пропущена: {e}") # type: ignore
+            await user_session.rollback()
+        except HHApiError as e:
+            logger.error(f"hh.ru недоступен, подборка для {user.telegram_id} пропущена: {e}") # type: ignore
+            await user_session.rollback()
+        except Exception as e:
+            logger.error(f"Не удалось обработать пользователя {user.telegram_id}: {e}", exc_info=True) # type: ignore
+            await user_session.rollback()
+        return False
 
 
 async def daily_digest_job(
     bot: Bot,
-    async_session_maker: async_sessionmaker[AsyncSession]
+    async_session_maker: async_sessionmaker[AsyncSession],
+    hh_client: Optional[HHApiClient] = None,
+    workers: int = DIGEST_WORKERS,
+    shard: int = 0,
+    shards: int = 1,
+    run_date: Optional[date] = None,
 ):
     """
     Фоновая задача для ежедневной рассылки вакансий.
+
+    Args:
+        bot: Экземпляр бота для отправки подборок.
+        async_session_maker: Фабрика сессий для работы с БД.
+        hh_client: Общий клиент hh.ru. Если не передан, на время рассылки
+            создается собственный клиент, общий для всех пользователей.
+        workers: Сколько пользователей обрабатывать одновременно.
+        shard: Номер части пользователей, которую обрабатывает этот запуск.
+        shards: Сколько всего частей (1 - все пользователи за один запуск).
+        run_date: День рассылки; по умолчанию - сегодня. Если запуск за этот день
+            уже начинался, обрабатываются только оставшиеся пользователи.
     """
-    logger.info("Запуск ежедневной рассылки вакансий.")
-    
+    if shards > 1:
+        logger.info(f"Запуск ежедневной рассылки вакансий (часть {shard + 1}/{shards}).")
+    else:
+        logger.info("Запуск ежедневной рассылки вакансий.")
+
     try:
-        # 1. Получаем пользователей и их фильтры в ОДНОЙ сессии
+        # 1. Получаем пользователей и их фильтры в ОДНОЙ сессии (только чтение - можно с реплики)
         users_data: List[Tuple[User, SearchFilter]] = []
-        async with async_session_maker() as session:
+        async with read_only_session(async_session_maker) as session:
             # Используем join, чтобы сразу получить и пользователя, и его фильтры
             stmt = select(User, SearchFilter).join(SearchFilter).where(SearchFilter.user_id == User.id)
+            if shards > 1:
+                # Часть определяется по ID пользователя: состав частей стабилен между днями
+                stmt = stmt.where(User.id % shards == shard)
             result = await session.execute(stmt)
             # Pylance ругается на тип, но в runtime это работает корректно.
             # Row[User, SearchFilter] при итерации распаковывается в (User, SearchFilter).
@@ -44,56 +187,98 @@ async def daily_digest_job(
             logger.info("Нет пользователей с настроенными фильтрами. Рассылка не требуется.")
             return
 
-        logger.info(f"Найдено {len(users_data)} пользователей для рассылки.")
+        # Контрольная точка: новый запуск или продолжение прерванного
+        run_date = run_date or digest_today()
+        run = await start_digest_run(
+            async_session_maker, run_date, shard, shards, (user.id for user, _ in users_data) # type: ignore
+        )
+        if run is None:
+            return
+        run_id, pending_user_ids = run
+        users_data = [(user, sf) for user, sf in users_data if user.id in pending_user_ids]
+        checkpoint = DigestCheckpoint(async_session_maker, run_id)
+
+        workers = max(1, min(workers, len(users_data) or 1))
+        logger.info(f"Найдено {len(users_data)} пользователей для рассылки. Воркеров: {workers}.")
 
-        # 2. Проходим по собранным данным, создавая НОВУЮ сессию для каждого пользователя
+        # Все пользователи рассылки работают через один пул соединений к hh.ru
+        own_client = hh_client is None
+        client = hh_client or HHApiClient()
+        limits = DigestStageLimits()
+        # Одинаковые запросы разных пользователей выполняются и сверяются с БД один раз за рассылку.
+        # Группы загружаются параллельно (до DIGEST_HH_CONCURRENCY), страницы группы - по одной,
+        # так что одновременных запросов к hh.ru не больше DIGEST_HH_CONCURRENCY
+        planner = DigestPlanner(
+            partial(iter_vacancy_pages, client=client, concurrency=1),
+            async_session_maker,
+            users_data,
+            hh_limit=limits.hh,
+            db_limit=limits.db,
+        )
+
+        # 2. Очередь пользователей, которую разбирает пул воркеров;
+        # каждый пользователь обрабатывается в своей сессии
+        queue: "asyncio.Queue[Tuple[User, SearchFilter]]" = asyncio.Queue()
         for user, search_filters in users_data:
-            async with async_session_maker() as user_session:
+            queue.put_nowait((user, search_filters))
+
+        async def worker() -> None:
+            while True:
                 try:
-                    logger.info(f"Обработка пользователя {user.full_name} (ID: {user.telegram_id})")
-                    
-                    # 1. Подготовка фильтров для HH, используя уже загруженный объект
-                    filters_dict = prepare_hh_filters(search_filters)
-                    if search_filters.city and not filters_dict.get('city_id'): # type: ignore
-                         logger.warning(f"Город '{search_filters.city}' не найден в CITY_MAP для пользователя {user.telegram_id}.") # type: ignore
-
-                    # 2. Получение вакансий из hh.ru
-                    raw_vacancies = await fetch_vacancies(filters_dict)
-                    
-                    if not raw_vacancies:
-                        logger.info(f"Для пользователя {user.telegram_id} не найдено вакансий.") # type: ignore
-                        continue
-
-                    # 3. Поиск и обработка новых вакансий
-                    new_vacancies = await find_and_process_new_vacancies(
-                        user_session, user.id, raw_vacancies # type: ignore
-                    )
-
-                    # 4. Отправка подборки пользователю
-                    if new_vacancies:
-                        vacancies_to_send = new_vacancies[:DIGEST_VACANCY_LIMIT]
-                        digest_text = format_digest_message(vacancies_to_send)
-                        
-                        # СНАЧАЛА отправляем сообщение
-                        await bot.send_message(
-                            chat_id=int(user.telegram_id), # type: ignore
-                            text=digest_text, 
-                            parse_mode="Markdown",
-                            disable_web_page_preview=True
-                        )
-                        logger.info(f"Отправлена подборка из {len(vacancies_to_send)} вакансий пользователю {user.telegram_id}") # type: ignore
-                        
-                        # ТОЛЬКО ПОСЛЕ УСПЕШНОЙ ОТПРАВКИ помечаем вакансии как отправленные
-                        all_new_vacancy_objects = [v for v, _ in new_vacancies]
-                        await mark_vacancies_as_sent(user_session, user.id, all_new_vacancy_objects) # type: ignore
-                        
-                        # И коммитим изменения
-                        await user_session.commit()
+                    user, search_filters = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    processed = await _process_user(bot, async_session_maker, planner, limits, user, search_filters)
                 except Exception as e:
-                    logger.error(f"Не удалось обработать пользователя {user.telegram_id}: {e}", exc_info=True) # type: ignore
-                    await user_session.rollback()
+                    # Например, не удалось открыть сессию: воркер продолжает со следующим пользователем
+                    logger.error(f"Сбой при обработке пользователя {user.telegram_id}: {e}", exc_info=True) # type: ignore
+                    processed = False
+                await checkpoint.mark(
+                    user.id, # type: ignore
+                    DigestRunItemStatusEnum.FAILED if processed is False else DigestRunItemStatusEnum.DONE,
+                )
+
+        try:
+            # Сообщения рассылки уступают очередь ответам на действия пользователей
+            with send_priority(MessagePriority.BULK):
+                await asyncio.gather(*(worker() for _ in range(workers)))
+        finally:
+            await planner.close()
+            if own_client:
+                await client.close()
 
+        await checkpoint.finish()
+        await prune_digest_runs(async_session_maker, before=run_date - timedelta(days=DIGEST_RUNS_KEEP_DAYS))
         logger.info("Ежедневная рассылка завершена.")
+        # Накопительные метрики пула: по ожиданию соединений видно, упирается ли рассылка в пул
+        pool_stats = get_engine_pool_metrics(async_session_maker.kw.get("bind"))
+        if pool_stats:
+            logger.info(f"Пул соединений БД: {pool_stats}")
 
     except Exception as e:
-        logger.critical(f"Критическая ошибка в процессе ежедневной рассылки: {e}", exc_info=True)
\ No newline at end of file
+        logger.critical(f"Критическая ошибка в процессе ежедневной рассылки: {e}", exc_info=True)
+
+
+async def resume_unfinished_digests(
+    bot: Bot,
+    async_session_maker: async_sessionmaker[AsyncSession],
+    hh_client: Optional[HHApiClient] = None,
+):
+    """
+    Продолжает сегодняшние запуски рассылки, прерванные перезапуском процесса
+    или завершившиеся с ошибками у части пользователей (их обработка
+    повторяется, см. `runs.py`). Вызывается один раз при старте бота.
+    """
+    try:
+        runs = await find_unfinished_runs(async_session_maker, since=digest_today())
+    except Exception as e:
+        logger.error(f"Не удалось проверить прерванные рассылки: {e}", exc_info=True)
+        return
+
+    for run in runs:
+        logger.info(f"Найдена прерванная рассылка за {run.run_date} (часть {run.shard + 1}/{run.shards}), продолжаю.")
+        await daily_digest_job(
+            bot, async_session_maker, hh_client,
+            shard=run.shard, shards=run.shards, run_date=run.run_date, # type: ignore
+        )
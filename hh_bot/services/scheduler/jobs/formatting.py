@@ -1,43 +1,44 @@
 """Утилиты для форматирования текста сообщений."""
 
-from typing import Dict, List, Tuple, Any, Optional # ИСПРАВЛЕНО: добавлен Optional
+from typing import List, Tuple, Optional # ИСПРАВЛЕНО: добавлен Optional
 
 # ИСПРАВЛЕНО: количество точек в импорте
 from ....db.models import Vacancy
+from ...vacancy_record import SalaryRange, VacancyRecord
 
-def format_salary(salary_obj: Optional[Dict[str, Any]]) -> str:
+def format_salary(salary_obj: Optional[SalaryRange]) -> str:
     """
-    Форматирует объект зарплаты от hh.ru в читаемую строку.
+    Форматирует зарплату вакансии hh.ru в читаемую строку.
     
     - None -> "Не указана" (данных о зарплате нет вообще)
-    - {} -> "По договорённости" (данные есть, но пустые)
+    - SalaryRange() -> "По договорённости" (данные есть, но пустые)
     """
-    # ИСПРАВЛЕНИЕ: Проверяем именно на None, чтобы пустой словарь {} обрабатывался как "По договорённости"
+    # ИСПРАВЛЕНИЕ: Проверяем именно на None, чтобы пустая вилка обрабатывалась как "По договорённости"
     if salary_obj is None:
         return "Не указана"
     
     parts = []
-    if salary_obj.get('from'):
-        parts.append(f"от {salary_obj['from']}")
-    if salary_obj.get('to'):
-        parts.append(f"до {salary_obj['to']}")
+    if salary_obj.salary_from:
+        parts.append(f"от {salary_obj.salary_from}")
+    if salary_obj.salary_to:
+        parts.append(f"до {salary_obj.salary_to}")
     
     if not parts:
-        # Эта ветка сработает для {} или для словаря без 'from'/'to'
+        # Эта ветка сработает для вилки без 'from'/'to'
         return "По договорённости"
         
-    currency = salary_obj.get('currency', '')
+    currency = salary_obj.currency
     if currency:
         parts.append(currency.upper())
         
     return " ".join(parts)
 
-def format_digest_message(new_vacancies: List[Tuple[Vacancy, Dict[str, Any]]]) -> str:
+def format_digest_message(new_vacancies: List[Tuple[Vacancy, VacancyRecord]]) -> str:
     """
     Форматирует полный текст дайджеста для пользователя.
     
     Args:
-        new_vacancies: Список кортежей (объект Vacancy, сырые данные с hh.ru).
+        new_vacancies: Список кортежей (объект Vacancy, разобранная вакансия hh.ru).
     
     Returns:
         Готовый текст для отправки.
@@ -47,8 +48,8 @@ def format_digest_message(new_vacancies: List[Tuple[Vacancy, Dict[str, Any]]]) -
 
     digest_text = f"🔔 *Новые вакансии для вас ({len(new_vacancies)} шт.)*\n\n"
     
-    for i, (vac, vac_data) in enumerate(new_vacancies):
-        salary_text = format_salary(vac_data.get('salary'))
+    for i, (vac, record) in enumerate(new_vacancies):
+        salary_text = format_salary(record.salary)
 
         digest_text += (
             f"{i+1}. *{vac.title}*\n"
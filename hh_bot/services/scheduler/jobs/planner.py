@@ -0,0 +1,149 @@
+"""
+Планировщик рассылки по группам запросов.
+
+Многие пользователи ищут одно и то же (одна должность, город и зарплата).
+Пользователи группируются по нормализованному запросу к hh.ru; для каждой
+группы один раз загружаются вакансии, один раз сохраняются в БД и одним
+SQL-запросом (anti-join с user_vacancy_status) определяется, какие из них
+еще не отправлены каждому пользователю группы. Нагрузка на hh.ru и БД
+растет с числом разных запросов, а не с числом пользователей.
+
+Группа обрабатывается при первом обращении любого ее пользователя;
+остальные пользователи группы получают уже готовый результат.
+"""
+import asyncio
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ....db.models import User, SearchFilter, Vacancy
+from ....utils.logger import logger
+from ...hh_client import canonical_query_key
+from ...hh_service import build_search_params
+from ...vacancy_record import VacancyRecord
+from .processing import prepare_hh_filters
+from .storage import find_unsent_pairs, get_or_create_vacancies
+
+# Функция, которая по фильтрам отдает страницы вакансий (например, iter_vacancy_pages)
+PageFetcher = Callable[[dict], AsyncIterator[List[VacancyRecord]]]
+NewVacancies = List[Tuple[Vacancy, VacancyRecord]]
+
+
+class QueryGroup:
+    """Пользователи с одинаковым запросом к hh.ru."""
+
+    def __init__(self, filters: dict):
+        self.filters = filters
+        self.user_ids: List[int] = []
+        self.task: Optional[asyncio.Task] = None
+
+
+class DigestPlanner:
+    """
+    Группирует пользователей рассылки по запросам и готовит для каждого
+    список новых вакансий. Живет в пределах одного запуска рассылки.
+    """
+
+    def __init__(
+        self,
+        fetch_pages: PageFetcher,
+        async_session_maker: async_sessionmaker[AsyncSession],
+        users_data: Iterable[Tuple[User, SearchFilter]],
+        hh_limit: Optional[asyncio.Semaphore] = None,
+        db_limit: Optional[asyncio.Semaphore] = None,
+    ):
+        self._fetch_pages = fetch_pages
+        self._async_session_maker = async_session_maker
+        self._hh_limit = hh_limit or asyncio.Semaphore(1)
+        self._db_limit = db_limit or asyncio.Semaphore(1)
+        self._groups: Dict[str, QueryGroup] = {}
+        self._user_groups: Dict[int, QueryGroup] = {}
+
+        for user, search_filters in users_data:
+            # У пользователя один фильтр (User.search_filters, uselist=False), но
+            # уникальности search_filters.user_id в БД нет. Если строк несколько,
+            # рассылка идет по первой, а не по той, что окажется последней
+            if user.id in self._user_groups:
+                logger.warning(
+                    f"У пользователя {user.id} несколько фильтров поиска; "
+                    f"используется первый, фильтр {search_filters.id} пропущен"
+                )
+                continue
+            filters = prepare_hh_filters(search_filters)
+            key = canonical_query_key(build_search_params(filters))
+            group = self._groups.get(key)
+            if group is None:
+                group = self._groups[key] = QueryGroup(filters)
+            group.user_ids.append(user.id) # type: ignore
+            self._user_groups[user.id] = group # type: ignore
+
+    @property
+    def group_count(self) -> int:
+        """Количество разных запросов к hh.ru."""
+        return len(self._groups)
+
+    async def new_vacancies_for(self, user_id: int) -> NewVacancies:
+        """
+        Новые (еще не отправленные) вакансии пользователя в порядке выдачи hh.ru.
+        Ошибки загрузки группы (например, HHThrottledError) пробрасываются
+        каждому ее пользователю.
+        """
+        group = self._user_groups[user_id]
+        if group.task is None:
+            group.task = asyncio.create_task(self._resolve(group))
+        # shield: отмена одного пользователя не отменяет обработку всей группы
+        per_user = await asyncio.shield(group.task)
+        return per_user.get(user_id, [])
+
+    async def _resolve(self, group: QueryGroup) -> Dict[int, NewVacancies]:
+        # 1. Один запрос к hh.ru на группу. Слот hh_limit занят на всю загрузку,
+        # включая запросы следующих страниц внутри загрузчика
+        records: Dict[str, VacancyRecord] = {}
+        async with self._hh_limit:
+            pages = self._fetch_pages(group.filters)
+            try:
+                async for page_items in pages:
+                    for record in page_items:
+                        records.setdefault(record.id, record)
+            finally:
+                await pages.aclose()
+
+        if not records:
+            return {}
+
+        # 2. Сохранение вакансий и anti-join по всем пользователям группы
+        async with self._db_limit:
+            async with self._async_session_maker() as session:
+                vacancies = await get_or_create_vacancies(session, list(records.values()))
+                unsent = await find_unsent_pairs(
+                    session, group.user_ids, (vac.id for vac in vacancies.values()) # type: ignore
+                )
+                # Вакансии используются после закрытия сессии - отвязываем их
+                session.expunge_all()
+                await session.commit()
+
+        per_user: Dict[int, NewVacancies] = {}
+        for user_id in group.user_ids:
+            new_vacancies = [
+                (vacancies[hh_id], record)
+                for hh_id, record in records.items()
+                if (user_id, vacancies[hh_id].id) in unsent
+            ]
+            if new_vacancies:
+                per_user[user_id] = new_vacancies
+        return per_user
+
+    async def close(self) -> None:
+        """Отменяет незавершенную обработку групп и пишет статистику в лог."""
+        tasks = [g.task for g in self._groups.values() if g.task and not g.task.done()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        # Забираем ошибки завершенных задач, чтобы asyncio не ругался на "never retrieved"
+        for group in self._groups.values():
+            if group.task and group.task.done() and not group.task.cancelled():
+                group.task.exception()
+        logger.info(
+            f"Рассылка: {len(self._user_groups)} пользователей, {self.group_count} уникальных запросов к hh.ru."
+        )
@@ -3,19 +3,16 @@
 from typing import Dict, Any
 
 from ....db.models import SearchFilter
-from .constants import CITY_MAP
+from ...hh_areas import get_area_index
 
 def prepare_hh_filters(search_filters: SearchFilter) -> Dict[str, Any]:
     """
     Подготавливает словарь фильтров для запроса к API hh.ru
     на основе настроек пользователя.
     """
-    city_id = None
-    # ИСПРАВЛЕНО: Добавлен комментарий для Pylance
-    if search_filters.city:  # type: ignore
-        city_name = search_filters.city.lower() # type: ignore
-        city_id = CITY_MAP.get(city_name)
-        # Если город не найден, city_id будет None, что корректно обработает hh_service
+    # Название города ищется в справочнике регионов hh.ru.
+    # Если город не найден, city_id будет None, что корректно обработает hh_service
+    city_id = get_area_index().resolve(search_filters.city)  # type: ignore
     
     return {
         'position': search_filters.position,
@@ -0,0 +1,212 @@
+"""
+Контрольные точки ежедневной рассылки.
+
+Каждый запуск рассылки (каждая ее часть) за день записывается в `digest_runs`,
+а по каждому пользователю - строка в `digest_run_items`. После обработки
+пользователя строка отмечается, поэтому если процесс перезапустится посреди
+рассылки, новый процесс продолжит тот же запуск и обработает только
+оставшихся пользователей.
+
+Пользователи, обработка которых упала (FAILED, например из-за временного сбоя
+hh.ru или Telegram), тоже обрабатываются повторно при продолжении запуска -
+не больше DIGEST_MAX_ATTEMPTS попыток за день. Пока такие пользователи есть,
+запуск остается незавершенным (RUNNING).
+
+Доставка - "хотя бы один раз": вакансии помечаются отправленными только после
+успешной отправки, поэтому если процесс остановится между отправкой подборки
+и коммитом отметок, при продолжении запуска та же подборка уйдет повторно.
+"""
+import asyncio
+from datetime import date, datetime, timezone
+from typing import Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ....db.models import DigestRun, DigestRunItem
+from ....enums import DigestRunStatusEnum, DigestRunItemStatusEnum
+from ....utils.logger import logger
+from .constants import DIGEST_MAX_ATTEMPTS
+
+
+async def start_digest_run(
+    async_session_maker: async_sessionmaker[AsyncSession],
+    run_date: date,
+    shard: int,
+    shards: int,
+    user_ids: Iterable[int],
+    max_attempts: int = DIGEST_MAX_ATTEMPTS,
+) -> Optional[Tuple[int, Set[int]]]:
+    """
+    Начинает запуск рассылки за `run_date` или продолжает уже начатый.
+    При продолжении в работу берутся необработанные пользователи и те,
+    чья обработка упала меньше `max_attempts` раз.
+
+    Returns:
+        (ID запуска, ID пользователей, которых еще нужно обработать) или None,
+        если запуск за этот день уже завершен.
+    """
+    user_ids = list(user_ids)
+    async with async_session_maker() as session:
+        run = await session.scalar(
+            select(DigestRun).where(
+                DigestRun.run_date == run_date,
+                DigestRun.shard == shard,
+                DigestRun.shards == shards,
+            )
+        )
+        if run is None:
+            run = DigestRun(run_date=run_date, shard=shard, shards=shards, status=DigestRunStatusEnum.RUNNING)
+            session.add(run)
+            try:
+                await session.flush()
+            except IntegrityError:
+                # Тот же запуск одновременно начал другой процесс
+                await session.rollback()
+                logger.warning(f"Запуск рассылки за {run_date} (часть {shard + 1}/{shards}) уже начат другим процессом")
+                return None
+            run_id = run.id
+            if user_ids:
+                await session.execute(
+                    insert(DigestRunItem),
+                    [{"run_id": run_id, "user_id": user_id, "status": DigestRunItemStatusEnum.PENDING} for user_id in user_ids],
+                )
+            await session.commit()
+            return run_id, set(user_ids)
+
+        if run.status != DigestRunStatusEnum.RUNNING:
+            logger.info(f"Рассылка за {run_date} (часть {shard + 1}/{shards}) уже выполнена, повторный запуск пропущен")
+            return None
+
+        pending = await session.scalars(
+            select(DigestRunItem.user_id).where(
+                DigestRunItem.run_id == run.id,
+                _pending_or_retryable(max_attempts),
+            )
+        )
+        pending_ids = set(pending.all())
+        logger.info(f"Продолжение прерванной рассылки за {run_date}: осталось {len(pending_ids)} пользователей")
+        return run.id, pending_ids
+
+
+def _pending_or_retryable(max_attempts: int):
+    """Условие: пользователь еще не обработан или его обработку можно повторить."""
+    return or_(
+        DigestRunItem.status == DigestRunItemStatusEnum.PENDING,
+        and_(
+            DigestRunItem.status == DigestRunItemStatusEnum.FAILED,
+            DigestRunItem.attempts < max_attempts,
+        ),
+    )
+
+
+class DigestCheckpoint:
+    """
+    Отмечает обработанных пользователей запуска.
+
+    Отметки пишутся короткими транзакциями в отдельной сессии и по одной:
+    так они не зависят от сессии пользователя (которая может откатиться)
+    и не конкурируют друг с другом за соединение.
+    """
+
+    def __init__(
+        self,
+        async_session_maker: async_sessionmaker[AsyncSession],
+        run_id: int,
+        max_attempts: int = DIGEST_MAX_ATTEMPTS,
+    ):
+        self.async_session_maker = async_session_maker
+        self.run_id = run_id
+        self.max_attempts = max_attempts
+        self._lock = asyncio.Lock()
+
+    async def mark(self, user_id: int, status: DigestRunItemStatusEnum) -> None:
+        """Записывает результат обработки пользователя."""
+        async with self._lock:
+            try:
+                async with self.async_session_maker() as session:
+                    await session.execute(
+                        update(DigestRunItem)
+                        .where(DigestRunItem.run_id == self.run_id, DigestRunItem.user_id == user_id)
+                        .values(
+                            status=status,
+                            processed_at=datetime.now(timezone.utc),
+                            attempts=DigestRunItem.attempts + 1,
+                        )
+                    )
+                    await session.commit()
+            except Exception as e:
+                # Потеря отметки означает лишь повторную обработку пользователя при возобновлении
+                logger.error(f"Не удалось сохранить прогресс рассылки для пользователя {user_id}: {e}")
+
+    async def finish(self) -> bool:
+        """
+        Отмечает запуск завершенным, если повторять больше некого.
+
+        Returns:
+            False - остались пользователи для повтора; запуск остается RUNNING
+            и будет продолжен (см. `resume_unfinished_digests`).
+        """
+        async with self._lock:
+            async with self.async_session_maker() as session:
+                retryable = await session.scalar(
+                    select(func.count()).select_from(DigestRunItem).where(
+                        DigestRunItem.run_id == self.run_id,
+                        _pending_or_retryable(self.max_attempts),
+                    )
+                )
+                if retryable:
+                    logger.warning(
+                        f"Рассылка: {retryable} пользователей не обработаны, "
+                        f"они будут обработаны повторно при продолжении запуска"
+                    )
+                    return False
+                await session.execute(
+                    update(DigestRun)
+                    .where(DigestRun.id == self.run_id)
+                    .values(status=DigestRunStatusEnum.COMPLETED, finished_at=datetime.now(timezone.utc))
+                )
+                await session.commit()
+                return True
+
+
+async def find_unfinished_runs(
+    async_session_maker: async_sessionmaker[AsyncSession],
+    since: date,
+) -> List[DigestRun]:
+    """
+    Возвращает прерванные запуски начиная с `since`.
+    Более старые прерванные запуски помечаются как ABANDONED: продолжать
+    вчерашнюю рассылку бессмысленно, ее заменит сегодняшняя.
+    """
+    async with async_session_maker() as session:
+        await session.execute(
+            update(DigestRun)
+            .where(DigestRun.status == DigestRunStatusEnum.RUNNING, DigestRun.run_date < since)
+            .values(status=DigestRunStatusEnum.ABANDONED, finished_at=datetime.now(timezone.utc))
+        )
+        result = await session.scalars(
+            select(DigestRun)
+            .where(DigestRun.status == DigestRunStatusEnum.RUNNING, DigestRun.run_date >= since)
+            .order_by(DigestRun.run_date, DigestRun.shard)
+        )
+        runs = list(result.all())
+        # Отвязываем от сессии, чтобы commit не сбросил загруженные атрибуты
+        for run in runs:
+            session.expunge(run)
+        await session.commit()
+        return runs
+
+
+async def prune_digest_runs(
+    async_session_maker: async_sessionmaker[AsyncSession],
+    before: date,
+) -> None:
+    """Удаляет записи о запусках старше `before` (отметки пользователей удаляются вместе с ними)."""
+    async with async_session_maker() as session:
+        old_runs = select(DigestRun.id).where(DigestRun.run_date < before).scalar_subquery()
+        # Явно, чтобы не зависеть от поддержки ON DELETE CASCADE (в SQLite она выключена по умолчанию)
+        await session.execute(delete(DigestRunItem).where(DigestRunItem.run_id.in_(old_runs)))
+        await session.execute(delete(DigestRun).where(DigestRun.run_date < before))
+        await session.commit()
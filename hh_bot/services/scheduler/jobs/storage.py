@@ -1,29 +1,30 @@
 """Операции с базой данных (хранилищем) для фоновых задач."""
 
 import logging
-from datetime import datetime, timezone
-from typing import List, Tuple, Any, Dict, Optional
+from typing import Dict, Iterable, List, Set, Tuple, Optional
 
-from sqlalchemy import select
+from sqlalchemy import select, true
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 # ИСПРАВЛЕНО: количество точек в импорте
 from ....db.models import User, Vacancy, UserVacancyStatus, UserVacancyStatusEnum
+from ....db.repositories import add_vacancy_statuses, upsert_vacancies
 # ИСПРАВЛЕНО: количество точек в импорте
 from ....utils.logger import logger
+from ...vacancy_record import SalaryRange, VacancyRecord
 
 
-def _format_salary_for_db(salary_data: Optional[dict]) -> Optional[str]:
+def _format_salary_for_db(salary: Optional[SalaryRange]) -> Optional[str]:
     """
     Вспомогательная функция для форматирования зарплаты в строку для хранения в БД.
     Это предотвращает потерю информации (например, о верхней границе зарплаты).
     """
-    if not salary_data or not isinstance(salary_data, dict):
+    if salary is None:
         return None
 
-    salary_from = salary_data.get('from')
-    salary_to = salary_data.get('to')
-    currency = salary_data.get('currency', '')
+    salary_from = salary.salary_from
+    salary_to = salary.salary_to
+    currency = salary.currency or ''
 
     # Формируем строку в зависимости от доступных данных
     if salary_from and salary_to:
@@ -52,79 +53,67 @@ async def get_users_with_filters(async_session_maker: async_sessionmaker[AsyncSe
         return list(result.scalars().all())
 
 
-async def find_and_process_new_vacancies(
-    user_session: AsyncSession,
-    user_id: int,
-    raw_vacancies: List[Dict[str, Any]]
-) -> List[Tuple[Vacancy, Dict[str, Any]]]:
+def _vacancy_row(record: VacancyRecord) -> dict:
+    """Значения колонок `Vacancy` для вакансии из выдачи hh.ru."""
+    return {
+        "hh_id": record.id,
+        "title": record.name,
+        "company": record.employer,
+        # ИСПРАВЛЕНИЕ: Используем вспомогательную функцию для корректного форматирования зарплаты.
+        # Это сохраняет больше информации (верхнюю границу, валюту).
+        "salary": _format_salary_for_db(record.salary),
+        "link": record.url,
+        "apply_url": record.apply_url,
+        "description_snippet": record.responsibility,
+        # Дата уже в UTC; колонка в БД без таймзоны
+        "published_at": record.published_at_utc_naive,
+    }
+
+
+async def get_or_create_vacancies(
+    session: AsyncSession,
+    records: List[VacancyRecord],
+) -> Dict[str, Vacancy]:
     """
-    Находит новые вакансии для пользователя, которых ему еще не отправляли.
-    Создает новые записи вакансий в БД.
+    Возвращает вакансии из БД по hh_id, создавая недостающие.
+    Вся пачка сохраняется одним INSERT ... ON CONFLICT, поэтому параллельные
+    воркеры, сохраняющие одну и ту же вакансию, не мешают друг другу.
     """
-    if not raw_vacancies:
-        return []
+    return await upsert_vacancies(session, (_vacancy_row(record) for record in records))
 
-    hh_ids_to_process = {v['id'] for v in raw_vacancies}
 
-    # 1. Найти все существующие вакансии из списка
-    existing_vacancies_result = await user_session.execute(
-        select(Vacancy).where(Vacancy.hh_id.in_(hh_ids_to_process))
-    )
-    existing_vacancies_map = {v.hh_id: v for v in existing_vacancies_result.scalars().all()}
-
-    # 2. Найти ID вакансий, уже отправленных пользователю
-    sent_vacancies_result = await user_session.execute(
-        select(UserVacancyStatus.vacancy_id).where(
-            UserVacancyStatus.user_id == user_id,
-            UserVacancyStatus.vacancy_id.in_(
-                select(Vacancy.id).where(Vacancy.hh_id.in_(hh_ids_to_process))
-            )
+async def find_unsent_pairs(
+    session: AsyncSession,
+    user_ids: Iterable[int],
+    vacancy_ids: Iterable[int],
+) -> Set[Tuple[int, int]]:
+    """
+    Одним запросом находит пары (user_id, vacancy_id), которых нет
+    в user_vacancy_status, т.е. вакансии, еще не отправленные пользователям.
+
+    Это anti-join множества пользователей группы с множеством вакансий
+    их общего запроса: SQL-запрос один на группу, а не на каждого пользователя.
+    """
+    user_ids = list(user_ids)
+    vacancy_ids = list(vacancy_ids)
+    if not user_ids or not vacancy_ids:
+        return set()
+
+    already_sent = (
+        select(UserVacancyStatus.id)
+        .where(
+            UserVacancyStatus.user_id == User.id,
+            UserVacancyStatus.vacancy_id == Vacancy.id,
         )
+        .exists()
+    )
+    result = await session.execute(
+        select(User.id, Vacancy.id)
+        .select_from(User)
+        .join(Vacancy, true())
+        .where(User.id.in_(user_ids), Vacancy.id.in_(vacancy_ids), ~already_sent)
     )
-    sent_vacancy_ids = {row[0] for row in sent_vacancies_result.all()}
-
-    new_vacancies_for_user: List[Tuple[Vacancy, Dict[str, Any]]] = []
-
-    for vac_data in raw_vacancies:
-        vacancy_obj = existing_vacancies_map.get(vac_data['id'])
-
-        if not vacancy_obj:
-            # Создаем новую вакансию, если ее нет в БД
-            
-            # ИСПРАВЛЕНИЕ: Добавлен блок try-except для надежности парсинга даты.
-            # Если API вернет некорректный формат, задача не упадет.
-            published_at_dt = None
-            try:
-                published_at_str = vac_data.get('published_at')
-                if published_at_str:
-                    # Преобразуем в UTC и сохраняем как "наивное" время, 
-                    # т.к. колонка в БД без таймзоны.
-                    dt_with_tz = datetime.fromisoformat(published_at_str)
-                    published_at_dt = dt_with_tz.astimezone(timezone.utc).replace(tzinfo=None)
-            except (ValueError, TypeError) as e:
-                logger.warning(f"Не удалось распарсить дату для вакансии {vac_data.get('id')}: {e}")
-
-            # ИСПРАВЛЕНИЕ: Используем вспомогательную функцию для корректного форматирования зарплаты.
-            # Это сохраняет больше информации (верхнюю границу, валюту).
-            salary_str = _format_salary_for_db(vac_data.get('salary'))
-
-            vacancy_obj = Vacancy(
-                hh_id=vac_data['id'],
-                title=vac_data.get('name'),
-                company=vac_data.get('employer', {}).get('name'),
-                salary=salary_str, # Используем отформатированную строку
-                link=vac_data.get('alternate_url'),
-                description_snippet=vac_data.get('snippet', {}).get('responsibility', ''),
-                published_at=published_at_dt,
-            )
-            user_session.add(vacancy_obj)
-            await user_session.flush() # Получаем ID для новой вакансии
-
-        # Проверяем, отправляли ли мы эту вакансию пользователю
-        if vacancy_obj.id not in sent_vacancy_ids:
-            new_vacancies_for_user.append((vacancy_obj, vac_data))
-            
-    return new_vacancies_for_user
+    return {(user_id, vacancy_id) for user_id, vacancy_id in result.all()}
 
 
 async def mark_vacancies_as_sent(
@@ -134,15 +123,11 @@ async def mark_vacancies_as_sent(
 ):
     """
     Помечает список вакансий как отправленные для пользователя.
-    
-    ПРИМЕЧАНИЕ: Для большого количества вакансий (сотни) было бы эффективнее
-    использовать `session.bulk_insert_mappings`, но для типичной подборки (5-10 шт.)
-    этот подход прост и достаточно быстр.
+
+    Все статусы вставляются одним запросом; уже существующие пропускаются,
+    поэтому повторная пометка безопасна.
     """
-    for vac in vacancies_to_mark:
-        user_session.add(UserVacancyStatus(
-            user_id=user_id,
-            vacancy_id=vac.id,
-            status=UserVacancyStatusEnum.SENT
-        ))
-    # Commit/rollback должен обрабатываться вызывающим кодом
\ No newline at end of file
+    await add_vacancy_statuses(
+        user_session, user_id, (vac.id for vac in vacancies_to_mark), UserVacancyStatusEnum.SENT # type: ignore
+    )
+    # Commit/rollback должен обрабатываться вызывающим кодом
@@ -2,21 +2,52 @@
 Модуль для управления жизненным циклом планировщика APScheduler.
 """
 import logging
+from typing import List, Optional, Tuple
+
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from aiogram import Bot
 
 from hh_bot.utils.logger import logger
-from .jobs import daily_digest_job
+from hh_bot.services.hh_client import HHApiClient
+from .jobs import daily_digest_job, resume_unfinished_digests
+from .jobs.constants import (
+    DIGEST_SHARDS,
+    DIGEST_START_TIME,
+    DIGEST_SHARD_INTERVAL_MINUTES,
+    DIGEST_TIMEZONE,
+)
 
 # Создаем экземпляр планировщика на уровне модуля
 scheduler = AsyncIOScheduler()
 
 
+def digest_shard_times(
+    shards: int = DIGEST_SHARDS,
+    start_time: str = DIGEST_START_TIME,
+    interval_minutes: int = DIGEST_SHARD_INTERVAL_MINUTES,
+) -> List[Tuple[int, int]]:
+    """
+    Время запуска (час, минута) каждой части рассылки.
+
+    Части идут друг за другом с шагом `interval_minutes`, начиная с `start_time`
+    ("ЧЧ:ММ"); окно, выходящее за полночь, продолжается со следующих суток.
+    """
+    hour, minute = (int(part) for part in start_time.split(":"))
+    start = hour * 60 + minute
+    times = []
+    for shard in range(max(1, shards)):
+        offset = (start + shard * interval_minutes) % (24 * 60)
+        times.append(divmod(offset, 60))
+    return times
+
+
 def setup_scheduler(
     bot: Bot,
-    async_session_maker: async_sessionmaker[AsyncSession]
+    async_session_maker: async_sessionmaker[AsyncSession],
+    hh_client: Optional[HHApiClient] = None,
+    shards: int = DIGEST_SHARDS,
 ):
     """
     Инициализация и запуск планировщика задач.
@@ -24,18 +55,58 @@ def setup_scheduler(
     Args:
         bot: Экземпляр бота aiogram, который будет передан в задачи.
         async_session_maker: Фабрика сессий для работы с БД.
+        hh_client: Общий клиент hh.ru, чтобы рассылка переиспользовала пул соединений.
+        shards: На сколько частей (отдельных задач) разбить рассылку.
+    """
+    times = digest_shard_times(shards)
+    for shard, (hour, minute) in enumerate(times):
+        # Единственная часть сохраняет прежние id и название задачи
+        single = len(times) == 1
+        scheduler.add_job(
+            daily_digest_job,
+            trigger=CronTrigger(hour=hour, minute=minute, timezone=DIGEST_TIMEZONE),
+            # Передаем зависимости в функцию daily_digest_job через kwargs
+            kwargs={
+                "bot": bot,
+                "async_session_maker": async_session_maker,
+                "hh_client": hh_client,
+                "shard": shard,
+                "shards": len(times),
+            }, # type: ignore
+            id="daily_digest_job" if single else f"daily_digest_job_{shard}",
+            name="Ежедневная рассылка вакансий" if single else f"Ежедневная рассылка вакансий ({shard + 1}/{len(times)})",
+            replace_existing=True
+        )
+    scheduler.start()
+
+    hour, minute = times[0]
+    timezone_label = "МСК" if DIGEST_TIMEZONE == "Europe/Moscow" else DIGEST_TIMEZONE
+    if len(times) == 1:
+        logger.info(f"Планировщик задач запущен. Ежедневная рассылка назначена на {hour}:{minute:02d} по {timezone_label}.")
+    else:
+        last_hour, last_minute = times[-1]
+        logger.info(
+            f"Планировщик задач запущен. Ежедневная рассылка разбита на {len(times)} частей "
+            f"с {hour}:{minute:02d} до {last_hour}:{last_minute:02d} по {timezone_label}."
+        )
+
+
+def schedule_digest_resume(
+    bot: Bot,
+    async_session_maker: async_sessionmaker[AsyncSession],
+    hh_client: Optional[HHApiClient] = None,
+):
+    """
+    Ставит разовую задачу: продолжить сегодняшнюю рассылку, если она была
+    прервана перезапуском процесса. Вызывается после setup_scheduler.
     """
     scheduler.add_job(
-        daily_digest_job,
-        trigger=CronTrigger(hour=9, minute=0), # Запуск каждый день в 9:00 по МСК
-        # Передаем зависимости в функцию daily_digest_job через kwargs
-        kwargs={"bot": bot, "async_session_maker": async_session_maker}, # type: ignore
-        id="daily_digest_job",
-        name="Ежедневная рассылка вакансий",
+        resume_unfinished_digests,
+        kwargs={"bot": bot, "async_session_maker": async_session_maker, "hh_client": hh_client}, # type: ignore
+        id="digest_resume_job",
+        name="Продолжение прерванной рассылки",
         replace_existing=True
     )
-    scheduler.start()
-    logger.info("Планировщик задач запущен. Ежедневная рассылка назначена на 9:00 по МСК.")
 
 
 def shutdown_scheduler():
@@ -1,13 +1,14 @@
 import urllib.parse
+from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from datetime import datetime, timezone
 
-from ..db.models import Vacancy, UserVacancyStatus, User
+from ..db.models import User
+from ..db.repositories import add_vacancy_statuses, upsert_vacancies
 from ..utils.logger import logger
 from ..enums import UserVacancyStatusEnum
 from ..keyboards.inline_keyboards import get_vacancy_actions_keyboard
-from .hh_service import fetch_vacancies
+from .hh_service import fetch_vacancies, VacancySearchResult
+from .hh_client import HHApiClient
 
 
 async def process_search_results(
@@ -16,6 +17,7 @@ async def process_search_results(
     session: AsyncSession,  # Сессия базы данных
     user: User,  # Объект пользователя из middleware
     filters_dict: dict,  # Словарь с фильтрами для поиска
+    hh_client: Optional[HHApiClient] = None,  # Общий клиент hh.ru из main()
 ):
     """
     Основная функция для обработки поиска вакансий.
@@ -32,7 +34,7 @@ async def process_search_results(
         await message.answer(
             "🔍 Ищу вакансии по вашим параметрам, это может занять время..."
         )
-        raw_vacancies = await fetch_vacancies(filters_dict)
+        raw_vacancies = await fetch_vacancies(filters_dict, client=hh_client)
     except Exception as e:
         logger.error(f"Ошибка при вызове сервиса поиска: {e}")
         # ИСПРАВЛЕНИЕ: Добавлен откат транзакции при ошибке API
@@ -40,6 +42,14 @@ async def process_search_results(
         await message.answer("❌ Произошла ошибка во время поиска. Попробуйте позже.")
         return False
 
+    if isinstance(raw_vacancies, VacancySearchResult) and not raw_vacancies.ok:
+        # Отличаем "hh.ru недоступен" от "ничего не найдено"
+        if raw_vacancies.throttled:
+            await message.answer("⏳ hh.ru временно ограничил количество запросов. Попробуйте через пару минут.")
+        else:
+            await message.answer("❌ Не удалось получить вакансии с hh.ru. Попробуйте позже.")
+        return False
+
     if not raw_vacancies:
         await message.answer(
             "По вашим критериям вакансий не найдено. Попробуйте изменить параметры."
@@ -54,55 +64,34 @@ async def process_search_results(
 
     # ИСПРАВЛЕНИЕ: Добавлен общий try-except для обработки ошибок при работе с БД
     try:
-        # Используем блок no_autoflush для безопасности
-        with session.no_autoflush:
-            for vac_data in raw_vacancies[:10]:  # Ограничиваем вывод 10 вакансиями
-                # Проверяем, есть ли вакансия уже в БД
-                existing_vac = await session.scalar(
-                    select(Vacancy).where(Vacancy.hh_id == vac_data["id"])
-                )
-
-                vac_obj = existing_vac
-                if not existing_vac:
-                    published_at_str = vac_data.get("published_at")
-                    published_at_dt = None
-                    if published_at_str:
-                        dt_with_tz = datetime.fromisoformat(published_at_str)
-                        published_at_dt = dt_with_tz.astimezone(timezone.utc).replace(
-                            tzinfo=None
-                        )
-
-                    salary_value = vac_data.get("salary", {}).get("from")
-                    salary_str = str(salary_value) if salary_value is not None else None
-
-                    # Получаем прямую ссылку на отклик, используем резервный вариант если нет
-                    apply_url = vac_data.get("apply_url", vac_data.get("alternate_url"))
-
-                    # Если новой вакансии нет в БД, добавляем ее
-                    vac_obj = Vacancy(
-                        hh_id=vac_data["id"],
-                        title=vac_data.get("name"),
-                        company=vac_data.get("employer", {}).get("name"),
-                        salary=salary_str,
-                        link=vac_data.get("alternate_url"),
-                        apply_url=apply_url,
-                        description_snippet=vac_data.get("snippet", {}).get(
-                            "responsibility", ""
-                        ),
-                        published_at=published_at_dt,
-                    )
-                    session.add(vac_obj)
-                    await session.flush()  # Получаем ID новой вакансии
-
-                # Создаем связь между пользователем и вакансией
-                user_vacancy_status = UserVacancyStatus(
-                    user_id=user.id,
-                    vacancy_id=vac_obj.id,  # type: ignore
-                    status=UserVacancyStatusEnum.SENT.value,
-                )
-                session.add(user_vacancy_status)
+        records_to_show = raw_vacancies[:10]  # Ограничиваем вывод 10 вакансиями
+        rows = []
+        for record in records_to_show:
+            salary_value = record.salary.salary_from if record.salary else None
+            # apply_url уже содержит alternate_url, если прямой ссылки на отклик нет.
+            rows.append({
+                "hh_id": record.id,
+                "title": record.name,
+                "company": record.employer,
+                "salary": str(salary_value) if salary_value is not None else None,
+                "link": record.url,
+                "apply_url": record.apply_url,
+                "description_snippet": record.responsibility,
+                "published_at": record.published_at_utc_naive,
+            })
+        # Все вакансии страницы сохраняются одним запросом (новые создаются, существующие обновляются)
+        vacancies_by_hh_id = await upsert_vacancies(session, rows)
+
+        for record in records_to_show:
+            vac_obj = vacancies_by_hh_id[record.id]
+            if vac_obj not in found_vacancies_to_show:
                 found_vacancies_to_show.append(vac_obj)
 
+        # Связи пользователя с вакансиями - тоже одним запросом; уже существующие не трогаются
+        await add_vacancy_statuses(
+            session, user.id, (vac.id for vac in found_vacancies_to_show), UserVacancyStatusEnum.SENT  # type: ignore
+        )
+
         # Сохраняем все в БД одним запросом
         await session.commit()
 
@@ -0,0 +1,222 @@
+"""
+Планировщик исходящих сообщений Telegram.
+
+Telegram ограничивает бота примерно 30 сообщениями в секунду в целом
+и около 1 сообщения в секунду в один чат; при превышении приходит
+TelegramRetryAfter. Все отправки проходят через `TelegramSendScheduler`:
+
+- у каждого чата свое ведро токенов и своя очередь (порядок сообщений в чате сохраняется);
+- общее ведро токенов выдает разрешения по приоритетам: ответы пользователю
+  (INTERACTIVE) обгоняют массовую рассылку (BULK);
+- TelegramRetryAfter приостанавливает на указанное время и чат, и общее ведро
+  (остальные чаты тоже ждут, а не усиливают flood control), затем отправка повторяется;
+- глубина очередей и счетчики доступны через `metrics()`.
+
+Приоритет задается контекстом (`send_priority`), поэтому код, который
+вызывает `bot.send_message`, менять не нужно: запросы перехватывает
+`SendRateMiddleware` из `hh_bot.middlewares`.
+"""
+import asyncio
+import itertools
+import os
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Tuple, TypeVar
+
+from aiogram.exceptions import TelegramRetryAfter
+
+from ..utils.logger import logger
+from ..utils.rate_limit import TokenBucket
+
+# --- Настройки отправки (можно переопределить через .env) ---
+TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "30"))  # Сообщений в секунду на весь бот
+TELEGRAM_GLOBAL_BURST = float(os.getenv("TELEGRAM_GLOBAL_BURST", "30"))
+TELEGRAM_CHAT_RATE = float(os.getenv("TELEGRAM_CHAT_RATE", "1"))  # Сообщений в секунду в один чат
+TELEGRAM_CHAT_BURST = float(os.getenv("TELEGRAM_CHAT_BURST", "3"))  # Короткий всплеск в один чат
+TELEGRAM_SEND_MAX_RETRIES = int(os.getenv("TELEGRAM_SEND_MAX_RETRIES", "3"))  # Повторов после RetryAfter
+TELEGRAM_CHAT_STATES_MAX = int(os.getenv("TELEGRAM_CHAT_STATES_MAX", "10000"))  # Сколько чатов помнить
+
+T = TypeVar("T")
+
+
+class MessagePriority(IntEnum):
+    """Полосы приоритета: меньшее значение обслуживается раньше."""
+    INTERACTIVE = 0  # Ответы на действия пользователя
+    BULK = 1  # Рассылки
+
+
+_send_priority: ContextVar[MessagePriority] = ContextVar("send_priority", default=MessagePriority.INTERACTIVE)
+
+
+def current_send_priority() -> MessagePriority:
+    """Приоритет отправок в текущем контексте (по умолчанию - INTERACTIVE)."""
+    return _send_priority.get()
+
+
+@contextmanager
+def send_priority(priority: MessagePriority) -> Iterator[None]:
+    """
+    Задает приоритет всех отправок внутри блока, включая задачи,
+    созданные в нем (они наследуют контекст).
+    """
+    token = _send_priority.set(priority)
+    try:
+        yield
+    finally:
+        _send_priority.reset(token)
+
+
+class _ChatState:
+    """Очередь и ведро токенов одного чата."""
+
+    __slots__ = ("lock", "bucket")
+
+    def __init__(self, rate: float, capacity: float):
+        self.lock = asyncio.Lock()
+        self.bucket = TokenBucket(rate=rate, capacity=capacity)
+
+
+class TelegramSendScheduler:
+    """Очередь отправки сообщений с ограничением частоты и приоритетами."""
+
+    def __init__(
+        self,
+        global_rate: float = TELEGRAM_GLOBAL_RATE,
+        global_burst: float = TELEGRAM_GLOBAL_BURST,
+        chat_rate: float = TELEGRAM_CHAT_RATE,
+        chat_burst: float = TELEGRAM_CHAT_BURST,
+        max_retries: int = TELEGRAM_SEND_MAX_RETRIES,
+        max_chats: int = TELEGRAM_CHAT_STATES_MAX,
+    ):
+        self.global_bucket = TokenBucket(rate=global_rate, capacity=global_burst)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.max_chats = max_chats
+        self._chats: "OrderedDict[Any, _ChatState]" = OrderedDict()
+        # (приоритет, порядковый номер, future разрешения)
+        self._permits: "asyncio.PriorityQueue[Tuple[int, int, asyncio.Future]]" = asyncio.PriorityQueue()
+        self._sequence = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._queued: Dict[MessagePriority, int] = {priority: 0 for priority in MessagePriority}
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.max_queue_depth = 0
+
+    def _chat_state(self, chat_id: Any) -> _ChatState:
+        state = self._chats.get(chat_id)
+        if state is None:
+            state = _ChatState(self.chat_rate, self.chat_burst)
+            self._chats[chat_id] = state
+            # Забываем давно неактивные чаты, которые сейчас ничего не отправляют
+            if len(self._chats) > self.max_chats:
+                for old_chat_id, old_state in list(self._chats.items())[: len(self._chats) - self.max_chats]:
+                    if not old_state.lock.locked():
+                        del self._chats[old_chat_id]
+        else:
+            self._chats.move_to_end(chat_id)
+        return state
+
+    async def _dispatch(self) -> None:
+        """Выдает разрешения на отправку по приоритету с общей частотой."""
+        while True:
+            # Ждем появления заявки, но выбираем ее только после получения токена:
+            # пока ждали токен, могла прийти заявка с более высоким приоритетом
+            self._permits.put_nowait(await self._permits.get())
+            await self.global_bucket.acquire()
+            priority, _, permit = self._permits.get_nowait()
+            self._queued[MessagePriority(priority)] -= 1
+            if permit.done():  # Отправитель уже отменен - токен ему не нужен
+                self.global_bucket.release()
+                continue
+            permit.set_result(None)
+
+    async def _global_permit(self, priority: MessagePriority) -> None:
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        permit = asyncio.get_running_loop().create_future()
+        self._permits.put_nowait((int(priority), next(self._sequence), permit))
+        self._queued[priority] += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        try:
+            await permit
+        except asyncio.CancelledError:
+            if permit.done() and not permit.cancelled():
+                # Разрешение уже выдано, но отправки не будет - возвращаем токен
+                self.global_bucket.release()
+            else:
+                permit.cancel()
+            raise
+
+    async def submit(
+        self,
+        chat_id: Any,
+        send: Callable[[], Awaitable[T]],
+        priority: Optional[MessagePriority] = None,
+    ) -> T:
+        """
+        Выполняет отправку `send()` в чат `chat_id` с соблюдением лимитов.
+
+        Args:
+            chat_id: Чат, в который уходит сообщение.
+            send: Функция без аргументов, выполняющая сам запрос к Telegram.
+            priority: Полоса приоритета; по умолчанию - из контекста (`send_priority`).
+
+        Raises:
+            TelegramRetryAfter: Telegram продолжает просить подождать после всех повторов.
+        """
+        priority = current_send_priority() if priority is None else priority
+        chat = self._chat_state(chat_id)
+        # Блокировка чата сохраняет порядок сообщений внутри одного чата
+        async with chat.lock:
+            attempt = 0
+            while True:
+                await chat.bucket.acquire()
+                await self._global_permit(priority)
+                try:
+                    result = await send()
+                except TelegramRetryAfter as e:
+                    if attempt >= self.max_retries:
+                        self.failed += 1
+                        raise
+                    self.retried += 1
+                    attempt += 1
+                    logger.warning(
+                        f"Telegram просит подождать {e.retry_after} с. перед отправкой в чат {chat_id}. "
+                        f"Повтор {attempt}/{self.max_retries}."
+                    )
+                    # Лимит превышен для всего бота: пока идет пауза, остальные чаты
+                    # не получают разрешений, иначе они получат такой же RetryAfter
+                    chat.bucket.pause(e.retry_after)
+                    self.global_bucket.pause(e.retry_after)
+                    continue
+                self.sent += 1
+                return result
+
+    @property
+    def queue_depth(self) -> int:
+        """Сколько отправок ждут разрешения по общему лимиту."""
+        return sum(self._queued.values())
+
+    def metrics(self) -> Dict[str, int]:
+        """Счетчики и глубина очередей по полосам приоритета."""
+        return {
+            "queued_interactive": self._queued[MessagePriority.INTERACTIVE],
+            "queued_bulk": self._queued[MessagePriority.BULK],
+            "max_queue_depth": self.max_queue_depth,
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "chats": len(self._chats),
+        }
+
+    async def close(self) -> None:
+        """Останавливает выдачу разрешений и пишет итоговую статистику."""
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+            self._dispatcher = None
+        logger.info(f"Статистика отправки в Telegram: {self.metrics()}")
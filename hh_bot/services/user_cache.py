@@ -0,0 +1,96 @@
+"""
+Кэш пользователей бота по telegram_id.
+
+`DbSessionMiddleware` на каждом апдейте (нажатие кнопки, шаг FSM) искал
+пользователя запросом `SELECT ... FROM users WHERE telegram_id = ?`.
+Кэш хранит отвязанный от сессии снимок колонок пользователя и на каждый
+апдейт выдает его отдельную копию; middleware присоединяет копию к сессии
+апдейта через `session.add` без обращения к БД. Хэндлер получает обычный
+`User` и может менять его как раньше.
+
+Снимок устаревает, если пользователь изменен в БД. Хэндлеры, которые пишут
+пользователя или его настройки (регистрация, настройки поиска и LLM),
+сбрасывают запись через `invalidate`; TTL ограничивает время жизни
+снимка на случай изменений в обход этих хэндлеров.
+"""
+import os
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from ..db.models import User
+
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "300"))  # Время жизни снимка в секундах
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+
+
+def _snapshot(user: User) -> User:
+    """Отвязанная от сессий копия загруженных колонок пользователя."""
+    state = inspect(user)
+    values = {
+        attr.key: state.dict[attr.key]
+        for attr in state.mapper.column_attrs
+        if attr.key in state.dict
+    }
+    copy = User(**values)
+    # Копия выглядит как только что загруженная из БД: без истории изменений,
+    # поэтому ее можно присоединить к сессии через add() без SELECT
+    make_transient_to_detached(copy)
+    return copy
+
+
+class UserIdentityCache:
+    """TTL + LRU кэш снимков пользователей по telegram_id."""
+
+    def __init__(
+        self,
+        ttl: float = USER_CACHE_TTL,
+        max_entries: int = USER_CACHE_MAX_ENTRIES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        # telegram_id -> (expires_at, снимок); порядок - от давно использованных к свежим
+        self._entries: "OrderedDict[str, Tuple[float, User]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, telegram_id: str) -> Optional[User]:
+        """
+        Отвязанная от сессий копия снимка пользователя или None.
+        Копия своя у каждого вызова: ее можно присоединить к сессии через `session.add`.
+        """
+        entry = self._entries.get(telegram_id)
+        if entry is None or entry[0] <= self._clock():
+            if entry is not None:
+                del self._entries[telegram_id]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(telegram_id)
+        self.hits += 1
+        return _snapshot(entry[1])
+
+    def put(self, user: User) -> None:
+        """Запоминает снимок пользователя (объект из сессии не затрагивается)."""
+        telegram_id = str(user.telegram_id)
+        self._entries.pop(telegram_id, None)
+        self._entries[telegram_id] = (self._clock() + self.ttl, _snapshot(user))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, telegram_id) -> None:
+        """Сбрасывает снимок после изменения пользователя."""
+        self._entries.pop(str(telegram_id), None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def metrics(self) -> Dict[str, int]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
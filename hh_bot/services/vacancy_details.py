@@ -0,0 +1,65 @@
+"""
+Дозагрузка полных карточек вакансий для генерации документов.
+
+В выдаче /vacancies есть только короткий фрагмент описания. Полное описание
+и ключевые навыки берутся из /vacancies/{id} и сохраняются в `Vacancy`,
+поэтому карточка каждой вакансии запрашивается у hh.ru не больше одного раза.
+"""
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db.models import Vacancy
+from ..utils.logger import logger
+from .hh_client import HHApiClient
+from .vacancy_record import VacancyDetails
+
+
+async def ensure_vacancy_details(
+    session: AsyncSession,
+    vacancies: Iterable[Vacancy],
+    client: Optional[HHApiClient] = None,
+) -> int:
+    """
+    Загружает описание и ключевые навыки для вакансий, у которых их еще нет.
+
+    Карточки запрашиваются одной пачкой с ограниченной параллельностью.
+    Изменения только добавляются в сессию - commit выполняет вызывающий код.
+
+    Args:
+        session: Сессия, к которой привязаны вакансии.
+        vacancies: Вакансии из БД.
+        client: Общий клиент hh.ru. Если не передан, создается временный.
+
+    Returns:
+        Сколько вакансий было дополнено.
+    """
+    pending = {vac.hh_id: vac for vac in vacancies if vac.details_fetched_at is None}
+    if not pending:
+        return 0
+
+    own_client = client is None
+    http_client = client or HHApiClient()
+    try:
+        raw_details = await http_client.get_vacancy_details(pending.keys())
+    finally:
+        if own_client:
+            await http_client.close()
+
+    fetched_at = datetime.now(timezone.utc)
+    updated = 0
+    for hh_id, data in raw_details.items():
+        vac = pending.get(hh_id)
+        if vac is None:
+            continue
+        details = VacancyDetails.from_hh(data)
+        vac.description = details.description
+        vac.key_skills = list(details.key_skills)
+        vac.details_fetched_at = fetched_at
+        updated += 1
+
+    if updated:
+        await session.flush()
+    logger.info(f"Загружены карточки {updated} из {len(pending)} вакансий с hh.ru")
+    return updated
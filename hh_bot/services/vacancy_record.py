@@ -0,0 +1,140 @@
+"""
+Компактное представление вакансии из выдачи hh.ru.
+
+Ответ /vacancies содержит десятки вложенных полей, а боту нужна лишь малая
+их часть. Каждая вакансия разбирается один раз, сразу после получения
+страницы, в `VacancyRecord` со слотами: дальше поиск, сохранение в БД
+и форматирование работают с готовыми полями, а исходные словари не живут
+в памяти все время рассылки.
+"""
+import html
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..utils.logger import logger
+
+
+@dataclass(slots=True, frozen=True)
+class SalaryRange:
+    """
+    Зарплатная вилка вакансии.
+
+    Все поля пустые - hh.ru прислал объект зарплаты без границ ("по договорённости").
+    Отсутствие зарплаты вовсе обозначается `VacancyRecord.salary = None`.
+    """
+    salary_from: Optional[int] = None
+    salary_to: Optional[int] = None
+    currency: Optional[str] = None
+
+    @classmethod
+    def from_hh(cls, salary: Optional[Dict[str, Any]]) -> Optional["SalaryRange"]:
+        """Разбирает объект `salary` из ответа hh.ru."""
+        if salary is None or not isinstance(salary, dict):
+            return None
+        return cls(
+            salary_from=salary.get("from"),
+            salary_to=salary.get("to"),
+            currency=salary.get("currency") or None,
+        )
+
+
+def _parse_published_at(value: Optional[str], vacancy_id: Any) -> Optional[datetime]:
+    """Переводит дату публикации hh.ru (с часовым поясом) в UTC."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).astimezone(timezone.utc)
+    except (ValueError, TypeError) as e:
+        # Некорректная дата не должна ронять поиск или рассылку
+        logger.warning(f"Не удалось распарсить дату для вакансии {vacancy_id}: {e}")
+        return None
+
+
+@dataclass(slots=True, frozen=True)
+class VacancyRecord:
+    """Нормализованные поля вакансии, которые использует бот."""
+    id: str
+    name: Optional[str] = None
+    employer: Optional[str] = None
+    salary: Optional[SalaryRange] = None
+    url: Optional[str] = None  # Страница вакансии на hh.ru (alternate_url)
+    apply_url: Optional[str] = None  # Прямая ссылка на отклик, если есть
+    responsibility: str = ""  # snippet.responsibility
+    requirement: str = ""  # snippet.requirement
+    published_at: Optional[datetime] = None  # Всегда в UTC
+
+    @classmethod
+    def from_hh(cls, item: Dict[str, Any]) -> "VacancyRecord":
+        """Разбирает одну вакансию из поля `items` ответа hh.ru."""
+        vacancy_id = str(item["id"])
+        employer = item.get("employer") or {}
+        snippet = item.get("snippet") or {}
+        url = item.get("alternate_url")
+        return cls(
+            id=vacancy_id,
+            name=item.get("name"),
+            employer=employer.get("name"),
+            salary=SalaryRange.from_hh(item.get("salary")),
+            url=url,
+            apply_url=item.get("apply_url") or url,
+            responsibility=snippet.get("responsibility") or "",
+            requirement=snippet.get("requirement") or "",
+            published_at=_parse_published_at(item.get("published_at"), vacancy_id),
+        )
+
+    @property
+    def published_at_utc_naive(self) -> Optional[datetime]:
+        """Дата публикации для колонок БД без часового пояса."""
+        if self.published_at is None:
+            return None
+        return self.published_at.replace(tzinfo=None)
+
+
+_BLOCK_TAGS_RE = re.compile(r"<\s*(br|/p|/li|/h\d|/div)\s*/?>", re.IGNORECASE)
+_LIST_ITEM_RE = re.compile(r"<\s*li[^>]*>", re.IGNORECASE)
+_TAG_RE = re.compile(r"<[^>]+>")
+_BLANK_LINES_RE = re.compile(r"\n\s*\n+")
+
+
+def html_to_text(value: Optional[str]) -> str:
+    """Превращает HTML-описание вакансии hh.ru в обычный текст с переносами строк."""
+    if not value:
+        return ""
+    text = _BLOCK_TAGS_RE.sub("\n", value)
+    text = _LIST_ITEM_RE.sub("- ", text)
+    text = html.unescape(_TAG_RE.sub("", text))
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return _BLANK_LINES_RE.sub("\n\n", "\n".join(lines)).strip()
+
+
+@dataclass(slots=True, frozen=True)
+class VacancyDetails:
+    """Поля полной карточки вакансии (/vacancies/{id}), нужные для генерации документов."""
+    id: str
+    description: str = ""  # Описание без HTML-разметки
+    key_skills: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_hh(cls, item: Dict[str, Any]) -> "VacancyDetails":
+        """Разбирает ответ /vacancies/{id}."""
+        skills = tuple(
+            skill["name"] for skill in item.get("key_skills") or () if skill.get("name")
+        )
+        return cls(
+            id=str(item["id"]),
+            description=html_to_text(item.get("description")),
+            key_skills=skills,
+        )
+
+
+def parse_vacancies(items: Iterable[Dict[str, Any]]) -> List[VacancyRecord]:
+    """Разбирает список вакансий hh.ru, пропуская элементы без id."""
+    records = []
+    for item in items:
+        if not item.get("id"):
+            logger.warning("hh.ru вернул вакансию без id, пропускаю")
+            continue
+        records.append(VacancyRecord.from_hh(item))
+    return records
@@ -31,6 +31,11 @@ async def generate_cover_letter_for_vacancy(vacancy_id: int, user_id: int, sessi
     base_resume = user.base_resume or 'Не указано'
     vacancy_title = vacancy.title or 'Название не указано'
     company_name = vacancy.company or 'Название компании не указано'
+    # Ключевые навыки вакансии есть, только если загружена ее полная карточка
+    vacancy_skills_sentence = (
+        f"\nВ требованиях вакансии указаны {', '.join(vacancy.key_skills)} - с ними я работал(а) на практике.\n"
+        if vacancy.key_skills else ""
+    )
 
     cover_letter_text = f"""
 Уважаемый HR-менеджер!
@@ -38,7 +43,7 @@ async def generate_cover_letter_for_vacancy(vacancy_id: int, user_id: int, sessi
 Меня заинтересовала ваша вакансия на позицию «{vacancy_title}» в компании «{company_name}».
 
 Я обладаю опытом работы в {desired_position} и уверен(а), что мои навыки в {skills} будут полезны для вашей команды.
-
+{vacancy_skills_sentence}
 Мое резюме для более детального ознакомления:
 {base_resume}
 
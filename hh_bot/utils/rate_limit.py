@@ -0,0 +1,74 @@
+"""
+Ограничитель частоты запросов на основе "ведра токенов" (token bucket).
+
+Ведро пополняется со скоростью `rate` токенов в секунду и вмещает не больше
+`capacity` токенов: это позволяет короткие всплески, но в среднем держит
+заданную частоту. Один экземпляр разделяется всеми, кто обращается
+к одному и тому же внешнему API.
+"""
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Асинхронное ведро токенов.
+
+    Ожидающие получают токены по очереди (FIFO), поэтому при нехватке
+    токенов ни один вызывающий не "голодает".
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate и capacity должны быть положительными")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated_at
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated_at = now
+
+    @property
+    def available(self) -> float:
+        """Сколько токенов доступно прямо сейчас."""
+        self._refill(time.monotonic())
+        return self._tokens
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        """Ждет, пока в ведре наберется `tokens` токенов, и забирает их."""
+        if tokens > self.capacity:
+            raise ValueError("Нельзя запросить больше токенов, чем вмещает ведро")
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Приостанавливает выдачу токенов всем вызывающим на `seconds` секунд.
+        Используется, когда внешний сервис прямо просит подождать (Retry-After).
+
+        После паузы ведро наполняется заново с нуля: ни накопленные до паузы
+        токены, ни время самой паузы не дают всплеска запросов сразу после нее.
+        """
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+        self._updated_at = self._paused_until
+
+    def release(self, tokens: float = 1.0) -> None:
+        """Возвращает в ведро полученные, но не использованные токены."""
+        self._refill(time.monotonic())
+        self._tokens = min(self.capacity, self._tokens + tokens)
@@ -26,6 +26,10 @@ async def generate_resume_for_vacancy(vacancy_id: int, user_id: int, session: As
     # --- ЛОГИКА ГЕНЕРАЦИИ РЕЗЮМЕ ---
     # Здесь вы можете использовать любую логику: шаблоны, AI и т.д.
     # Это простой пример конкатенации строк.
+    # Ключевые навыки вакансии есть, только если загружена ее полная карточка.
+    vacancy_skills_block = (
+        f"\n**Требования вакансии:**\n{', '.join(vacancy.key_skills)}\n" if vacancy.key_skills else ""
+    )
     
     resume_text = f"""
 **Резюме на вакансию: {vacancy.title}**
@@ -36,7 +40,7 @@ async def generate_resume_for_vacancy(vacancy_id: int, user_id: int, session: As
 
 **Ключевые навыки:**
 {user.skills}
-
+{vacancy_skills_block}
 **Опыт:**
 {user.base_resume}
 
@@ -54,10 +54,14 @@ from hh_bot.db.database import (
 from hh_bot.handlers import user, settings
 from hh_bot.handlers.vacancies import search_router, saved_router
 from hh_bot.handlers.errors import errors_router
-from hh_bot.middlewares import DbSessionMiddleware
+from hh_bot.middlewares import DbSessionMiddleware, SendRateMiddleware
+from hh_bot.services.hh_client import HHApiClient
+from hh_bot.services.hh_cache import ResponseCache
+from hh_bot.services.hh_areas import AreaLoader
+from hh_bot.services.telegram_sender import TelegramSendScheduler
 
 # ИСПРАВЛЕНИЕ: Импортируем только новые, правильные функции
-from hh_bot.services.scheduler import setup_scheduler, shutdown_scheduler
+from hh_bot.services.scheduler import setup_scheduler, schedule_digest_resume, shutdown_scheduler
 
 # УДАЛЕНО: Этот вызов был здесь ошибочно. Он вызывался до создания переменных `bot` и `async_session_maker`.
 # setup_scheduler(bot=bot, async_session_maker=async_session_maker)
@@ -117,6 +121,9 @@ async def init_database(async_db_url: str):
             sqlite_path = Path.cwd() / "data" / "bot_dev.db"
             sqlite_path.parent.mkdir(parents=True, exist_ok=True)
             async_db_url = f"sqlite+aiosqlite:///{sqlite_path.as_posix()}"
+            # Реплика относится к основной БД и с локальной SQLite не используется;
+            # вместо нее чтение идет через пул соединений, запись - через одно (см. db/sqlite_tuning.py)
+            return create_db_engine_and_sessionmaker(async_db_url, replica_url=None)
 
     return create_db_engine_and_sessionmaker(async_db_url)
 
@@ -153,9 +160,22 @@ async def main():
         if not await health_check(bot):
             return
 
+        # === Очередь отправки в Telegram: лимиты Bot API и приоритет ответов над рассылкой ===
+        send_scheduler = TelegramSendScheduler()
+        bot.session.middleware(SendRateMiddleware(send_scheduler))
+
+        # === Общий HTTP-клиент hh.ru (пул соединений на всё время работы) ===
+        hh_client = HHApiClient(cache=ResponseCache.from_env())
+        # Справочник регионов hh.ru: снимок с диска или загрузка, затем периодическое обновление
+        area_loader = AreaLoader(hh_client)
+        await area_loader.start()
+
         # === Настройка диспетчера ===
         dp = Dispatcher()
-        dp.update.middleware(DbSessionMiddleware(session_pool=session_maker))
+        db_middleware = DbSessionMiddleware(session_pool=session_maker)
+        dp.update.middleware(db_middleware)
+        # Клиент попадает в хэндлеры как аргумент `hh_client`
+        dp["hh_client"] = hh_client
         
         # === Регистрация роутеров ===
         routers = [
@@ -175,7 +195,9 @@ async def main():
 
         # === Запуск сервисов ===
         # ИСПРАВЛЕНИЕ: Вызываем setup_scheduler с нужными аргументами в правильном месте
-        setup_scheduler(bot=bot, async_session_maker=session_maker)
+        setup_scheduler(bot=bot, async_session_maker=session_maker, hh_client=hh_client)
+        # Рассылка, прерванная перезапуском, продолжается с необработанных пользователей
+        schedule_digest_resume(bot=bot, async_session_maker=session_maker, hh_client=hh_client)
         logger.info("✅ Планировщик задач запущен")
 
         # === Запуск поллинга ===
@@ -193,9 +215,27 @@ async def main():
             shutdown_scheduler()
             logger.info("✅ Планировщик остановлен")
             
+            # Очередь отправки останавливаем до закрытия сессии бота:
+            # ожидающие разрешения отправки не должны уходить в закрытую сессию
+            if 'send_scheduler' in locals():
+                await send_scheduler.close()
+
             if 'bot' in locals() and bot.session:
                 await bot.session.close()
                 logger.info("✅ Сессия бота закрыта")
+
+            if 'db_middleware' in locals():
+                db_stats = db_middleware.metrics()
+                logger.info(
+                    f"Апдейтов обработано: {db_stats['updates']}, из них с обращением к БД: {db_stats['updates_with_db']}"
+                )
+
+            if 'area_loader' in locals():
+                await area_loader.close()
+
+            if 'hh_client' in locals():
+                await hh_client.close()
+                logger.info("✅ Соединения с hh.ru закрыты")
             
             await dispose_engine()
             logger.info("✅ Соединение с БД закрыто")
@@ -0,0 +1,29 @@
+"""add_vacancy_details
+
+Revision ID: 5c1f7e2a9d41
+Revises: 9949e3cb76af
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1f7e2a9d41'
+down_revision: Union[str, None] = '9949e3cb76af'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('vacancies', sa.Column('description', sa.Text(), nullable=True))
+    op.add_column('vacancies', sa.Column('key_skills', sa.JSON(), nullable=True))
+    op.add_column('vacancies', sa.Column('details_fetched_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('vacancies', 'details_fetched_at')
+    op.drop_column('vacancies', 'key_skills')
+    op.drop_column('vacancies', 'description')
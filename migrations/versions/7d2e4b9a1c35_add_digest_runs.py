@@ -0,0 +1,55 @@
+"""add_digest_runs
+
+Revision ID: 7d2e4b9a1c35
+Revises: 5c1f7e2a9d41
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '7d2e4b9a1c35'
+down_revision: Union[str, None] = '5c1f7e2a9d41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'digest_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('run_date', sa.Date(), nullable=False),
+        sa.Column('shard', sa.Integer(), nullable=False),
+        sa.Column('shards', sa.Integer(), nullable=False),
+        sa.Column('status', sa.Enum('RUNNING', 'COMPLETED', 'ABANDONED', name='digest_run_status_enum', native_enum=False), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('run_date', 'shard', 'shards', name='uq_digest_runs_date_shard'),
+    )
+    op.create_index(op.f('ix_digest_runs_id'), 'digest_runs', ['id'], unique=False)
+    op.create_table(
+        'digest_run_items',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('run_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.Enum('PENDING', 'DONE', 'FAILED', name='digest_run_item_status_enum', native_enum=False), nullable=False),
+        sa.Column('processed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['run_id'], ['digest_runs.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('run_id', 'user_id', name='uq_digest_run_items_run_user'),
+    )
+    op.create_index(op.f('ix_digest_run_items_id'), 'digest_run_items', ['id'], unique=False)
+    op.create_index('ix_digest_run_items_run_status', 'digest_run_items', ['run_id', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_digest_run_items_run_status', table_name='digest_run_items')
+    op.drop_index(op.f('ix_digest_run_items_id'), table_name='digest_run_items')
+    op.drop_table('digest_run_items')
+    op.drop_index(op.f('ix_digest_runs_id'), table_name='digest_runs')
+    op.drop_table('digest_runs')
@@ -0,0 +1,39 @@
+"""unique_user_vacancy_status
+
+Revision ID: a3f8c6d2e417
+Revises: 7d2e4b9a1c35
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f8c6d2e417'
+down_revision: Union[str, None] = '7d2e4b9a1c35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Повторные поиски создавали дубликаты статусов. Оставляем по одной строке
+    # на пару: статус, выставленный пользователем (не SENT), важнее автоматического.
+    op.execute(sa.text(
+        """
+        DELETE FROM user_vacancy_status
+        WHERE id NOT IN (
+            SELECT COALESCE(MIN(CASE WHEN status <> 'SENT' THEN id END), MIN(id))
+            FROM user_vacancy_status
+            GROUP BY user_id, vacancy_id
+        )
+        """
+    ))
+    with op.batch_alter_table('user_vacancy_status') as batch_op:
+        batch_op.create_unique_constraint('uq_user_vacancy_status_user_vacancy', ['user_id', 'vacancy_id'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('user_vacancy_status') as batch_op:
+        batch_op.drop_constraint('uq_user_vacancy_status_user_vacancy', type_='unique')
@@ -0,0 +1,32 @@
+"""add_status_and_published_indexes
+
+Revision ID: c41d9e7b2a58
+Revises: a3f8c6d2e417
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41d9e7b2a58'
+down_revision: Union[str, None] = 'a3f8c6d2e417'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Уникальный индекс (user_id, vacancy_id) создан в a3f8c6d2e417 вместе с ограничением
+    op.create_index(
+        'ix_user_vacancy_status_user_status_created',
+        'user_vacancy_status',
+        ['user_id', 'status', 'created_at'],
+        unique=False,
+    )
+    op.create_index(op.f('ix_vacancies_published_at'), 'vacancies', ['published_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_vacancies_published_at'), table_name='vacancies')
+    op.drop_index('ix_user_vacancy_status_user_status_created', table_name='user_vacancy_status')
@@ -0,0 +1,28 @@
+"""add_digest_run_item_attempts
+
+Revision ID: e5b2a7c9d813
+Revises: c41d9e7b2a58
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b2a7c9d813'
+down_revision: Union[str, None] = 'c41d9e7b2a58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'digest_run_items',
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('digest_run_items', 'attempts')
@@ -4,8 +4,8 @@ from unittest.mock import AsyncMock, MagicMock
 from sqlalchemy import select
 
 # Импорты из вашего приложения
-from hh_bot.services.scheduler.jobs.constants import CITY_MAP
 from hh_bot.db.models import User, SearchFilter
+from hh_bot.services.vacancy_record import parse_vacancies
 
 @pytest_asyncio.fixture
 async def mock_bot():
@@ -17,8 +17,17 @@ async def mock_bot():
 
 @pytest.fixture
 def mock_fetch_vacancies(mocker):
-    # Заменяем вызов функции ВНУТРИ модуля daily_digest
-    return mocker.patch("hh_bot.services.scheduler.jobs.daily_digest.fetch_vacancies", new_callable=mocker.AsyncMock)
+    # Заменяем постраничную загрузку ВНУТРИ модуля daily_digest
+    fetch_mock = mocker.MagicMock(return_value=[])
+
+    async def fake_pages(*args, **kwargs):
+        items = fetch_mock(*args, **kwargs)
+        if items:
+            # Как и настоящая загрузка, отдаем уже разобранные вакансии
+            yield parse_vacancies(items)
+
+    mocker.patch("hh_bot.services.scheduler.jobs.daily_digest.iter_vacancy_pages", side_effect=fake_pages)
+    return fetch_mock
 
 @pytest_asyncio.fixture
 async def user_with_filter(async_session_maker):
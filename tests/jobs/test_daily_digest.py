@@ -1,15 +1,18 @@
+import asyncio
+
 import pytest
 import pytest_asyncio
 from datetime import datetime, timezone
-from unittest.mock import AsyncMock, MagicMock, patch
-from sqlalchemy import select, and_
+from unittest.mock import AsyncMock, MagicMock, patch, ANY
+from sqlalchemy import select, and_, func
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 
 # ПРАВИЛЬНЫЙ ИМПОРТ Base и моделей
 from hh_bot.db.base import Base
 from hh_bot.db.models import User, SearchFilter, Vacancy, UserVacancyStatus, UserVacancyStatusEnum
 from hh_bot.services.scheduler.jobs import daily_digest_job
-from hh_bot.services.scheduler.jobs.constants import CITY_MAP
+from hh_bot.services.scheduler.jobs.constants import DIGEST_VACANCY_LIMIT
+from hh_bot.services.vacancy_record import parse_vacancies
 
 # --- ФИКСТУРЫ ---
 
@@ -39,9 +42,21 @@ def mock_bot():
 
 @pytest.fixture
 def mock_fetch_vacancies(mocker):
-    """Создает мок для функции fetch_vacancies."""
+    """
+    Создает мок для постраничной загрузки вакансий.
+    return_value мока - список вакансий, который отдается одной страницей.
+    """
+    fetch_mock = MagicMock(return_value=[])
+
+    async def fake_pages(*args, **kwargs):
+        items = fetch_mock(*args, **kwargs)
+        if items:
+            # Как и настоящая загрузка, отдаем уже разобранные вакансии
+            yield parse_vacancies(items)
+
     # Мокаем функцию именно в том модуле, где она вызывается
-    return mocker.patch("hh_bot.services.scheduler.jobs.daily_digest.fetch_vacancies", new_callable=AsyncMock)
+    mocker.patch("hh_bot.services.scheduler.jobs.daily_digest.iter_vacancy_pages", side_effect=fake_pages)
+    return fetch_mock
 
 
 @pytest_asyncio.fixture
@@ -103,13 +118,13 @@ async def test_daily_digest_success_one_new_vacancy(user_with_filter, async_sess
 
     mock_fetch_vacancies.assert_called_once_with({
         'position': 'Python',
-        'city_id': CITY_MAP['москва'],
+        'city_id': 1,  # ID Москвы в справочнике регионов hh.ru
         'salary_min': None,
         'remote': False,
         'freshness_days': 1,
         'employment': None,
         'experience': None,
-    })
+    }, client=ANY, concurrency=1)
 
     mock_bot.send_message.assert_called_once()
     call_args = mock_bot.send_message.call_args
@@ -142,6 +157,34 @@ async def test_daily_digest_success_one_new_vacancy(user_with_filter, async_sess
         assert status is not None
         assert status.status == UserVacancyStatusEnum.SENT
 
+@pytest.mark.asyncio
+async def test_daily_digest_marks_only_sent_vacancies(user_with_filter, async_session_maker, mock_bot, mock_fetch_vacancies):
+    """Тест: вакансии сверх DIGEST_VACANCY_LIMIT не помечаются отправленными и ждут следующей подборки."""
+    total = DIGEST_VACANCY_LIMIT + 5
+    mock_fetch_vacancies.return_value = [
+        {
+            'id': f'hh_vac_{i}',
+            'name': f'Vacancy {i}',
+            'employer': {'name': 'Co'},
+            'alternate_url': f'http://hh.ru/vac/{i}',
+            'published_at': datetime.now(timezone.utc).isoformat(),
+        }
+        for i in range(total)
+    ]
+
+    await daily_digest_job(mock_bot, async_session_maker)
+
+    async with async_session_maker() as session:
+        sent = set((await session.scalars(
+            select(Vacancy.hh_id)
+            .join(UserVacancyStatus, UserVacancyStatus.vacancy_id == Vacancy.id)
+            .where(UserVacancyStatus.user_id == user_with_filter)
+        )).all())
+        stored = await session.scalar(select(func.count()).select_from(Vacancy))
+    assert sent == {f'hh_vac_{i}' for i in range(DIGEST_VACANCY_LIMIT)}
+    assert stored == total
+
+
 @pytest.mark.asyncio
 async def test_daily_digest_send_message_failure(user_with_filter, async_session_maker, mock_bot, mock_fetch_vacancies):
     """Тест: ошибка при отправке сообщения -> транзакция откатывается."""
@@ -165,4 +208,74 @@ async def test_daily_digest_send_message_failure(user_with_filter, async_session
                 UserVacancyStatus.user_id == user_with_filter
             )
         )
-        assert status is None
\ No newline at end of file
+        assert status is None
+
+@pytest.mark.asyncio
+async def test_daily_digest_uses_injected_hh_client(user_with_filter, async_session_maker, mock_bot, mock_fetch_vacancies):
+    """Тест: переданный клиент hh.ru используется для запросов и не закрывается задачей."""
+    mock_fetch_vacancies.return_value = []
+    hh_client = AsyncMock()
+
+    await daily_digest_job(mock_bot, async_session_maker, hh_client=hh_client)
+
+    assert mock_fetch_vacancies.call_args.kwargs['client'] is hh_client
+    hh_client.close.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_daily_digest_processes_users_concurrently_and_isolates_failures(async_session_maker, mock_bot, mocker):
+    """Тест: пользователи обрабатываются пулом воркеров, ошибка одного не мешает другим."""
+    async with async_session_maker() as session:
+        for telegram_id in ("111", "222", "333", "444"):
+            user = User(telegram_id=telegram_id, full_name=f"User {telegram_id}")
+            session.add(user)
+            await session.flush()
+            session.add(SearchFilter(user_id=user.id, position="Python", city="москва", freshness_days=1))
+        await session.commit()
+
+    processed = []
+    in_flight = 0
+    max_in_flight = 0
+
+    async def fake_process_user(bot, session_maker, planner, limits, user, search_filters):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if user.telegram_id == "222":
+            raise RuntimeError("сбой одного пользователя")
+        processed.append(user.telegram_id)
+
+    mocker.patch("hh_bot.services.scheduler.jobs.daily_digest._process_user", side_effect=fake_process_user)
+
+    await daily_digest_job(mock_bot, async_session_maker, hh_client=AsyncMock(), workers=2)
+
+    assert max_in_flight == 2
+    # Воркер, обработавший "222", не теряет оставшихся пользователей
+    assert sorted(processed) == ["111", "333", "444"]
+
+
+@pytest.mark.asyncio
+async def test_daily_digest_shards_split_users(async_session_maker, mock_bot, mocker):
+    """Тест: части рассылки не пересекаются и вместе покрывают всех пользователей."""
+    async with async_session_maker() as session:
+        for telegram_id in ("111", "222", "333", "444", "555"):
+            user = User(telegram_id=telegram_id, full_name=f"User {telegram_id}")
+            session.add(user)
+            await session.flush()
+            session.add(SearchFilter(user_id=user.id, position="Python", city="москва", freshness_days=1))
+        await session.commit()
+
+    processed = {}
+
+    async def fake_process_user(bot, session_maker, planner, limits, user, search_filters):
+        processed.setdefault(user.telegram_id, []).append(user.id % 2)
+
+    mocker.patch("hh_bot.services.scheduler.jobs.daily_digest._process_user", side_effect=fake_process_user)
+
+    await daily_digest_job(mock_bot, async_session_maker, hh_client=AsyncMock(), shard=0, shards=2)
+    assert all(shards == [0] for shards in processed.values())
+    await daily_digest_job(mock_bot, async_session_maker, hh_client=AsyncMock(), shard=1, shards=2)
+
+    assert sorted(processed) == ["111", "222", "333", "444", "555"]
+    assert all(len(shards) == 1 for shards in processed.values())
@@ -0,0 +1,140 @@
+from datetime import date, timedelta
+from unittest.mock import AsyncMock
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+
+from hh_bot.db.base import Base
+from hh_bot.db.models import User, SearchFilter, DigestRun, DigestRunItem
+from hh_bot.enums import DigestRunStatusEnum, DigestRunItemStatusEnum
+from hh_bot.services.scheduler.jobs import daily_digest_job, resume_unfinished_digests
+from hh_bot.services.scheduler.jobs.constants import DIGEST_MAX_ATTEMPTS
+from hh_bot.services.scheduler.jobs.daily_digest import digest_today
+from hh_bot.services.scheduler.jobs.runs import DigestCheckpoint, find_unfinished_runs, start_digest_run
+
+
+@pytest_asyncio.fixture(scope="function")
+async def async_session_maker():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def user_ids(async_session_maker):
+    """Три пользователя с фильтрами."""
+    ids = []
+    async with async_session_maker() as session:
+        for telegram_id in ("111", "222", "333"):
+            user = User(telegram_id=telegram_id, full_name=f"User {telegram_id}")
+            session.add(user)
+            await session.flush()
+            session.add(SearchFilter(user_id=user.id, position="Python", city="москва", freshness_days=1))
+            ids.append(user.id)
+        await session.commit()
+    return ids
+
+
+@pytest.fixture
+def processed(mocker):
+    """Подменяет обработку пользователя и запоминает, кого обработали."""
+    seen = []
+
+    async def fake_process_user(bot, session_maker, planner, limits, user, search_filters):
+        seen.append(user.id)
+        return True
+
+    mocker.patch("hh_bot.services.scheduler.jobs.daily_digest._process_user", side_effect=fake_process_user)
+    return seen
+
+
+@pytest.mark.asyncio
+async def test_interrupted_run_resumes_with_pending_users(async_session_maker, user_ids, processed):
+    """Перезапуск продолжает тот же запуск и обрабатывает только необработанных пользователей."""
+    run_date = digest_today()
+    # Имитируем запуск, прерванный после первого пользователя
+    run_id, pending = await start_digest_run(async_session_maker, run_date, 0, 1, user_ids)
+    assert pending == set(user_ids)
+    await DigestCheckpoint(async_session_maker, run_id).mark(user_ids[0], DigestRunItemStatusEnum.DONE)
+
+    await resume_unfinished_digests(AsyncMock(), async_session_maker, hh_client=AsyncMock())
+
+    assert sorted(processed) == sorted(user_ids[1:])
+    async with async_session_maker() as session:
+        run = await session.get(DigestRun, run_id)
+        assert run.status == DigestRunStatusEnum.COMPLETED
+        statuses = (await session.scalars(select(DigestRunItem.status).where(DigestRunItem.run_id == run_id))).all()
+        assert set(statuses) == {DigestRunItemStatusEnum.DONE}
+
+    # Завершенный запуск за этот день не повторяется
+    await daily_digest_job(AsyncMock(), async_session_maker, hh_client=AsyncMock())
+    assert len(processed) == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_user_is_recorded(async_session_maker, user_ids, mocker):
+    """Пользователь, обработка которого упала, отмечается как FAILED и не блокирует завершение."""
+    async def fake_process_user(bot, session_maker, planner, limits, user, search_filters):
+        if user.id == user_ids[1]:
+            raise RuntimeError("сбой")
+        return user.id != user_ids[2]
+
+    mocker.patch("hh_bot.services.scheduler.jobs.daily_digest._process_user", side_effect=fake_process_user)
+
+    await daily_digest_job(AsyncMock(), async_session_maker, hh_client=AsyncMock())
+
+    async with async_session_maker() as session:
+        items = dict((await session.execute(select(DigestRunItem.user_id, DigestRunItem.status))).all())
+        run = await session.scalar(select(DigestRun))
+    assert items == {
+        user_ids[0]: DigestRunItemStatusEnum.DONE,
+        user_ids[1]: DigestRunItemStatusEnum.FAILED,
+        user_ids[2]: DigestRunItemStatusEnum.FAILED,
+    }
+    # Упавших пользователей еще можно повторить - запуск не завершен
+    assert run.status == DigestRunStatusEnum.RUNNING
+
+
+@pytest.mark.asyncio
+async def test_failed_users_are_retried_on_resume_up_to_max_attempts(async_session_maker, user_ids, mocker):
+    """При продолжении запуска упавшие пользователи обрабатываются снова, но не больше DIGEST_MAX_ATTEMPTS раз."""
+    attempts = {user_id: 0 for user_id in user_ids}
+
+    async def fake_process_user(bot, session_maker, planner, limits, user, search_filters):
+        attempts[user.id] += 1
+        if user.id == user_ids[1]:
+            return attempts[user.id] >= 2  # Временный сбой: вторая попытка успешна
+        return user.id != user_ids[2]  # Постоянный сбой
+
+    mocker.patch("hh_bot.services.scheduler.jobs.daily_digest._process_user", side_effect=fake_process_user)
+
+    await daily_digest_job(AsyncMock(), async_session_maker, hh_client=AsyncMock())
+    for _ in range(DIGEST_MAX_ATTEMPTS):
+        await resume_unfinished_digests(AsyncMock(), async_session_maker, hh_client=AsyncMock())
+
+    assert attempts == {user_ids[0]: 1, user_ids[1]: 2, user_ids[2]: DIGEST_MAX_ATTEMPTS}
+    async with async_session_maker() as session:
+        items = dict((await session.execute(select(DigestRunItem.user_id, DigestRunItem.status))).all())
+        run = await session.scalar(select(DigestRun))
+    assert items[user_ids[1]] == DigestRunItemStatusEnum.DONE
+    assert items[user_ids[2]] == DigestRunItemStatusEnum.FAILED
+    assert run.status == DigestRunStatusEnum.COMPLETED
+
+
+@pytest.mark.asyncio
+async def test_old_unfinished_runs_are_abandoned(async_session_maker, user_ids):
+    """Вчерашний прерванный запуск не продолжается, а помечается ABANDONED."""
+    today = date(2026, 1, 10)
+    await start_digest_run(async_session_maker, today - timedelta(days=1), 0, 1, user_ids)
+    await start_digest_run(async_session_maker, today, 0, 1, user_ids)
+
+    runs = await find_unfinished_runs(async_session_maker, since=today)
+
+    assert [run.run_date for run in runs] == [today]
+    async with async_session_maker() as session:
+        old = await session.scalar(select(DigestRun).where(DigestRun.run_date == today - timedelta(days=1)))
+        assert old.status == DigestRunStatusEnum.ABANDONED
@@ -0,0 +1,153 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+from unittest.mock import MagicMock
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+
+from hh_bot.db.base import Base
+from hh_bot.db.models import User, SearchFilter, Vacancy, UserVacancyStatus, UserVacancyStatusEnum
+from hh_bot.services.scheduler.jobs.planner import DigestPlanner
+from hh_bot.services.scheduler.jobs.storage import find_unsent_pairs
+from hh_bot.services.vacancy_record import VacancyRecord
+
+
+@pytest_asyncio.fixture(scope="function")
+async def async_session_maker():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def users_data(async_session_maker):
+    """Двое ищут Python в Москве, третий - Java."""
+    data = []
+    async with async_session_maker() as session:
+        for telegram_id, position in (("111", "Python"), ("222", "python "), ("333", "Java")):
+            user = User(telegram_id=telegram_id, full_name=f"User {telegram_id}")
+            session.add(user)
+            await session.flush()
+            search_filter = SearchFilter(user_id=user.id, position=position, city="москва", freshness_days=1)
+            session.add(search_filter)
+            data.append((user, search_filter))
+        await session.commit()
+    return data
+
+
+def records(*ids):
+    return [VacancyRecord(id=hh_id, name=f"Vacancy {hh_id}") for hh_id in ids]
+
+
+@pytest.mark.asyncio
+async def test_find_unsent_pairs_excludes_sent(async_session_maker, users_data):
+    """Anti-join возвращает только пары, которых нет в user_vacancy_status."""
+    (u1, _), (u2, _), _ = users_data
+    async with async_session_maker() as session:
+        vacancies = [Vacancy(hh_id="a"), Vacancy(hh_id="b")]
+        session.add_all(vacancies)
+        await session.flush()
+        session.add(UserVacancyStatus(user_id=u1.id, vacancy_id=vacancies[0].id, status=UserVacancyStatusEnum.SENT))
+        await session.flush()
+
+        pairs = await find_unsent_pairs(session, [u1.id, u2.id], [v.id for v in vacancies])
+
+    assert pairs == {
+        (u1.id, vacancies[1].id),
+        (u2.id, vacancies[0].id),
+        (u2.id, vacancies[1].id),
+    }
+
+
+@pytest.mark.asyncio
+async def test_planner_fetches_once_per_query_group(async_session_maker, users_data):
+    """Пользователи с одинаковым запросом обслуживаются одной загрузкой и одной сверкой."""
+    (u1, _), (u2, _), (u3, _) = users_data
+    async with async_session_maker() as session:
+        vacancy = Vacancy(hh_id="p1")
+        session.add(vacancy)
+        await session.flush()
+        session.add(UserVacancyStatus(user_id=u1.id, vacancy_id=vacancy.id, status=UserVacancyStatusEnum.SENT))
+        await session.commit()
+
+    calls = MagicMock()
+
+    async def fetch_pages(filters):
+        calls(filters["position"])
+        if filters["position"].strip().lower() == "python":
+            yield records("p1", "p2")
+            yield records("p3", "p2")  # Дубликат между страницами учитывается один раз
+        else:
+            yield records("j1")
+
+    planner = DigestPlanner(fetch_pages, async_session_maker, users_data)
+    assert planner.group_count == 2
+
+    first = await planner.new_vacancies_for(u1.id)
+    second = await planner.new_vacancies_for(u2.id)
+    third = await planner.new_vacancies_for(u3.id)
+    await planner.close()
+
+    assert calls.call_count == 2
+    assert [record.id for _, record in first] == ["p2", "p3"]
+    assert [record.id for _, record in second] == ["p1", "p2", "p3"]
+    assert [vac.hh_id for vac, _ in third] == ["j1"]
+    assert all(vac.id is not None for vac, _ in second)
+
+
+@pytest.mark.asyncio
+async def test_planner_propagates_fetch_errors_to_group(async_session_maker, users_data):
+    """Ошибка загрузки группы получают все ее пользователи."""
+    (u1, _), (u2, _), _ = users_data
+
+    async def fetch_pages(filters):
+        raise RuntimeError("hh.ru недоступен")
+        yield
+
+    planner = DigestPlanner(fetch_pages, async_session_maker, users_data)
+    for user_id in (u1.id, u2.id):
+        with pytest.raises(RuntimeError):
+            await planner.new_vacancies_for(user_id)
+    await planner.close()
+
+
+@pytest.mark.asyncio
+async def test_planner_holds_hh_limit_for_whole_group_fetch(async_session_maker, users_data):
+    """Слот hh_limit занят, пока загрузчик группы не отдаст последнюю страницу."""
+    (u1, _), _, (u3, _) = users_data
+    events = []
+
+    async def fetch_pages(filters):
+        events.append(f"{filters['position']} start")
+        yield records(f"{filters['position']}-1")
+        # Здесь загрузчик запрашивает следующие страницы в фоне
+        await asyncio.sleep(0.01)
+        yield records(f"{filters['position']}-2")
+        events.append(f"{filters['position']} end")
+
+    planner = DigestPlanner(fetch_pages, async_session_maker, users_data, hh_limit=asyncio.Semaphore(1))
+    await asyncio.gather(planner.new_vacancies_for(u1.id), planner.new_vacancies_for(u3.id))
+    await planner.close()
+
+    # Загрузки групп не пересекаются
+    assert [event.split()[1] for event in events] == ["start", "end", "start", "end"]
+
+
+@pytest.mark.asyncio
+async def test_planner_uses_first_filter_of_user(async_session_maker, users_data):
+    """Лишний фильтр того же пользователя не переназначает его группу."""
+    (u1, f1), _, (_, f3) = users_data
+    fetched = []
+
+    async def fetch_pages(filters):
+        fetched.append(filters["position"])
+        yield records(filters["position"])
+
+    planner = DigestPlanner(fetch_pages, async_session_maker, [(u1, f1), (u1, f3)])
+    assert planner.group_count == 1
+    await planner.new_vacancies_for(u1.id)
+    await planner.close()
+
+    assert fetched == ["Python"]
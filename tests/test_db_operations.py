@@ -15,9 +15,10 @@ from hh_bot.db.models import UserVacancyStatusEnum
 from hh_bot.services.scheduler.jobs.storage import (
     _format_salary_for_db, # type: ignore
     get_users_with_filters,
-    find_and_process_new_vacancies,
+    get_or_create_vacancies,
     mark_vacancies_as_sent
 )
+from hh_bot.services.vacancy_record import SalaryRange, VacancyRecord
 
 @pytest.mark.parametrize("salary_data, expected", [
     ({'from': 100000, 'to': 150000, 'currency': 'RUR'}, "100000 - 150000 RUR"),
@@ -27,7 +28,7 @@ from hh_bot.services.scheduler.jobs.storage import (
     ({}, None)
 ])
 def test_format_salary_for_db(salary_data, expected):
-    assert _format_salary_for_db(salary_data) == expected
+    assert _format_salary_for_db(SalaryRange.from_hh(salary_data)) == expected
 
 @pytest_asyncio.fixture
 def mock_async_session_maker():
@@ -74,17 +75,10 @@ async def test_get_users_with_filters(mock_async_session_maker):
     assert users[0] == mock_user
 
 @pytest.mark.asyncio
-async def test_find_new_vacancies_one_new(mock_async_session_maker):
-    """Тестирует случай, когда найдена одна новая вакансия."""
-    
-    # Настраиваем мок сессии
+async def test_get_or_create_vacancies_saves_page_in_one_upsert(mock_async_session_maker):
+    """Вся страница сохраняется одним запросом с отформатированной зарплатой."""
     mock_session = mock_async_session_maker.return_value
-    mock_session.execute.side_effect = [
-        MagicMock(scalars=MagicMock(return_value=MagicMock(all=MagicMock(return_value=[])))), # Существующие вакансии
-        MagicMock(all=MagicMock(return_value=[])) # Отправленные вакансии
-    ]
-    
-    vacancies_data = [{
+    vacancies_data = [VacancyRecord.from_hh({
         'id': '123',
         'name': 'Dev',
         'employer': {'name': 'Company'},
@@ -92,35 +86,203 @@ async def test_find_new_vacancies_one_new(mock_async_session_maker):
         'alternate_url': 'url',
         'snippet': {'responsibility': 'code'},
         'published_at': datetime.now(timezone.utc).isoformat()
-    }]
-    
-    # Вызываем функцию, передавая ей мок-сессию напрямую
-    result = await find_and_process_new_vacancies(mock_session, 1, vacancies_data)
-    
-    assert len(result) == 1
-    assert result[0][1]['id'] == '123'
-    # Проверяем, что новая вакансия была добавлена в сессию
-    mock_session.add.assert_called_once()
-    mock_session.flush.assert_called_once() # flush теперь тоже AsyncMock, и это сработает
+    })]
+    saved_vacancy = MagicMock(id=7, hh_id='123')
+
+    with patch('hh_bot.services.scheduler.jobs.storage.upsert_vacancies', new_callable=AsyncMock) as mock_upsert:
+        mock_upsert.return_value = {'123': saved_vacancy}
+        result = await get_or_create_vacancies(mock_session, vacancies_data)
+        rows = list(mock_upsert.await_args.args[1])
+
+    assert result == {'123': saved_vacancy}
+    assert [row['hh_id'] for row in rows] == ['123']
+    assert rows[0]['salary'] == "100000 - 150000 RUR"
+    mock_session.add.assert_not_called()
 
 @pytest.mark.asyncio
-@patch('hh_bot.services.scheduler.jobs.storage.UserVacancyStatus', new_callable=MagicMock)
-async def test_mark_vacancies_as_sent(mock_uvs_class, mock_async_session_maker):
-    """Тестирует пометку вакансий как отправленных."""
+async def test_mark_vacancies_as_sent(mock_async_session_maker):
+    """Тестирует пометку вакансий как отправленных одной пакетной вставкой."""
     
     # Настраиваем мок сессии
     mock_session = mock_async_session_maker.return_value
     mock_vacancy = MagicMock(id=1)
     
-    # Вызываем функцию, передавая ей мок-сессию напрямую
-    await mark_vacancies_as_sent(mock_session, 1, [mock_vacancy])
-    
-    # Проверяем, что session.add был вызван один раз
-    mock_session.add.assert_called_once()
-    
-    # Проверяем, что наш мок-класс UserVacancyStatus был вызван один раз с нужными параметрами
-    mock_uvs_class.assert_called_once_with(
-        user_id=1,
-        vacancy_id=1,
-        status=UserVacancyStatusEnum.SENT
-    )
\ No newline at end of file
+    with patch('hh_bot.services.scheduler.jobs.storage.add_vacancy_statuses', new_callable=AsyncMock) as mock_add:
+        # Вызываем функцию, передавая ей мок-сессию напрямую
+        await mark_vacancies_as_sent(mock_session, 1, [mock_vacancy])
+        vacancy_ids = list(mock_add.await_args.args[2])
+
+    # Никаких ORM-объектов по одному
+    mock_session.add.assert_not_called()
+    assert mock_add.await_args.args[:2] == (mock_session, 1)
+    assert vacancy_ids == [1]
+    assert mock_add.await_args.args[3] == UserVacancyStatusEnum.SENT
+
+
+@pytest.mark.asyncio
+async def test_add_vacancy_statuses_is_idempotent():
+    """Повторная пометка не создает дубликатов и не меняет выставленный пользователем статус."""
+    from sqlalchemy import select
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    from hh_bot.db.base import Base
+    from hh_bot.db.models import User, Vacancy, UserVacancyStatus
+    from hh_bot.db.repositories import add_vacancy_statuses
+
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    maker = async_sessionmaker(engine, expire_on_commit=False)
+    try:
+        async with maker() as session:
+            user = User(telegram_id="1")
+            vacancies = [Vacancy(hh_id="a"), Vacancy(hh_id="b")]
+            session.add_all([user, *vacancies])
+            await session.flush()
+            session.add(UserVacancyStatus(user_id=user.id, vacancy_id=vacancies[0].id, status=UserVacancyStatusEnum.NOT_INTERESTED))
+            await session.commit()
+
+        for _ in range(2):
+            async with maker() as session:
+                await add_vacancy_statuses(session, user.id, [v.id for v in vacancies] * 2)
+                await session.commit()
+
+        async with maker() as session:
+            rows = (await session.execute(
+                select(UserVacancyStatus.vacancy_id, UserVacancyStatus.status).order_by(UserVacancyStatus.vacancy_id)
+            )).all()
+        assert rows == [
+            (vacancies[0].id, UserVacancyStatusEnum.NOT_INTERESTED),
+            (vacancies[1].id, UserVacancyStatusEnum.SENT),
+        ]
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_upsert_vacancies_handles_existing_and_duplicate_rows():
+    """Одна пачка создает новые вакансии и возвращает существующие без IntegrityError."""
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    from hh_bot.db.base import Base
+    from hh_bot.db.models import Vacancy
+    from hh_bot.db.repositories import upsert_vacancies
+
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    maker = async_sessionmaker(engine, expire_on_commit=False)
+    try:
+        async with maker() as session:
+            session.add(Vacancy(hh_id='1', title='Old title', salary='от 100 RUR'))
+            await session.commit()
+
+        async with maker() as session:
+            vacancies = await upsert_vacancies(session, [
+                {'hh_id': '1', 'title': 'New title', 'salary': '100'},
+                {'hh_id': '2', 'title': 'Second', 'salary': None},
+                {'hh_id': '2', 'title': 'Second (dup)', 'salary': '200'},
+            ])
+            await session.commit()
+
+        assert set(vacancies) == {'1', '2'}
+        assert vacancies['1'].title == 'New title'
+        # Уже сохраненная зарплата не перезаписывается другим форматом
+        assert vacancies['1'].salary == 'от 100 RUR'
+        assert vacancies['2'].title == 'Second (dup)'
+        assert vacancies['1'].id != vacancies['2'].id
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_status_transitions_are_set_based():
+    """Переход SENT -> VIEWED одним UPDATE возвращает только измененные строки; set_vacancy_status создает или меняет строку."""
+    from sqlalchemy import select
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    from hh_bot.db.base import Base
+    from hh_bot.db.models import User, Vacancy, UserVacancyStatus
+    from hh_bot.db.repositories import add_vacancy_statuses, set_vacancy_status, transition_vacancy_statuses
+
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    maker = async_sessionmaker(engine, expire_on_commit=False)
+    try:
+        async with maker() as session:
+            user, other = User(telegram_id="1"), User(telegram_id="2")
+            vacancies = [Vacancy(hh_id=str(i)) for i in range(4)]
+            session.add_all([user, other, *vacancies])
+            await session.flush()
+            ids = [v.id for v in vacancies]
+            await add_vacancy_statuses(session, user.id, ids[:3])
+            await add_vacancy_statuses(session, other.id, ids[:3])
+            await set_vacancy_status(session, user.id, ids[2], UserVacancyStatusEnum.NOT_INTERESTED)
+            await set_vacancy_status(session, user.id, ids[3], UserVacancyStatusEnum.VIEWED)
+            status_ids = (await session.scalars(
+                select(UserVacancyStatus.id).where(UserVacancyStatus.user_id == user.id)
+            )).all()
+
+            changed = await transition_vacancy_statuses(
+                session, user.id, UserVacancyStatusEnum.VIEWED, status_ids=status_ids
+            )
+            await session.commit()
+
+            rows = dict((await session.execute(
+                select(UserVacancyStatus.vacancy_id, UserVacancyStatus.status).where(UserVacancyStatus.user_id == user.id)
+            )).all())
+            other_statuses = set((await session.scalars(
+                select(UserVacancyStatus.status).where(UserVacancyStatus.user_id == other.id)
+            )).all())
+
+        assert len(changed) == 2
+        assert rows == {
+            ids[0]: UserVacancyStatusEnum.VIEWED,
+            ids[1]: UserVacancyStatusEnum.VIEWED,
+            ids[2]: UserVacancyStatusEnum.NOT_INTERESTED,
+            ids[3]: UserVacancyStatusEnum.VIEWED,
+        }
+        assert other_statuses == {UserVacancyStatusEnum.SENT}
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_batch_inserts_stay_within_sqlite_parameter_limit():
+    """Размер пачки считается по числу колонок: ни один INSERT не превышает лимит параметров SQLite."""
+    from sqlalchemy import event, func, select
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    from hh_bot.db.base import Base
+    from hh_bot.db.models import User, Vacancy, UserVacancyStatus
+    from hh_bot.db.repositories import add_vacancy_statuses, upsert_vacancies
+    from hh_bot.db.repositories.vacancies import MAX_QUERY_PARAMS
+
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    param_counts = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _count_params(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("INSERT"):
+            param_counts.append(len(parameters))
+
+    maker = async_sessionmaker(engine, expire_on_commit=False)
+    rows = [
+        {"hh_id": str(i), "title": f"T{i}", "company": "C", "city": "M", "salary": None, "link": "u", "apply_url": None}
+        for i in range(500)
+    ]
+    try:
+        async with maker() as session:
+            user = User(telegram_id="1")
+            session.add(user)
+            await session.flush()
+            vacancies = await upsert_vacancies(session, rows)
+            await add_vacancy_statuses(session, user.id, [v.id for v in vacancies.values()])
+            await session.commit()
+            assert await session.scalar(select(func.count(UserVacancyStatus.id))) == 500
+
+        assert len(vacancies) == 500
+        # 500 строк по 7 колонок и 500 статусов (с created_at по умолчанию) - по несколько запросов
+        assert len(param_counts) > 2
+        assert max(param_counts) <= MAX_QUERY_PARAMS
+    finally:
+        await engine.dispose()
@@ -0,0 +1,71 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from hh_bot.db.base import Base
+from hh_bot.db.database import create_db_engine_and_sessionmaker, dispose_engine
+from hh_bot.db.models import User
+from hh_bot.db.routing import REPLICA, read_only_session
+
+
+async def make_db(path, telegram_id):
+    """Отдельная БД с одним пользователем: по нему видно, откуда прочитаны данные."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(User.__table__.insert().values(telegram_id=telegram_id))
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replica_and_writes_to_primary(tmp_path):
+    await make_db(tmp_path / "primary.db", "primary")
+    await make_db(tmp_path / "replica.db", "replica")
+    _, session_maker = create_db_engine_and_sessionmaker(
+        f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}",
+        replica_url=f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}",
+    )
+    try:
+        async with read_only_session(session_maker) as session:
+            assert await session.scalar(select(User.telegram_id)) == "replica"
+
+        async with session_maker() as session:
+            # Обычная сессия читает с основной БД, отдельный SELECT можно отправить на реплику
+            assert await session.scalar(select(User.telegram_id)) == "primary"
+            assert await session.scalar(select(User.telegram_id), bind_arguments={REPLICA: True}) == "replica"
+            session.add(User(telegram_id="new"))
+            await session.commit()
+
+        async with read_only_session(session_maker) as session:
+            # Запись даже из read-only сессии идет в основную БД
+            session.add(User(telegram_id="from_read_session"))
+            await session.commit()
+
+        async with session_maker() as session:
+            ids = set((await session.scalars(select(User.telegram_id))).all())
+        assert ids == {"primary", "new", "from_read_session"}
+    finally:
+        await dispose_engine()
+
+
+@pytest.mark.asyncio
+async def test_replica_failure_falls_back_to_primary(tmp_path):
+    await make_db(tmp_path / "primary.db", "primary")
+    _, session_maker = create_db_engine_and_sessionmaker(
+        f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}",
+        # Каталога нет - соединение с "репликой" не открывается
+        replica_url=f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'replica.db'}",
+    )
+    try:
+        router = session_maker.kw["router"]
+        async with read_only_session(session_maker) as session:
+            assert await session.scalar(select(User.telegram_id)) == "primary"
+        assert router.fallbacks == 1
+        assert not router.replica_available
+
+        # Пока реплика на паузе, к ней не обращаются
+        async with read_only_session(session_maker) as session:
+            assert await session.scalar(select(User.telegram_id)) == "primary"
+        assert router.fallbacks == 1
+    finally:
+        await dispose_engine()
@@ -0,0 +1,102 @@
+import json
+import time
+
+import aiohttp
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from hh_bot.services import hh_areas
+from hh_bot.services.hh_areas import AreaIndex, AreaLoader, flatten_areas, get_area_index, normalize_area_name
+from hh_bot.services.hh_service import build_search_params
+
+AREAS_TREE = [{
+    "id": "113", "name": "Россия", "areas": [
+        {"id": "1", "name": "Москва", "areas": []},
+        {"id": "2", "name": "Санкт-Петербург", "areas": []},
+        {"id": "1620", "name": "Республика Марий Эл", "areas": [
+            {"id": "1624", "name": "Йошкар-Ола", "areas": []},
+        ]},
+        {"id": "1844", "name": "Орловская область", "areas": [
+            {"id": "1848", "name": "Орёл", "areas": []},
+            {"id": "9999", "name": "Москва", "areas": []},  # Тезка в другом регионе
+        ]},
+    ],
+}]
+
+
+@pytest.fixture(autouse=True)
+def restore_area_index():
+    """Тесты подменяют глобальный индекс - возвращаем встроенный."""
+    yield
+    hh_areas.set_area_index(AreaIndex.from_seed())
+
+
+def test_normalize_area_name():
+    assert normalize_area_name("  г. Санкт-Петербург ") == "санкт петербург"
+    assert normalize_area_name("Орёл") == "орел"
+    assert normalize_area_name("ЙОШКАР — ОЛА") == "йошкар ола"
+
+
+def test_area_index_resolves_names_aliases_and_ids():
+    index = AreaIndex(flatten_areas(AREAS_TREE))
+
+    assert index.resolve("москва") == 1  # Крупный регион важнее тезки
+    assert index.resolve("Орел") == 1848
+    assert index.resolve("йошкар ола") == 1624
+    assert index.resolve("СПб") == 2
+    assert index.resolve("1624") == 1624
+    assert index.resolve("Атлантида") is None
+    assert index.resolve(None) is None
+    assert index.name_of(1848) == "Орёл"
+
+
+def test_seed_index_covers_major_cities():
+    """Без загрузки справочника крупные города все равно находятся."""
+    index = get_area_index()
+    assert index.resolve("Москва") == 1
+    assert index.resolve("питер") == 2
+
+
+def test_search_params_use_city_id():
+    """ID региона из фильтров попадает в параметр area запроса к hh.ru."""
+    assert build_search_params({"position": "Python", "city_id": 2})["area"] == 2
+
+
+@pytest.mark.asyncio
+async def test_loader_fetches_areas_and_writes_snapshot(tmp_path):
+    client = MagicMock()
+    client.get_json = AsyncMock(return_value=AREAS_TREE)
+    snapshot = tmp_path / "areas.json"
+
+    index = await AreaLoader(client, snapshot_path=str(snapshot)).load()
+
+    client.get_json.assert_awaited_once()
+    assert index is get_area_index()
+    assert index.resolve("Йошкар-Ола") == 1624
+    assert ["1624", "Йошкар-Ола"] in json.loads(snapshot.read_text(encoding="utf-8"))["areas"]
+
+
+@pytest.mark.asyncio
+async def test_loader_uses_fresh_snapshot_without_request(tmp_path):
+    snapshot = tmp_path / "areas.json"
+    snapshot.write_text(json.dumps({"fetched_at": time.time(), "areas": flatten_areas(AREAS_TREE)}), encoding="utf-8")
+    client = MagicMock()
+    client.get_json = AsyncMock()
+
+    index = await AreaLoader(client, snapshot_path=str(snapshot)).load()
+
+    client.get_json.assert_not_called()
+    assert index.resolve("Орёл") == 1848
+
+
+@pytest.mark.asyncio
+async def test_loader_falls_back_to_stale_snapshot_when_hh_is_down(tmp_path):
+    snapshot = tmp_path / "areas.json"
+    snapshot.write_text(json.dumps({"fetched_at": 0, "areas": flatten_areas(AREAS_TREE)}), encoding="utf-8")
+    client = MagicMock()
+    client.get_json = AsyncMock(side_effect=aiohttp.ClientError("down"))
+
+    index = await AreaLoader(client, snapshot_path=str(snapshot)).load()
+
+    client.get_json.assert_awaited_once()
+    assert index.resolve("Йошкар-Ола") == 1624
@@ -0,0 +1,127 @@
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+
+from hh_bot.services.hh_cache import ResponseCache, SQLiteCacheBackend, ValidatorStore
+from hh_bot.services.hh_client import HHApiClient
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_miss_and_ttl():
+    """Запись отдается до истечения TTL и считается в статистике."""
+    cache = ResponseCache(ttl=60)
+    assert await cache.get("k") is None
+
+    await cache.set("k", {"items": [1]})
+    assert await cache.get("k") == {"items": [1]}
+
+    # Запись с нулевым TTL сразу устаревает
+    await cache.set("old", {"items": []}, ttl=0)
+    assert await cache.get("old") is None
+
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 2
+    assert cache.stats.expirations == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_evicts_least_recently_used_by_count():
+    """При превышении числа записей вытесняется давно не использованная."""
+    cache = ResponseCache(max_entries=2)
+    await cache.set("a", 1)
+    await cache.set("b", 2)
+    await cache.get("a")  # "a" становится свежей
+    await cache.set("c", 3)
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == 1
+    assert await cache.get("c") == 3
+    assert cache.stats.evictions == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_evicts_by_size():
+    """Суммарный размер записей не превышает лимит в байтах."""
+    cache = ResponseCache(max_bytes=100)
+    await cache.set("a", "x", size=60)
+    await cache.set("b", "y", size=60)
+
+    assert len(cache) == 1
+    assert cache.size_bytes == 60
+    assert await cache.get("a") is None
+    assert await cache.get("b") == "y"
+
+    # Запись больше лимита вовсе не попадает в память
+    await cache.set("huge", "z", size=1000)
+    assert await cache.get("huge") is None
+
+
+@pytest.mark.asyncio
+async def test_sqlite_backend_survives_restart(tmp_path):
+    """Записи на диске доступны новому экземпляру кэша."""
+    db_path = tmp_path / "cache.db"
+    first = ResponseCache(backend=SQLiteCacheBackend(str(db_path)))
+    await first.set("k", {"found": 3})
+    first.close()
+
+    second = ResponseCache(backend=SQLiteCacheBackend(str(db_path)))
+    assert await second.get("k") == {"found": 3}
+    assert second.stats.disk_hits == 1
+    second.close()
+
+
+@pytest.mark.asyncio
+async def test_client_serves_repeated_request_from_cache():
+    """Повторный одинаковый запрос клиента не уходит в сеть."""
+    mock_response = AsyncMock()
+    mock_response.status = 200
+    mock_response.headers = {}
+    mock_response.json = AsyncMock(return_value={"items": [{"id": "1"}]})
+    mock_response.raise_for_status = MagicMock()
+    mock_response.read = AsyncMock(return_value=b'{"items": [{"id": "1"}]}')
+    mock_context = AsyncMock()
+    mock_context.__aenter__.return_value = mock_response
+
+    client = HHApiClient(cache=ResponseCache())
+    with patch('aiohttp.ClientSession.get', return_value=mock_context) as mock_get:
+        first = await client.get_json("/vacancies", params={"text": "Python", "page": 0})
+        # Порядок параметров и регистр текста не влияют на ключ
+        second = await client.get_json("/vacancies", params={"page": 0, "text": "python"})
+    await client.close()
+
+    assert first == second
+    assert mock_get.call_count == 1
+
+
+def test_validator_store_is_bounded_and_skips_responses_without_validators():
+    """Хранятся только ответы с валидаторами, старые записи вытесняются."""
+    store = ValidatorStore(max_entries=2)
+    store.set("a", etag='"a"', last_modified=None, payload=1)
+    store.set("b", etag=None, last_modified="Wed, 21 Oct 2015 07:28:00 GMT", payload=2)
+    store.set("none", etag=None, last_modified=None, payload=3)
+    assert store.get("none") is None
+
+    store.get("a")  # "a" становится самой свежей
+    store.set("c", etag='"c"', last_modified=None, payload=4)
+
+    assert len(store) == 2
+    assert store.get("b") is None
+    assert store.get("a").payload == 1
+
+
+def test_validator_store_is_bounded_by_bytes():
+    """Ответы при валидаторах учитываются по размеру, как в ResponseCache."""
+    store = ValidatorStore(max_entries=10, max_bytes=100)
+    store.set("a", etag='"a"', last_modified=None, payload={"items": []}, size=60)
+    store.set("b", etag='"b"', last_modified=None, payload={"items": []}, size=30)
+    assert store.size_bytes == 90
+
+    store.set("c", etag='"c"', last_modified=None, payload={"items": []}, size=30)
+    assert store.get("a") is None
+    assert store.size_bytes == 60
+
+    # Ответ больше лимита не сохраняется; размер без size считается по JSON
+    store.set("huge", etag='"h"', last_modified=None, payload={"items": []}, size=500)
+    assert store.get("huge") is None
+    store.set("b", etag='"b2"', last_modified=None, payload=[1, 2, 3])
+    assert store.get("b").size == len("[1, 2, 3]")
+    assert store.size_bytes == 30 + len("[1, 2, 3]")
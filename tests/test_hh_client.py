@@ -0,0 +1,242 @@
+import asyncio
+import json
+
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+
+from hh_bot.enums import HHFetchStatusEnum
+from hh_bot.services.hh_client import (
+    HHApiClient, HHApiError, HHThrottledError, parse_retry_after, resolve_json_decoder,
+)
+from hh_bot.services.hh_service import fetch_vacancies
+from hh_bot.utils.rate_limit import TokenBucket
+
+
+def _mock_get(payload):
+    """Создает мок для aiohttp.ClientSession.get, возвращающий payload."""
+    mock_response = AsyncMock()
+    mock_response.status = 200
+    mock_response.headers = {}
+    mock_response.json = AsyncMock(return_value=payload)
+    mock_response.read = AsyncMock(return_value=json.dumps(payload).encode())
+    mock_response.raise_for_status = MagicMock()
+    mock_context = AsyncMock()
+    mock_context.__aenter__.return_value = mock_response
+    return mock_context
+
+
+@pytest.mark.asyncio
+async def test_client_reuses_one_session_between_requests():
+    """Несколько запросов должны идти через одну и ту же сессию (общий пул)."""
+    client = HHApiClient(base_url="https://api.example.com")
+    assert client.closed
+
+    with patch('aiohttp.ClientSession.get', return_value=_mock_get({"items": []})) as mock_get:
+        await client.get_json("/vacancies", params={"text": "Python"})
+        first_session = client._session
+        await client.get_json("/vacancies", params={"text": "Go"})
+
+    assert client._session is first_session
+    assert mock_get.call_count == 2
+    assert mock_get.call_args.args[0] == "https://api.example.com/vacancies"
+    assert mock_get.call_args.kwargs["params"] == {"text": "Go"}
+
+    await client.close()
+    assert client.closed
+
+
+@pytest.mark.asyncio
+async def test_client_connector_settings():
+    """Параметры пула передаются в TCPConnector."""
+    client = HHApiClient(limit=7, limit_per_host=3, dns_cache_ttl=42)
+    session = client._get_session()
+    try:
+        assert session.connector.limit == 7
+        assert session.connector.limit_per_host == 3
+        assert session.connector.use_dns_cache
+    finally:
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_client_context_manager_closes_session():
+    """Выход из `async with` закрывает сессию."""
+    async with HHApiClient() as client:
+        client._get_session()
+        assert not client.closed
+    assert client.closed
+
+
+def _mock_status_sequence(statuses, headers=None):
+    """Мок aiohttp.ClientSession.get, отвечающий по очереди заданными статусами."""
+    contexts = []
+    for status in statuses:
+        mock_response = AsyncMock()
+        mock_response.status = status
+        mock_response.headers = headers or {}
+        mock_response.read = AsyncMock(return_value=b'{"items": [{"id": "1"}]}')
+        mock_response.json = AsyncMock(return_value={"items": [{"id": "1"}]})
+        mock_response.raise_for_status = MagicMock()
+        mock_context = AsyncMock()
+        mock_context.__aenter__.return_value = mock_response
+        contexts.append(mock_context)
+    return contexts
+
+
+def _fast_client(**kwargs):
+    """Клиент без реальных задержек между повторами."""
+    return HHApiClient(rate_limiter=TokenBucket(rate=1000, capacity=100), backoff_base=0, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_client_retries_throttled_request_honoring_retry_after():
+    """429 с Retry-After повторяется, после чего возвращается успешный ответ."""
+    client = _fast_client(max_retries=2)
+    with patch('aiohttp.ClientSession.get', side_effect=_mock_status_sequence([429, 200], {"Retry-After": "0"})) as mock_get:
+        data = await client.get_json("/vacancies")
+    await client.close()
+
+    assert data == {"items": [{"id": "1"}]}
+    assert mock_get.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_client_gives_up_after_max_retries():
+    """Постоянные 5xx приводят к HHApiError после всех повторов."""
+    client = _fast_client(max_retries=2)
+    with patch('aiohttp.ClientSession.get', side_effect=_mock_status_sequence([503, 503, 503])) as mock_get:
+        with pytest.raises(HHApiError) as exc_info:
+            await client.get_json("/vacancies")
+    await client.close()
+
+    assert exc_info.value.status == 503
+    assert mock_get.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_client_does_not_wait_longer_than_backoff_max():
+    """Если hh.ru просит ждать дольше допустимого, сразу возвращается HHThrottledError."""
+    client = _fast_client(max_retries=3, backoff_max=5)
+    with patch('aiohttp.ClientSession.get', side_effect=_mock_status_sequence([429], {"Retry-After": "120"})) as mock_get:
+        with pytest.raises(HHThrottledError) as exc_info:
+            await client.get_json("/vacancies")
+    await client.close()
+
+    assert exc_info.value.retry_after == 120
+    assert mock_get.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_fetch_vacancies_reports_throttling_status():
+    """fetch_vacancies отличает ограничение hh.ru от пустой выдачи."""
+    client = MagicMock()
+    client.get_json = AsyncMock(side_effect=HHThrottledError("429", retry_after=10))
+
+    result = await fetch_vacancies({"position": "Python"}, client=client)
+
+    assert len(result) == 0
+    assert result.throttled
+    assert not result.ok
+    assert result.status == HHFetchStatusEnum.THROTTLED
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("7") == 7
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("not a date") is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+
+
+@pytest.mark.asyncio
+async def test_client_sends_conditional_request_and_reuses_payload_on_304():
+    """Повторный запрос уходит с If-None-Match, а ответ 304 отдает сохраненные данные."""
+    client = _fast_client()
+    responses = _mock_status_sequence([200, 304], {"ETag": '"v1"'})
+    responses[1].__aenter__.return_value.json = AsyncMock(side_effect=AssertionError("тело 304 не читается"))
+    with patch('aiohttp.ClientSession.get', side_effect=responses) as mock_get:
+        first = await client.get_json("/vacancies", params={"text": "Python"})
+        second = await client.get_json("/vacancies", params={"text": "Python"})
+    await client.close()
+
+    assert first == second == {"items": [{"id": "1"}]}
+    assert mock_get.call_args_list[0].kwargs["headers"] is None
+    assert mock_get.call_args_list[1].kwargs["headers"] == {"If-None-Match": '"v1"'}
+    assert client.validators.not_modified == 1
+
+
+def test_resolve_json_decoder_falls_back_to_stdlib():
+    """Недоступный или явно выбранный стандартный декодер - это json.loads."""
+    assert resolve_json_decoder("json") is json.loads
+    assert resolve_json_decoder("no-such-decoder") is json.loads
+    assert resolve_json_decoder("auto")('{"items": ["вакансия"]}') == {"items": ["вакансия"]}
+
+
+@pytest.mark.asyncio
+async def test_client_decodes_body_with_configured_decoder():
+    """Тело ответа разбирается декодером, переданным клиенту."""
+    decoder = MagicMock()
+    client = HHApiClient(json_loads=decoder)
+    mock_context = _mock_get({"items": []})
+    with patch('aiohttp.ClientSession.get', return_value=mock_context):
+        await client.get_json("/vacancies")
+    await client.close()
+
+    mock_context.__aenter__.return_value.json.assert_awaited_once_with(loads=decoder)
+
+
+@pytest.mark.asyncio
+async def test_get_vacancy_details_bounds_concurrency_and_skips_failures():
+    """Карточки грузятся пачкой без дублей, не больше concurrency одновременно."""
+    client = HHApiClient()
+    in_flight = 0
+    max_in_flight = 0
+
+    async def fake_get_json(path, params=None, cache_ttl=None):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if path == "/vacancies/404":
+            raise HHApiError("not found", status=404)
+        return {"id": path.rsplit("/", 1)[1]}
+
+    client.get_json = AsyncMock(side_effect=fake_get_json)
+    details = await client.get_vacancy_details(["1", "2", "2", "3", "404"], concurrency=2)
+
+    assert set(details) == {"1", "2", "3"}
+    assert client.get_json.await_count == 4
+    assert max_in_flight == 2
+
+
+@pytest.mark.asyncio
+async def test_client_accounts_decoded_size_of_gzip_response():
+    """Лимиты кэша считают размер распакованного тела, а не сжатый Content-Length."""
+    from aiohttp import web
+    from aiohttp.test_utils import TestServer
+
+    from hh_bot.services.hh_cache import ResponseCache
+
+    payload = {"items": [{"id": str(i), "name": "Python Developer " * 20} for i in range(50)]}
+    body = json.dumps(payload).encode()
+
+    async def vacancies(request):
+        response = web.Response(body=body, content_type="application/json", headers={"ETag": '"v1"'})
+        response.enable_compression(web.ContentCoding.gzip)
+        return response
+
+    app = web.Application()
+    app.router.add_get("/vacancies", vacancies)
+    async with TestServer(app) as server:
+        cache = ResponseCache()
+        client = HHApiClient(
+            base_url=str(server.make_url("")), cache=cache,
+            rate_limiter=TokenBucket(rate=1000, capacity=100),
+        )
+        try:
+            assert await client.get_json("/vacancies", params={"page": 0}) == payload
+        finally:
+            await client.close()
+
+    assert cache.size_bytes == len(body)
+    assert client.validators.size_bytes == len(body)
@@ -1,10 +1,12 @@
 import pytest
 import pytest_asyncio
 from unittest.mock import patch, AsyncMock, MagicMock
+import asyncio
 import json
 import aiohttp
 
-from hh_bot.services.hh_service import fetch_vacancies
+from hh_bot.services.hh_service import fetch_vacancies, iter_vacancy_pages
+from hh_bot.services.vacancy_record import parse_vacancies
 
 MINIMAL_SUCCESS_RESPONSE = {
     "found": 1,
@@ -34,6 +36,7 @@ async def mock_session():
     with patch('aiohttp.ClientSession.get') as mock_get:
         mock_response = AsyncMock()
         mock_response.status = 200
+        mock_response.headers = {}
         mock_response.json = AsyncMock(return_value=MINIMAL_SUCCESS_RESPONSE)
         mock_response.raise_for_status = MagicMock()  # Синхронный метод
         mock_context = AsyncMock()
@@ -106,4 +109,66 @@ async def test_fetch_vacancies_scenarios(filters, expected_params, response_data
     
     # Дополнительная проверка для сценария с ошибкой
     if exception and isinstance(exception, aiohttp.ClientResponseError):
-        assert "Ошибка при запросе к API hh.ru" in caplog.text
\ No newline at end of file
+        assert "Ошибка при запросе к API hh.ru" in caplog.text
+
+def _page_response(page, pages, ids):
+    return {
+        "found": pages * len(ids),
+        "items": [{"id": vac_id, "name": f"Vacancy {vac_id}"} for vac_id in ids],
+        "pages": pages,
+        "page": page,
+        "per_page": 50,
+    }
+
+@pytest.mark.asyncio
+async def test_iter_vacancy_pages_fetches_remaining_pages():
+    """Первая страница определяет число страниц, остальные загружаются с учетом лимита."""
+    responses = {
+        0: _page_response(0, 5, ["1", "2"]),
+        1: _page_response(1, 5, ["3", "2"]),  # "2" сдвинулась на следующую страницу
+        2: _page_response(2, 5, ["4"]),
+    }
+    client = MagicMock()
+    client.get_json = AsyncMock(side_effect=lambda path, params: responses[params["page"]])
+
+    pages = [page async for page in iter_vacancy_pages({"position": "Python"}, client=client, max_pages=3, concurrency=2)]
+
+    # Запрошены только 3 страницы из 5 (лимит max_pages)
+    requested = sorted(call.kwargs["params"]["page"] for call in client.get_json.await_args_list)
+    assert requested == [0, 1, 2]
+    assert pages[0] == parse_vacancies(responses[0]["items"])
+    ids = [record.id for page in pages for record in page]
+    assert sorted(ids) == ["1", "2", "3", "4"]  # Без повторов между страницами
+
+@pytest.mark.asyncio
+async def test_iter_vacancy_pages_skips_failed_page(caplog):
+    """Ошибка одной из дополнительных страниц не теряет остальные результаты."""
+    def respond(path, params):
+        if params["page"] == 1:
+            raise aiohttp.ClientError("boom")
+        return _page_response(params["page"], 3, [f"id{params['page']}"])
+
+    client = MagicMock()
+    client.get_json = AsyncMock(side_effect=respond)
+
+    result = await fetch_vacancies({"position": "Python"}, client=client, max_pages=3)
+
+    assert [record.id for record in result] == ["id0", "id2"]
+    assert "Не удалось получить страницу" in caplog.text
+
+@pytest.mark.asyncio
+async def test_iter_vacancy_pages_keeps_page_order():
+    """Страницы выдаются в порядке номеров, даже если поздние загрузились раньше."""
+    delays = {1: 0.03, 2: 0.0, 3: 0.01}
+
+    async def respond(path, params):
+        page = params["page"]
+        await asyncio.sleep(delays.get(page, 0))
+        return _page_response(page, 4, [f"id{page}"])
+
+    client = MagicMock()
+    client.get_json = AsyncMock(side_effect=respond)
+
+    pages = [page async for page in iter_vacancy_pages({"position": "Python"}, client=client, max_pages=4, concurrency=3)]
+
+    assert [record.id for page in pages for record in page] == ["id0", "id1", "id2", "id3"]
@@ -9,7 +9,8 @@ from hh_bot.keyboards.inline_keyboards import (
     get_employer_type_keyboard,
     get_save_cancel_keyboard,
     get_vacancy_actions_keyboard,
-    get_apply_confirmation_keyboard
+    get_apply_confirmation_keyboard,
+    get_saved_vacancies_page_keyboard,
 )
 
 def test_get_main_menu_keyboard():
@@ -163,4 +164,27 @@ def test_get_apply_confirmation_keyboard():
     
     # Проверка кнопки подтверждения
     assert buttons[0][0].text == "✅ Я откликнулся на hh.ru"
-    assert buttons[0][0].callback_data == f"confirm_applied|{vacancy_id}"
\ No newline at end of file
+    assert buttons[0][0].callback_data == f"confirm_applied|{vacancy_id}"
+def test_get_saved_vacancies_page_keyboard():
+    """Тест клавиатуры страницы сохраненных вакансий."""
+    keyboard = get_saved_vacancies_page_keyboard(
+        [("101", "https://hh.ru/applicant/vacancy_response?vacancyId=101"), ("102", None)],
+        prev_cursor=5, next_cursor=9,
+    )
+    buttons = keyboard.inline_keyboard
+
+    # Строка на вакансию: резюме, "Сохранить" и отклик, если есть ссылка
+    assert [b.text for b in buttons[0]] == ["📄 1", "💾 1", "🔗 1"]
+    assert [b.callback_data for b in buttons[0][:2]] == [
+        "vacancy_action|101|generate_resume",
+        "vacancy_action|101|save",
+    ]
+    assert buttons[0][2].url == "https://hh.ru/applicant/vacancy_response?vacancyId=101"
+    assert [b.callback_data for b in buttons[1]] == [
+        "vacancy_action|102|generate_resume",
+        "vacancy_action|102|save",
+    ]
+    assert [b.callback_data for b in buttons[2]] == ["saved_page|prev|5", "saved_page|next|9"]
+
+    first_page = get_saved_vacancies_page_keyboard([("101", None)], next_cursor=9)
+    assert [b.callback_data for b in first_page.inline_keyboard[-1]] == ["saved_page|next|9"]
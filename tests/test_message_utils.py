@@ -6,6 +6,7 @@ from typing import cast  # <-- 1. Добавляем импорт cast
 from hh_bot.services.scheduler.jobs.formatting import format_salary, format_digest_message
 # ИСПРАВЛЕНИЕ: Импортируем саму модель Vacancy для использования в cast
 from hh_bot.db.models import Vacancy
+from hh_bot.services.vacancy_record import SalaryRange, VacancyRecord
 
 # Тесты для format_salary
 @pytest.mark.parametrize("salary_data, expected", [
@@ -19,7 +20,7 @@ from hh_bot.db.models import Vacancy
     ({'from': 100000, 'to': 150000, 'currency': 'EUR'}, "от 100000 до 150000 EUR"),
 ])
 def test_format_salary(salary_data, expected):
-    assert format_salary(salary_data) == expected
+    assert format_salary(SalaryRange.from_hh(salary_data)) == expected
 
 # Тесты для format_digest_message
 def create_mock_vacancy(title="Python Developer", company="Test Company", link="https://hh.ru/vacancy/123"):
@@ -37,7 +38,7 @@ def test_format_digest_message_empty():
 def test_format_digest_message_single_vacancy():
     """Тест для одной вакансии"""
     vac = create_mock_vacancy()
-    vac_data = {'salary': {'from': 100000, 'currency': 'RUR'}}
+    vac_data = VacancyRecord(id="123", salary=SalaryRange(salary_from=100000, currency='RUR'))
     
     # 2. Используем cast, чтобы "обмануть" Pylance
     result = format_digest_message([(cast(Vacancy, vac), vac_data)])
@@ -58,8 +59,8 @@ def test_format_digest_message_multiple_vacancies():
     vac2 = create_mock_vacancy(title="Data Scientist", company="Company B", link="https://hh.ru/vacancy/456")
     
     vacancies = [
-        (cast(Vacancy, vac1), {'salary': {'from': 100000, 'currency': 'RUR'}}), # <-- и здесь
-        (cast(Vacancy, vac2), {'salary': {'to': 200000, 'currency': 'USD'}}) # <-- и здесь
+        (cast(Vacancy, vac1), VacancyRecord(id="1", salary=SalaryRange(salary_from=100000, currency='RUR'))), # <-- и здесь
+        (cast(Vacancy, vac2), VacancyRecord(id="2", salary=SalaryRange(salary_to=200000, currency='USD'))) # <-- и здесь
     ]
     
     result = format_digest_message(vacancies)
@@ -75,7 +76,7 @@ def test_format_digest_message_multiple_vacancies():
 def test_format_digest_message_no_salary():
     """Тест для вакансии без указания зарплаты"""
     vac = create_mock_vacancy()
-    vac_data = {}  # Нет данных о зарплате
+    vac_data = VacancyRecord(id="123")  # Нет данных о зарплате
     
     result = format_digest_message([(cast(Vacancy, vac), vac_data)]) # <-- и здесь
     
@@ -0,0 +1,85 @@
+import pytest
+import pytest_asyncio
+from unittest.mock import MagicMock
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+
+from hh_bot.db.base import Base
+from hh_bot.db.models import User
+from hh_bot.middlewares import DbSessionMiddleware, LazySession
+from hh_bot.services.user_cache import UserIdentityCache
+
+
+@pytest_asyncio.fixture(scope="function")
+async def session_maker():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+def telegram_user(user_id=111):
+    tg_user = MagicMock()
+    tg_user.id = user_id
+    return tg_user
+
+
+@pytest.mark.asyncio
+async def test_lazy_session_is_created_on_first_use():
+    """Сессия создается только при первом обращении и закрывается, только если создана."""
+    real_session = MagicMock()
+    pool = MagicMock(return_value=real_session)
+    session = LazySession(pool)
+
+    await session.close()
+    pool.assert_not_called()
+
+    instance = object()
+    session.attach(instance)
+    assert session.get_bind() is real_session.get_bind.return_value
+    pool.assert_called_once()
+    real_session.add.assert_called_once_with(instance)
+    assert session.opened
+
+
+@pytest.mark.asyncio
+async def test_updates_without_db_do_not_open_session(session_maker):
+    """Апдейт с пользователем из кэша и хэндлером без БД не создает сессию; счетчик это отражает."""
+    middleware = DbSessionMiddleware(session_maker, user_cache=UserIdentityCache())
+
+    async def uses_db(event, data):
+        return await data["session"].scalar(select(User.full_name).where(User.id == data["user"].id))
+
+    async def menu(event, data):
+        return data["user"].telegram_id
+
+    # Первый апдейт создает пользователя - БД нужна
+    await middleware(menu, MagicMock(), {"event_from_user": telegram_user()})
+    assert await middleware(menu, MagicMock(), {"event_from_user": telegram_user()}) == "111"
+    # Апдейт без пользователя (например, от канала) тоже не трогает БД
+    await middleware(lambda event, data: _noop(), MagicMock(), {})
+    assert middleware.metrics() == {"updates": 3, "updates_with_db": 1}
+
+    await middleware(uses_db, MagicMock(), {"event_from_user": telegram_user()})
+    assert middleware.metrics() == {"updates": 4, "updates_with_db": 2}
+
+
+@pytest.mark.asyncio
+async def test_cached_user_changes_are_saved_through_lazy_session(session_maker):
+    """Пользователь из кэша присоединяется к сессии при ее создании, и его изменения сохраняются."""
+    middleware = DbSessionMiddleware(session_maker, user_cache=UserIdentityCache())
+    await middleware(lambda event, data: _noop(), MagicMock(), {"event_from_user": telegram_user()})
+
+    async def register(event, data):
+        data["user"].city = "Москва"
+        await data["session"].commit()
+
+    await middleware(register, MagicMock(), {"event_from_user": telegram_user()})
+
+    async with session_maker() as session:
+        assert await session.scalar(select(User.city)) == "Москва"
+
+
+async def _noop():
+    return None
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text
+
+from hh_bot.db.database import create_db_engine_and_sessionmaker, dispose_engine, get_pool_metrics
+from hh_bot.db.pool_metrics import MeteredAsyncQueuePool
+
+
+@pytest.mark.asyncio
+async def test_pool_metrics_record_waits_and_pings(tmp_path):
+    """При пуле из одного соединения второй запрос ждет; pre-ping учитывается."""
+    engine, session_maker = create_db_engine_and_sessionmaker(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=5,
+        pool_pre_ping=True,
+    )
+    try:
+        assert isinstance(engine.sync_engine.pool, MeteredAsyncQueuePool)
+
+        async def hold(delay):
+            async with session_maker() as session:
+                await session.execute(text("SELECT 1"))
+                await asyncio.sleep(delay)
+
+        await asyncio.gather(hold(0.2), hold(0))
+        stats = get_pool_metrics()
+
+        assert stats["checkouts"] == 2
+        assert stats["in_use_peak"] == 1
+        assert stats["wait_max_ms"] >= 100
+        assert stats["pings"] == 1  # Свежее соединение не пингуется, повторная выдача - да
+        assert stats["connects"] == 1
+        assert stats["overflow_checkouts"] == 0
+    finally:
+        await dispose_engine()
+
+
+@pytest.mark.asyncio
+async def test_pre_ping_can_be_disabled(tmp_path):
+    """Без pre-ping соединение выдается без проверочного запроса."""
+    engine, session_maker = create_db_engine_and_sessionmaker(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        pool_pre_ping=False,
+        pool_recycle=60,
+    )
+    try:
+        for _ in range(3):
+            async with session_maker() as session:
+                await session.execute(text("SELECT 1"))
+        stats = get_pool_metrics()
+        assert stats["checkouts"] == 3
+        assert stats["pings"] == 0
+    finally:
+        await dispose_engine()
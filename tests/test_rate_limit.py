@@ -0,0 +1,58 @@
+import asyncio
+import time
+import pytest
+
+from hh_bot.utils.rate_limit import TokenBucket
+
+
+@pytest.mark.asyncio
+async def test_bucket_allows_burst_then_limits_rate():
+    """Всплеск до capacity проходит сразу, следующий токен ждет пополнения."""
+    bucket = TokenBucket(rate=20, capacity=3)
+
+    started = time.monotonic()
+    for _ in range(3):
+        await bucket.acquire()
+    assert time.monotonic() - started < 0.05
+
+    await bucket.acquire()
+    # Четвертый токен появляется через ~1/20 секунды
+    assert time.monotonic() - started >= 0.04
+
+
+@pytest.mark.asyncio
+async def test_bucket_pause_delays_all_callers():
+    """pause() задерживает выдачу токенов даже при полном ведре."""
+    bucket = TokenBucket(rate=100, capacity=10)
+    bucket.pause(0.1)
+
+    started = time.monotonic()
+    await asyncio.gather(bucket.acquire(), bucket.acquire())
+    assert time.monotonic() - started >= 0.09
+
+
+def test_bucket_rejects_invalid_settings():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0, capacity=1)
+
+
+@pytest.mark.asyncio
+async def test_bucket_does_not_burst_after_pause():
+    """После паузы токены копятся заново: ни старые токены, ни время паузы не дают всплеска."""
+    bucket = TokenBucket(rate=20, capacity=5)
+    bucket.pause(0.1)
+
+    started = time.monotonic()
+    await bucket.acquire()
+    await bucket.acquire()
+    # Первый токен - через 1/20 с после паузы, второй - еще через 1/20 с
+    assert time.monotonic() - started >= 0.19
+
+
+def test_bucket_release_returns_tokens_up_to_capacity():
+    bucket = TokenBucket(rate=1, capacity=2)
+    bucket._tokens = 0.0
+    bucket.release()
+    assert 1.0 <= bucket.available < 1.1
+    bucket.release(5)
+    assert bucket.available == 2
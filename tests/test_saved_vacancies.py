@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+
+from hh_bot.db.base import Base
+from hh_bot.db.models import User, Vacancy, UserVacancyStatus, UserVacancyStatusEnum
+from hh_bot.handlers.vacancies.saved import (
+    get_saved_vacancies_page,
+    mark_page_viewed,
+    render_saved_vacancies_page,
+)
+
+
+@pytest_asyncio.fixture(scope="function")
+async def session():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() as session:
+        yield session
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def user(session):
+    """Пользователь с 7 вакансиями: каждая третья отмечена как неинтересная."""
+    user = User(telegram_id="111", full_name="Test User")
+    other = User(telegram_id="222", full_name="Other User")
+    session.add_all([user, other])
+    await session.flush()
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    for i in range(7):
+        vacancy = Vacancy(hh_id=str(100 + i), title=f"Vacancy <{i}>", company="ACME", link=f"https://hh.ru/vacancy/{100 + i}")
+        session.add(vacancy)
+        await session.flush()
+        status = UserVacancyStatusEnum.NOT_INTERESTED if i % 3 == 2 else UserVacancyStatusEnum.SENT
+        # Одинаковое время у пар строк проверяет, что порядок добивается по id
+        session.add(UserVacancyStatus(user_id=user.id, vacancy_id=vacancy.id, status=status, created_at=base + timedelta(minutes=i // 2)))
+        session.add(UserVacancyStatus(user_id=other.id, vacancy_id=vacancy.id, status=UserVacancyStatusEnum.SENT, created_at=base))
+    await session.commit()
+    return user
+
+
+def hh_ids(page):
+    return [vac.hh_id for _, vac in page.items]
+
+
+@pytest.mark.asyncio
+async def test_keyset_pages_forward_and_back(session, user):
+    """Листание вперед и назад возвращает те же страницы; неинтересные вакансии скрыты."""
+    first = await get_saved_vacancies_page(session, user.id, page_size=2)
+    assert hh_ids(first) == ["100", "101"]
+    assert (first.has_prev, first.has_next) == (False, True)
+
+    second = await get_saved_vacancies_page(session, user.id, cursor=first.last_cursor, page_size=2)
+    assert hh_ids(second) == ["103", "104"]
+    assert (second.has_prev, second.has_next) == (True, True)
+
+    third = await get_saved_vacancies_page(session, user.id, cursor=second.last_cursor, page_size=2)
+    assert hh_ids(third) == ["106"]
+    assert (third.has_prev, third.has_next) == (True, False)
+
+    back = await get_saved_vacancies_page(session, user.id, cursor=third.first_cursor, direction="prev", page_size=2)
+    assert hh_ids(back) == ["103", "104"]
+    back = await get_saved_vacancies_page(session, user.id, cursor=back.first_cursor, direction="prev", page_size=2)
+    assert hh_ids(back) == ["100", "101"]
+    assert back.has_prev is False
+
+
+@pytest.mark.asyncio
+async def test_stale_cursor_falls_back_to_first_page(session, user):
+    """Курсор чужой или удаленной строки не ломает список."""
+    page = await get_saved_vacancies_page(session, user.id, cursor=10_000, page_size=2)
+    assert hh_ids(page) == ["100", "101"]
+
+
+@pytest.mark.asyncio
+async def test_mark_page_viewed_updates_only_shown(session, user):
+    """Просмотренной отмечается только показанная страница."""
+    page = await get_saved_vacancies_page(session, user.id, page_size=2)
+    await mark_page_viewed(session, user.id, page)
+
+    rows = dict(
+        (await session.execute(
+            select(Vacancy.hh_id, UserVacancyStatus.status)
+            .join(Vacancy, Vacancy.id == UserVacancyStatus.vacancy_id)
+            .where(UserVacancyStatus.user_id == user.id)
+        )).all()
+    )
+    assert rows["100"] == rows["101"] == UserVacancyStatusEnum.VIEWED
+    assert rows["103"] == UserVacancyStatusEnum.SENT
+    assert rows["102"] == UserVacancyStatusEnum.NOT_INTERESTED
+
+
+@pytest.mark.asyncio
+async def test_render_page_is_single_escaped_message(session, user):
+    """Страница - одно сообщение с экранированным HTML и навигацией."""
+    page = await get_saved_vacancies_page(session, user.id, page_size=2)
+    text, keyboard = render_saved_vacancies_page(page)
+
+    assert "1. 🏢 <b>Vacancy &lt;0&gt;</b>" in text
+    assert "2. 🏢 <b>Vacancy &lt;1&gt;</b>" in text
+    assert keyboard.inline_keyboard[-1][0].callback_data == f"saved_page|next|{page.last_cursor}"
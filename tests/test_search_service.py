@@ -7,6 +7,9 @@ from sqlalchemy import select, and_
 
 from hh_bot.services.search_service import process_search_results, fetch_vacancies
 from hh_bot.db.models import User, Vacancy, UserVacancyStatus, UserVacancyStatusEnum
+from hh_bot.enums import HHFetchStatusEnum
+from hh_bot.services.hh_service import VacancySearchResult
+from hh_bot.services.vacancy_record import VacancyRecord
 
 @pytest.fixture
 def mock_user():
@@ -47,10 +50,21 @@ async def test_process_search_results_success_new_vacancies(mock_user, sample_va
     mock_message = AsyncMock()
     mock_state = MagicMock()
 
-    async_session_mock.scalar.return_value = None
+    new_vacancy = Vacancy(
+        id=1,
+        hh_id=sample_vacancy_data["id"],
+        title=sample_vacancy_data["name"],
+        company=sample_vacancy_data["employer"]["name"],
+        salary="100000",
+        link=sample_vacancy_data["alternate_url"],
+        apply_url=sample_vacancy_data["apply_url"],
+    )
 
-    with patch('hh_bot.services.search_service.fetch_vacancies', new_callable=AsyncMock) as mock_fetch:
-        mock_fetch.return_value = [sample_vacancy_data]
+    with patch('hh_bot.services.search_service.fetch_vacancies', new_callable=AsyncMock) as mock_fetch, \
+         patch('hh_bot.services.search_service.upsert_vacancies', new_callable=AsyncMock) as mock_upsert, \
+         patch('hh_bot.services.search_service.add_vacancy_statuses', new_callable=AsyncMock) as mock_statuses:
+        mock_fetch.return_value = [VacancyRecord.from_hh(sample_vacancy_data)]
+        mock_upsert.return_value = {new_vacancy.hh_id: new_vacancy}
 
         result = await process_search_results(
             message=mock_message,
@@ -61,9 +75,25 @@ async def test_process_search_results_success_new_vacancies(mock_user, sample_va
         )
 
     assert result is True
-    mock_fetch.assert_awaited_once_with({"text": "Python"})
-    async_session_mock.scalar.assert_awaited()
-    assert async_session_mock.add.call_count == 2
+    mock_fetch.assert_awaited_once_with({"text": "Python"}, client=None)
+    # Вся страница сохраняется одним вызовом, без SELECT на каждую вакансию
+    mock_upsert.assert_awaited_once()
+    rows = mock_upsert.await_args.args[1]
+    assert rows == [{
+        "hh_id": "98765",
+        "title": "Python Developer",
+        "company": "Test Company",
+        "salary": "100000",
+        "link": "https://hh.ru/vacancy/98765",
+        "apply_url": "https://hh.ru/vacancy/98765?apply=1",
+        "description_snippet": "Develop Python applications",
+        "published_at": rows[0]["published_at"],
+    }]
+    async_session_mock.scalar.assert_not_awaited()
+    # Статусы пишутся одной пакетной вставкой, а не через session.add
+    assert list(mock_statuses.await_args.args[2]) == [1]
+    assert mock_statuses.await_args.args[3] == UserVacancyStatusEnum.SENT
+    async_session_mock.add.assert_not_called()
     assert async_session_mock.commit.await_count == 1
 
     # ИСПРАВЛЕНИЕ: Более надежная проверка вызова answer
@@ -90,10 +120,11 @@ async def test_process_search_results_success_existing_vacancy(mock_user, sample
     type(existing_vacancy).link = PropertyMock(return_value=sample_vacancy_data["alternate_url"])
     existing_vacancy.apply_url = sample_vacancy_data["apply_url"]
 
-    async_session_mock.scalar.return_value = existing_vacancy
-
-    with patch('hh_bot.services.search_service.fetch_vacancies', new_callable=AsyncMock) as mock_fetch:
-        mock_fetch.return_value = [sample_vacancy_data]
+    with patch('hh_bot.services.search_service.fetch_vacancies', new_callable=AsyncMock) as mock_fetch, \
+         patch('hh_bot.services.search_service.upsert_vacancies', new_callable=AsyncMock) as mock_upsert, \
+         patch('hh_bot.services.search_service.add_vacancy_statuses', new_callable=AsyncMock) as mock_statuses:
+        mock_fetch.return_value = [VacancyRecord.from_hh(sample_vacancy_data)]
+        mock_upsert.return_value = {existing_vacancy.hh_id: existing_vacancy}
 
         result = await process_search_results(
             message=mock_message,
@@ -104,8 +135,8 @@ async def test_process_search_results_success_existing_vacancy(mock_user, sample
         )
 
     assert result is True
-    assert async_session_mock.scalar.await_count == 1
-    assert async_session_mock.add.call_count == 1
+    mock_upsert.assert_awaited_once()
+    assert list(mock_statuses.await_args.args[2]) == [55]
     assert async_session_mock.commit.await_count == 1
 
     # ИСПРАВЛЕНИЕ: Более надежная проверка вызова answer
@@ -175,4 +206,25 @@ async def test_process_search_results_api_error(mock_user, async_session_mock):
     # Эта проверка падает, потому что, скорее всего, в рабочем коде отсутствует await session.rollback()
     async_session_mock.rollback.assert_awaited_once()
     assert async_session_mock.add.call_count == 0
-    assert async_session_mock.commit.await_count == 0
\ No newline at end of file
+    assert async_session_mock.commit.await_count == 0
+@pytest.mark.asyncio
+async def test_process_search_results_throttled(mock_user, async_session_mock):
+    """Тест: ограничение hh.ru не выдается за пустой результат поиска."""
+    mock_message = AsyncMock()
+
+    with patch('hh_bot.services.search_service.fetch_vacancies', new_callable=AsyncMock) as mock_fetch:
+        mock_fetch.return_value = VacancySearchResult(status=HHFetchStatusEnum.THROTTLED, error="429")
+
+        result = await process_search_results(
+            message=mock_message,
+            state=MagicMock(),
+            session=async_session_mock,
+            user=mock_user,
+            filters_dict={"text": "Python"}
+        )
+
+    assert result is False
+    answers = [call.args[0] for call in mock_message.answer.await_args_list if call.args]
+    assert any("ограничил" in text for text in answers)
+    assert not any("не найдено" in text for text in answers)
+    assert async_session_mock.add.call_count == 0
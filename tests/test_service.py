@@ -150,4 +150,23 @@ async def test_setup_scheduler_logs_info(caplog, mock_bot, mock_session_maker, m
         # Проверяем логи (регистронезависимая проверка)
         log_messages = [record.message for record in caplog.records]
         assert any("планировщик задач запущен" in msg.lower() and "ежедневная рассылка" in msg.lower() 
-                   for msg in log_messages)
\ No newline at end of file
+                   for msg in log_messages)
+
+def test_digest_shard_times_spread_over_window():
+    """Части рассылки идут с заданным шагом и переходят через полночь."""
+    assert service_module.digest_shard_times(1, "09:00", 10) == [(9, 0)]
+    assert service_module.digest_shard_times(3, "09:00", 10) == [(9, 0), (9, 10), (9, 20)]
+    assert service_module.digest_shard_times(2, "23:50", 15) == [(23, 50), (0, 5)]
+
+
+@pytest.mark.asyncio
+async def test_setup_scheduler_with_shards(mock_bot, mock_session_maker, mock_daily_digest_job):
+    """Каждая часть рассылки - отдельная задача со своим временем запуска."""
+    with patch('hh_bot.services.scheduler.service.daily_digest_job', mock_daily_digest_job):
+        setup_scheduler(mock_bot, mock_session_maker, shards=3)
+
+        jobs = sorted(service_module.scheduler.get_jobs(), key=lambda job: job.id)
+        assert [job.id for job in jobs] == ["daily_digest_job_0", "daily_digest_job_1", "daily_digest_job_2"]
+        assert [job.kwargs["shard"] for job in jobs] == [0, 1, 2]
+        assert all(job.kwargs["shards"] == 3 for job in jobs)
+        assert len({str(job.trigger) for job in jobs}) == 3
@@ -0,0 +1,160 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select, text
+
+from hh_bot.db.database import create_db_engine_and_sessionmaker, create_tables, dispose_engine
+from hh_bot.db.models import User
+from hh_bot.db.sqlite_tuning import is_sqlite_file_url
+
+
+@pytest.mark.asyncio
+async def test_pragmas_applied_on_connect(tmp_path):
+    engine, session_maker = create_db_engine_and_sessionmaker(f"sqlite+aiosqlite:///{tmp_path / 'bot.db'}")
+    try:
+        router = session_maker.kw["router"]
+        for db_engine in (engine, router.replica):
+            async with db_engine.connect() as conn:
+                assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+                assert (await conn.execute(text("PRAGMA synchronous"))).scalar() == 1  # NORMAL
+                assert (await conn.execute(text("PRAGMA foreign_keys"))).scalar() == 1
+                assert (await conn.execute(text("PRAGMA busy_timeout"))).scalar() == 5000
+                assert (await conn.execute(text("PRAGMA cache_size"))).scalar() == -65536
+    finally:
+        await dispose_engine()
+
+
+@pytest.mark.asyncio
+async def test_reads_use_reader_pool_until_session_writes(tmp_path):
+    engine, session_maker = create_db_engine_and_sessionmaker(
+        f"sqlite+aiosqlite:///{tmp_path / 'bot.db'}", pool_size=3
+    )
+    try:
+        await create_tables(engine)
+        router = session_maker.kw["router"]
+        assert engine.sync_engine.pool.size() == 1
+        assert router.replica.sync_engine.pool.size() == 3
+
+        async with session_maker() as session:
+            assert await session.scalar(select(User.id)) is None
+            assert router.replica_reads == 1
+
+            # После записи сессия читает через соединение писателя и видит свои изменения
+            session.add(User(telegram_id="1"))
+            await session.flush()
+            assert await session.scalar(select(User.telegram_id)) == "1"
+            assert router.replica_reads == 1
+
+            await session.commit()
+            assert await session.scalar(select(User.telegram_id)) == "1"
+            assert router.replica_reads == 2
+    finally:
+        await dispose_engine()
+
+
+@pytest.mark.asyncio
+async def test_writers_queue_for_single_connection(tmp_path):
+    engine, session_maker = create_db_engine_and_sessionmaker(f"sqlite+aiosqlite:///{tmp_path / 'bot.db'}")
+    try:
+        await create_tables(engine)
+
+        async def write(telegram_id: str, started: asyncio.Event) -> None:
+            async with session_maker() as session:
+                started.set()
+                session.add(User(telegram_id=telegram_id))
+                await session.commit()
+
+        async with session_maker() as first:
+            first.add(User(telegram_id="first"))
+            await first.flush()
+
+            started = asyncio.Event()
+            second = asyncio.create_task(write("second", started))
+            await started.wait()
+            await asyncio.sleep(0.1)
+            # Соединение писателя занято первой транзакцией - вторая ждет в очереди, а не получает "database is locked"
+            assert not second.done()
+
+            # Чтение не ждет писателя
+            async with session_maker() as reader:
+                assert await reader.scalar(select(User.id)) is None
+
+            await first.commit()
+        await asyncio.wait_for(second, timeout=5)
+
+        async with session_maker() as session:
+            assert set((await session.scalars(select(User.telegram_id))).all()) == {"first", "second"}
+    finally:
+        await dispose_engine()
+
+
+@pytest.mark.asyncio
+async def test_open_session_without_writes_does_not_hold_writer(tmp_path):
+    """Пока сессия только читает, вложенная пишущая сессия того же кода не ждет писателя."""
+    engine, session_maker = create_db_engine_and_sessionmaker(
+        f"sqlite+aiosqlite:///{tmp_path / 'bot.db'}", pool_timeout=1
+    )
+    try:
+        await create_tables(engine)
+        async with session_maker() as outer:
+            assert await outer.scalar(select(User.id)) is None
+            # Как в рассылке: сессия пользователя открыта, планировщик пишет в своей сессии
+            async with session_maker() as inner:
+                inner.add(User(telegram_id="inner"))
+                await inner.commit()
+            outer.add(User(telegram_id="outer"))
+            await outer.flush()
+            # Внутри пишущей транзакции чтение идет через соединение писателя
+            ids = set((await outer.scalars(select(User.telegram_id))).all())
+            assert ids == {"inner", "outer"}
+            await outer.commit()
+    finally:
+        await dispose_engine()
+
+
+@pytest.mark.asyncio
+async def test_daily_digest_completes_on_single_writer(tmp_path, mocker):
+    """Рассылка с несколькими воркерами не упирается в единственное соединение писателя."""
+    from datetime import date
+
+    from hh_bot.db.models import DigestRun, SearchFilter, UserVacancyStatus
+    from hh_bot.enums import DigestRunStatusEnum
+    from hh_bot.services.scheduler.jobs import daily_digest_job
+    from hh_bot.services.vacancy_record import parse_vacancies
+
+    async def fake_pages(filters, **kwargs):
+        position = filters["position"]
+        yield parse_vacancies([{"id": f"{position}-{i}", "name": position} for i in range(3)])
+
+    mocker.patch("hh_bot.services.scheduler.jobs.daily_digest.iter_vacancy_pages", side_effect=fake_pages)
+    engine, session_maker = create_db_engine_and_sessionmaker(
+        f"sqlite+aiosqlite:///{tmp_path / 'bot.db'}", pool_timeout=1
+    )
+    try:
+        await create_tables(engine)
+        async with session_maker() as session:
+            for i, position in enumerate(("Python", "Python", "Java", "Go")):
+                user = User(telegram_id=str(100 + i))
+                user.search_filters = SearchFilter(position=position, freshness_days=1)
+                session.add(user)
+            await session.commit()
+
+        bot = mocker.AsyncMock()
+        await asyncio.wait_for(
+            daily_digest_job(bot, session_maker, hh_client=mocker.AsyncMock(), workers=4, run_date=date(2025, 1, 1)),
+            timeout=10,
+        )
+
+        assert bot.send_message.await_count == 4
+        async with session_maker() as session:
+            assert len((await session.scalars(select(UserVacancyStatus.id))).all()) == 12
+            assert await session.scalar(select(DigestRun.status)) == DigestRunStatusEnum.COMPLETED
+    finally:
+        await dispose_engine()
+
+
+def test_single_writer_only_for_sqlite_files():
+    assert is_sqlite_file_url("sqlite+aiosqlite:///data/bot_dev.db")
+    assert not is_sqlite_file_url("sqlite+aiosqlite://")
+    assert not is_sqlite_file_url("sqlite+aiosqlite:///:memory:")
+    assert not is_sqlite_file_url("postgresql+asyncpg://u:p@h/db")
@@ -0,0 +1,131 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import GetMe, SendMessage
+
+from hh_bot.middlewares import SendRateMiddleware
+from hh_bot.services.telegram_sender import (
+    MessagePriority,
+    TelegramSendScheduler,
+    current_send_priority,
+    send_priority,
+)
+
+
+def fast_scheduler(**kwargs) -> TelegramSendScheduler:
+    params = dict(global_rate=1000, global_burst=100, chat_rate=1000, chat_burst=100, max_retries=2)
+    params.update(kwargs)
+    return TelegramSendScheduler(**params)
+
+
+@pytest.mark.asyncio
+async def test_messages_in_one_chat_keep_order():
+    """Сообщения в один чат уходят в порядке отправки."""
+    scheduler = fast_scheduler()
+    sent = []
+
+    async def send(n):
+        await asyncio.sleep(0.001 * (5 - n))  # Ранние сообщения отправляются дольше
+        sent.append(n)
+        return n
+
+    results = await asyncio.gather(*(scheduler.submit(1, lambda n=n: send(n)) for n in range(5)))
+
+    assert results == [0, 1, 2, 3, 4]
+    assert sent == [0, 1, 2, 3, 4]
+    assert scheduler.metrics()["sent"] == 5
+    await scheduler.close()
+
+
+@pytest.mark.asyncio
+async def test_interactive_messages_overtake_bulk():
+    """При нехватке общего лимита ответы пользователю обслуживаются раньше рассылки."""
+    scheduler = fast_scheduler(global_rate=50, global_burst=1)
+    order = []
+
+    async def send(label):
+        order.append(label)
+
+    # Первое сообщение забирает единственный токен, остальные ждут в очереди
+    bulk = [
+        asyncio.create_task(scheduler.submit(chat_id, lambda c=chat_id: send(f"bulk{c}"), MessagePriority.BULK))
+        for chat_id in range(1, 5)
+    ]
+    await asyncio.sleep(0)
+    interactive = asyncio.create_task(scheduler.submit(100, lambda: send("reply"), MessagePriority.INTERACTIVE))
+    await asyncio.sleep(0.005)
+    assert scheduler.metrics()["queued_bulk"] >= 1
+
+    await asyncio.gather(*bulk, interactive)
+
+    assert order.index("reply") <= 1
+    assert scheduler.metrics()["max_queue_depth"] >= 3
+    await scheduler.close()
+
+
+@pytest.mark.asyncio
+async def test_retry_after_pauses_chat_and_retries():
+    """TelegramRetryAfter приводит к паузе чата и общего лимита и к повторной отправке."""
+    scheduler = fast_scheduler()
+    method = SendMessage(chat_id=1, text="x")
+    send = AsyncMock(side_effect=[TelegramRetryAfter(method, "Flood control", 0), "ok"])
+
+    with patch.object(scheduler.global_bucket, "pause", wraps=scheduler.global_bucket.pause) as global_pause:
+        assert await scheduler.submit(1, send) == "ok"
+    assert send.await_count == 2
+    assert scheduler.metrics()["retried"] == 1
+    # Пауза распространяется на все чаты, а не только на тот, что получил RetryAfter
+    global_pause.assert_called_once_with(0)
+
+    # После исчерпания повторов ошибка пробрасывается вызывающему
+    send = AsyncMock(side_effect=TelegramRetryAfter(method, "Flood control", 0))
+    with pytest.raises(TelegramRetryAfter):
+        await scheduler.submit(1, send)
+    assert send.await_count == 3
+    assert scheduler.metrics()["failed"] == 1
+    await scheduler.close()
+
+
+@pytest.mark.asyncio
+async def test_send_priority_context():
+    """Приоритет по умолчанию - INTERACTIVE, внутри send_priority - заданный."""
+    assert current_send_priority() is MessagePriority.INTERACTIVE
+    with send_priority(MessagePriority.BULK):
+        assert await asyncio.create_task(asyncio.sleep(0, current_send_priority())) is MessagePriority.BULK
+    assert current_send_priority() is MessagePriority.INTERACTIVE
+
+
+@pytest.mark.asyncio
+async def test_middleware_routes_chat_methods_through_scheduler():
+    """Методы с chat_id идут через планировщик, остальные - напрямую."""
+    scheduler = fast_scheduler()
+    middleware = SendRateMiddleware(scheduler)
+    make_request = AsyncMock(return_value="result")
+    bot = object()
+
+    assert await middleware(make_request, bot, SendMessage(chat_id=42, text="hi")) == "result"
+    assert scheduler.metrics()["sent"] == 1
+
+    assert await middleware(make_request, bot, GetMe()) == "result"
+    assert scheduler.metrics()["sent"] == 1
+    assert make_request.await_count == 2
+    await scheduler.close()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_sender_returns_global_token():
+    """Токен, выданный для уже отмененной отправки, возвращается в общее ведро."""
+    scheduler = fast_scheduler()
+    with patch.object(scheduler.global_bucket, "release", wraps=scheduler.global_bucket.release) as release:
+        waiter = asyncio.create_task(scheduler._global_permit(MessagePriority.BULK))
+        await asyncio.sleep(0)  # Заявка поставлена в очередь
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        for _ in range(5):
+            await asyncio.sleep(0)
+    release.assert_called_once_with()
+    assert scheduler.global_bucket.available > scheduler.global_bucket.capacity - 1
+    await scheduler.close()
@@ -0,0 +1,94 @@
+import pytest
+import pytest_asyncio
+from unittest.mock import MagicMock
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+
+from hh_bot.db.base import Base
+from hh_bot.db.models import User
+from hh_bot.middlewares import DbSessionMiddleware
+from hh_bot.services.user_cache import UserIdentityCache
+
+
+@pytest_asyncio.fixture(scope="function")
+async def engine():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def statements(engine):
+    """Запоминает SQL-запросы, отправленные в БД."""
+    seen = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+
+    return seen
+
+
+def telegram_user(user_id=111):
+    tg_user = MagicMock()
+    tg_user.id = user_id
+    tg_user.username = "tester"
+    tg_user.first_name = "Test"
+    tg_user.last_name = None
+    return tg_user
+
+
+def test_cache_ttl_and_lru_eviction():
+    """Запись устаревает по TTL, а при переполнении вытесняется давно не использованная."""
+    now = [0.0]
+    cache = UserIdentityCache(ttl=10, max_entries=2, clock=lambda: now[0])
+    for telegram_id in ("1", "2"):
+        cache.put(User(id=int(telegram_id), telegram_id=telegram_id))
+    assert cache.get("1") is not None  # "1" становится свежее "2"
+    cache.put(User(id=3, telegram_id="3"))
+    assert cache.get("2") is None
+    assert cache.get("1").id == 1
+
+    now[0] = 11
+    assert cache.get("1") is None
+    assert len(cache) == 1
+
+
+@pytest.mark.asyncio
+async def test_middleware_serves_user_from_cache(engine, statements):
+    """Повторный апдейт не делает SELECT пользователя; изменения пользователя в хэндлере сохраняются."""
+    maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    cache = UserIdentityCache()
+    middleware = DbSessionMiddleware(maker, user_cache=cache)
+    seen_users = []
+
+    async def handler(event, data):
+        seen_users.append(data["user"])
+        assert data["user_cache"] is cache
+        return "ok"
+
+    # Первый апдейт: пользователь создается и попадает в кэш
+    assert await middleware(handler, MagicMock(), {"event_from_user": telegram_user()}) == "ok"
+    user_id = seen_users[0].id
+
+    statements.clear()
+    await middleware(handler, MagicMock(), {"event_from_user": telegram_user()})
+    assert not any("FROM users" in statement for statement in statements)
+    assert seen_users[1].id == user_id
+    assert seen_users[1] is not seen_users[0]
+
+    # Хэндлер меняет пользователя (как при регистрации) и сбрасывает кэш
+    async def register(event, data):
+        data["user"].full_name = "Иван"
+        await data["session"].commit()
+        data["user_cache"].invalidate(data["user"].telegram_id)
+
+    await middleware(register, MagicMock(), {"event_from_user": telegram_user()})
+
+    statements.clear()
+    await middleware(handler, MagicMock(), {"event_from_user": telegram_user()})
+    assert any("FROM users" in statement for statement in statements)
+    assert seen_users[-1].full_name == "Иван"
+    assert cache.get("111").full_name == "Иван"
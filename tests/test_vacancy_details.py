@@ -0,0 +1,58 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from hh_bot.db.models import Vacancy
+from hh_bot.services.vacancy_details import ensure_vacancy_details
+
+
+@pytest.mark.asyncio
+async def test_ensure_vacancy_details_fetches_only_missing_cards():
+    """Карточки запрашиваются только для вакансий без сохраненного описания."""
+    session = MagicMock()
+    session.flush = AsyncMock()
+    fresh = Vacancy(hh_id="1")
+    known = Vacancy(hh_id="2", description="Уже есть", details_fetched_at=MagicMock())
+    client = MagicMock()
+    client.get_vacancy_details = AsyncMock(return_value={
+        "1": {"id": "1", "description": "<p>Писать код</p>", "key_skills": [{"name": "Python"}]},
+    })
+
+    updated = await ensure_vacancy_details(session, [fresh, known], client)
+
+    assert updated == 1
+    assert list(client.get_vacancy_details.await_args.args[0]) == ["1"]
+    assert fresh.description == "Писать код"
+    assert fresh.key_skills == ["Python"]
+    assert fresh.details_fetched_at is not None
+    session.flush.assert_awaited_once()
+
+    # Повторный вызов не обращается к hh.ru
+    client.get_vacancy_details.reset_mock()
+    assert await ensure_vacancy_details(session, [fresh, known], client) == 0
+    client.get_vacancy_details.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_document_generation_commits_details_before_llm_call():
+    """Загруженные детали коммитятся до генерации: транзакция не держится на время вызова LLM."""
+    from hh_bot.handlers import document_generation
+
+    calls = []
+    session = MagicMock()
+    session.scalar = AsyncMock(return_value=Vacancy(id=7, hh_id="1"))
+    session.commit = AsyncMock(side_effect=lambda: calls.append("commit"))
+    callback = MagicMock()
+    callback.answer = AsyncMock()
+    callback.data = "vacancy_action|1|generate_resume"
+    callback.message.answer = AsyncMock(return_value=MagicMock(edit_text=AsyncMock()))
+
+    async def generate(**kwargs):
+        calls.append("generate")
+        raise ValueError("LLM недоступна")
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(document_generation, "ensure_vacancy_details", AsyncMock(return_value=1))
+        mp.setattr(document_generation, "generate_resume_for_vacancy", generate)
+        await document_generation.handle_document_generation(callback, session, MagicMock(id=3))
+
+    assert calls == ["commit", "generate"]
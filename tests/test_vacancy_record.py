@@ -0,0 +1,50 @@
+from datetime import datetime, timezone
+
+from hh_bot.services.vacancy_record import SalaryRange, VacancyDetails, VacancyRecord, parse_vacancies
+
+
+def test_vacancy_record_from_hh_normalizes_fields():
+    """Вакансия разбирается в нужные боту поля, дата переводится в UTC."""
+    record = VacancyRecord.from_hh({
+        'id': 123,
+        'name': 'Python Developer',
+        'employer': {'name': 'Test Company', 'logo_urls': {'90': 'x'}},
+        'salary': {'from': 100000, 'to': None, 'currency': 'RUR', 'gross': False},
+        'alternate_url': 'https://hh.ru/vacancy/123',
+        'snippet': {'requirement': 'Python', 'responsibility': None},
+        'published_at': '2025-10-01T12:00:00+0300',
+    })
+
+    assert record.id == '123'
+    assert record.employer == 'Test Company'
+    assert record.salary == SalaryRange(salary_from=100000, currency='RUR')
+    assert record.apply_url == 'https://hh.ru/vacancy/123'  # Нет apply_url - ссылка на вакансию
+    assert record.responsibility == ''
+    assert record.requirement == 'Python'
+    assert record.published_at == datetime(2025, 10, 1, 9, 0, tzinfo=timezone.utc)
+    assert record.published_at_utc_naive == datetime(2025, 10, 1, 9, 0)
+    assert not hasattr(record, '__dict__')  # Слоты, без словаря атрибутов
+
+
+def test_vacancy_record_tolerates_missing_and_invalid_fields():
+    """Пустые вложенные объекты и некорректная дата не ломают разбор."""
+    record, = parse_vacancies([
+        {'id': '1', 'employer': None, 'salary': None, 'snippet': None, 'published_at': 'вчера'},
+        {'name': 'Без id'},
+    ])
+
+    assert record.employer is None
+    assert record.salary is None
+    assert record.published_at is None
+
+
+def test_vacancy_details_from_hh_strips_html_and_collects_skills():
+    details = VacancyDetails.from_hh({
+        'id': 7,
+        'description': '<p><strong>Задачи:</strong></p><ul><li>API &amp; сервисы</li></ul>',
+        'key_skills': [{'name': 'Python'}, {'name': 'PostgreSQL'}],
+    })
+
+    assert details.id == '7'
+    assert details.description == 'Задачи:\n- API & сервисы'
+    assert details.key_skills == ('Python', 'PostgreSQL')